@@ -0,0 +1,25 @@
+from typing import Any
+
+import orjson
+from django.http import HttpRequest
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    JSON-рендерер ответов API на orjson.
+
+    Значения, которые orjson не сериализует сам (Decimal), а также datetime и dataclass
+    передаются NinjaJSONEncoder, поэтому ответ содержит те же значения, что и со стандартным
+    JSONRenderer: суммы - строками "150.00", даты - в формате DjangoJSONEncoder.
+    Отличается только запись: без пробелов-разделителей и без экранирования не-ASCII символов.
+    """
+    media_type = 'application/json'
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def __init__(self):
+        self.encoder = NinjaJSONEncoder()
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> bytes:
+        return orjson.dumps(data, default=self.encoder.default, option=self.options)
@@ -1,9 +1,33 @@
+from django.http import HttpResponse
 from django.urls import path
 from ninja import NinjaAPI
+from ninja.errors import HttpError
 
+from core.api.renderers import ORJSONRenderer
 from core.api.v1.urls import router as v1_router
+from core.apps.common import metrics
+from core.apps.common.exception.base import ServiceException
+
+api = NinjaAPI(csrf=False, renderer=ORJSONRenderer())
+
+
+@api.exception_handler(HttpError)
+def http_error_handler(request, exc: HttpError):
+    """Ответ на HttpError с заголовками ServiceException, из которого он получен (например, Retry-After)."""
+    if isinstance(exc.__cause__, ServiceException):
+        metrics.SERVICE_EXCEPTIONS.labels(exception=type(exc.__cause__).__name__, status=exc.status_code).inc()
+    response = api.create_response(request, {"detail": str(exc)}, status=exc.status_code)
+    for header, value in getattr(exc.__cause__, 'headers', {}).items():
+        response[header] = value
+    return response
+
+
+@api.get("metrics", include_in_schema=False)
+def get_metrics(request):
+    """Метрики запросов и операций в текстовом формате Prometheus, собранные со всех воркеров."""
+    content, content_type = metrics.render_metrics()
+    return HttpResponse(content, content_type=content_type)
 
-api = NinjaAPI(csrf=False)
 
 api.add_router("v1/", v1_router)
 
@@ -1,20 +1,123 @@
 import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Generator
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Literal, TypeVar
 
-from django.http import HttpRequest
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
-from ninja import Router
+from ninja import Header, Query, Router
 from ninja.errors import HttpError
 
 from core.api.v1.schemas import ApiResponse
-from core.api.v1.wallets.schemas import WalletTransactionInSchema, WalletTransactionOutSchema, WalletDataOutSchema
+from core.api.v1.wallets.schemas import (
+    WalletBatchOperationInSchema,
+    WalletChangeOutSchema,
+    WalletDataOutSchema,
+    WalletHoldCaptureInSchema,
+    WalletHoldInSchema,
+    WalletHoldOutSchema,
+    WalletLockStatsOutSchema,
+    WalletLookupInSchema,
+    WalletLookupOutSchema,
+    WalletOperationResultOutSchema,
+    WalletOperationStatusOutSchema,
+    WalletTransactionInSchema,
+    WalletTransactionOutSchema,
+    WalletTransferInSchema,
+    WalletTransferOutSchema,
+)
+from core.apps.common.enums import OperationType, TransactionStatus
 from core.apps.common.exception.base import ServiceException
-from core.apps.wallets.factories import get_billing_use_case, get_wallet_query_service
+from core.apps.wallets.dto.transaction import TransactionFiltersDTO
+from core.apps.wallets.dto.wallets import (
+    WalletChangeDTO,
+    WalletHoldSettlementDTO,
+    WalletLockStatsDTO,
+    WalletValidatorsDTO,
+)
+from core.apps.wallets.services.locks import build_lock_report, load_lock_profiles
+from core.apps.wallets.services.notifications import aget_wallet_changes
+from core.apps.wallets.factories import (
+    get_billing_use_case,
+    get_transaction_query_service,
+    get_wallet_change_listener,
+    get_wallet_lock_profiler,
+    get_wallet_query_service,
+)
 
 router = Router(tags=["Wallets"])
 
+MAX_STREAM_WALLETS = 100
+MAX_LOCK_REPORT_WALLETS = 1000
+
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True, slots=True)
+class ServiceCall:
+    """Вызов сервиса из обработчика: в режиме wsgi выполняется func, в режиме asgi - afunc."""
+    func: Callable[..., Any]
+    afunc: Callable[..., Awaitable[Any]]
+    kwargs: dict[str, Any]
+
+
+HandlerSteps = Generator[ServiceCall, Any, T]
+
+
+def call_service(service: object, method: str, **kwargs) -> ServiceCall:
+    """Вызов метода сервиса, асинхронный вариант - одноименный метод с префиксом 'a'."""
+    return ServiceCall(func=getattr(service, method), afunc=getattr(service, f'a{method}'), kwargs=kwargs)
+
+
+def service_handler(handler: Callable[..., HandlerSteps]) -> Callable:
+    """
+    Регистрирует обработчик, описанный один раз для обоих режимов сервера.
+
+    Обработчик - генератор: он отдает через yield вызовы сервисов ServiceCall, получает их результаты
+    и возвращает ответ. В режиме SERVER_MODE=asgi регистрируется асинхронное представление, которое
+    ожидает асинхронные методы сервисов, в режиме wsgi - синхронное: асинхронное под WSGI выполнялось бы
+    через async_to_sync, а синхронные сервисы внутри него - еще и через sync_to_async, то есть запрос
+    дважды переключался бы между потоками. Ошибки сервисов возвращаются клиенту как HttpError.
+    """
+    if settings.SERVER_MODE == 'asgi':
+        @wraps(handler)
+        async def view(*args, **kwargs):
+            steps = handler(*args, **kwargs)
+            result = None
+            try:
+                while True:
+                    service_call = steps.send(result)
+                    result = await service_call.afunc(**service_call.kwargs)
+            except StopIteration as stop:
+                return stop.value
+            except ServiceException as exc:
+                raise HttpError(status_code=exc.status_code, message=exc.message) from exc
+    else:
+        @wraps(handler)
+        def view(*args, **kwargs):
+            steps = handler(*args, **kwargs)
+            result = None
+            try:
+                while True:
+                    service_call = steps.send(result)
+                    result = service_call.func(**service_call.kwargs)
+            except StopIteration as stop:
+                return stop.value
+            except ServiceException as exc:
+                raise HttpError(status_code=exc.status_code, message=exc.message) from exc
+    return view
+
+
+
 
 @router.post('{wallet_id}/operation',
-             response={201: ApiResponse[WalletTransactionOutSchema]},
+             response={201: ApiResponse[WalletTransactionOutSchema], 202: ApiResponse[WalletTransactionOutSchema]},
              description="""Пополнение или списание средств с кошелька.
              
              Данные кошельков:
@@ -31,6 +134,11 @@ router = Router(tags=["Wallets"])
              - wallet_id: UUID кошелька для операции
              - amount: Сумма операции (положительное число)
              - operation_type: Тип операции - 'deposit' или 'withdrawal'
+             - Idempotency-Key: Необязательный заголовок. Повторный запрос с тем же ключом
+               возвращает ранее созданную транзакцию без повторного списания или пополнения
+             - mode: 'sync' (по умолчанию) - операция выполняется сразу, ответ 201;
+               'async' - операция принимается в статусе 'В обработке' и выполняется обработчиком
+               очереди, ответ 202. Результат доступен по GET {wallet_id}/operations/{transaction_id}
 
              Возвращает:
              - Данные о выполненной транзакции с новым балансом кошелька
@@ -40,19 +148,303 @@ router = Router(tags=["Wallets"])
              Ошибки:
              - 404: Кошелек не найден
              - 400: Недостаточно средств для списания
-             - 400: Неверный тип операции или сумма""")
+             - 400: Неверный тип операции или сумма
+             - 409: Операция с этим ключом идемпотентности еще выполняется
+             - 422: Ключ идемпотентности уже использован для другой операции
+             - 429: Кошелек занят другими операциями, повторите запрос через Retry-After секунд""")
+@service_handler
 def create_wallet(request: HttpRequest,
-                  wallet_id: uuid.UUID,
-                  operation_data: WalletTransactionInSchema) -> ApiResponse[WalletTransactionOutSchema]:
-    billing_use_case = get_billing_use_case()
-    operation_dto = operation_data.to_dto(wallet_id=wallet_id)
-    try:
-        transaction_dto = billing_use_case.process_operation(operation=operation_dto)
-    except ServiceException as exc:
-        raise HttpError(status_code=exc.status_code, message=exc.message)
+                 wallet_id: uuid.UUID,
+                 operation_data: WalletTransactionInSchema,
+                 idempotency_key: str | None = Header(None, alias='Idempotency-Key', max_length=255),
+                 mode: Literal['sync', 'async'] = 'sync'
+                 ) -> HandlerSteps[tuple[int, ApiResponse[WalletTransactionOutSchema]]]:
+    transaction_dto = yield call_service(
+        get_billing_use_case(),
+        'submit_operation' if mode == 'async' else 'process_operation',
+        operation=operation_data.to_dto(wallet_id=wallet_id, idempotency_key=idempotency_key)
+    )
+    status_code = 202 if transaction_dto.status == TransactionStatus.IN_PROCESSING else 201
+    return status_code, ApiResponse(data=WalletTransactionOutSchema.from_dto(transaction_dto))
+
+
+
+
+@router.post('{wallet_id}/transfer',
+             response={201: ApiResponse[WalletTransferOutSchema]},
+             description="""Перевод средств с кошелька на другой кошелек.
+
+             Списание и зачисление выполняются атомарно в одной транзакции БД
+             и записываются двумя связанными транзакциями с типом 'transfer'.
+
+             Параметры:
+             - wallet_id: UUID кошелька отправителя
+             - target_wallet_id: UUID кошелька получателя
+             - amount: Сумма перевода (положительное число)
+
+             Возвращает:
+             - Транзакцию списания с кошелька отправителя
+             - Транзакцию зачисления на кошелек получателя
+
+             Ошибки:
+             - 404: Кошелек отправителя или получателя не найден
+             - 400: Недостаточно средств для перевода
+             - 400: Перевод на тот же кошелек
+             - 429: Кошелек занят другими операциями, повторите запрос через Retry-After секунд""")
+@service_handler
+def transfer_funds(request: HttpRequest,
+                   wallet_id: uuid.UUID,
+                   transfer_data: WalletTransferInSchema) -> HandlerSteps[ApiResponse[WalletTransferOutSchema]]:
+    transfer_result_dto = yield call_service(get_billing_use_case(), 'process_transfer',
+                                             transfer=transfer_data.to_dto(wallet_id=wallet_id))
+    return ApiResponse(data=WalletTransferOutSchema.from_dto(transfer_result_dto))
+
+
+
+
+@router.post('{wallet_id}/holds',
+             response={201: ApiResponse[WalletHoldOutSchema]},
+             description="""Резервирование средств кошелька.
+
+             Зарезервированная сумма остается на балансе, но недоступна для списаний и переводов
+             до списания резерва (capture) или его снятия (release). По истечении срока действия
+             резерв снимается автоматически.
+
+             Параметры:
+             - wallet_id: UUID кошелька
+             - amount: Сумма резерва (положительное число)
+             - ttl_seconds: Срок действия резерва в секундах (необязательный)
+
+             Возвращает:
+             - Транзакцию резерва в статусе 'В обработке' и срок его действия
+
+             Ошибки:
+             - 404: Кошелек не найден
+             - 400: Недостаточно доступных средств
+             - 429: Кошелек занят другими операциями, повторите запрос через Retry-After секунд""")
+@service_handler
+def hold_funds(request: HttpRequest,
+               wallet_id: uuid.UUID,
+               hold_data: WalletHoldInSchema) -> HandlerSteps[ApiResponse[WalletHoldOutSchema]]:
+    transaction_dto = yield call_service(get_billing_use_case(), 'process_hold',
+                                         hold=hold_data.to_dto(wallet_id=wallet_id))
+    return ApiResponse(data=WalletHoldOutSchema.from_dto(transaction_dto))
+
+
+
+
+@router.post('{wallet_id}/holds/{hold_id}/capture',
+             response={201: ApiResponse[WalletTransactionOutSchema]},
+             description="""Списание зарезервированных средств.
+
+             Списывается вся сумма резерва или ее часть, остаток резерва освобождается.
+
+             Параметры:
+             - wallet_id: UUID кошелька
+             - hold_id: UUID транзакции резерва
+             - amount: Сумма списания, не больше суммы резерва (необязательный, по умолчанию - вся сумма)
+
+             Возвращает:
+             - Транзакцию списания резерва с новым балансом кошелька
+
+             Ошибки:
+             - 404: Резерв не найден
+             - 400: Сумма списания больше суммы резерва
+             - 409: Резерв уже списан, снят или его срок действия истек
+             - 429: Кошелек занят другими операциями, повторите запрос через Retry-After секунд""")
+@service_handler
+def capture_hold(request: HttpRequest,
+                 wallet_id: uuid.UUID,
+                 hold_id: uuid.UUID,
+                 capture_data: WalletHoldCaptureInSchema) -> HandlerSteps[ApiResponse[WalletTransactionOutSchema]]:
+    transaction_dto = yield call_service(get_billing_use_case(), 'process_capture',
+                                         settlement=capture_data.to_dto(wallet_id=wallet_id, hold_id=hold_id))
     return ApiResponse(data=WalletTransactionOutSchema.from_dto(transaction_dto))
 
 
+
+
+@router.post('{wallet_id}/holds/{hold_id}/release',
+             response={201: ApiResponse[WalletTransactionOutSchema]},
+             description="""Снятие резерва без списания средств.
+
+             Параметры:
+             - wallet_id: UUID кошелька
+             - hold_id: UUID транзакции резерва
+
+             Возвращает:
+             - Транзакцию снятия резерва
+
+             Ошибки:
+             - 404: Резерв не найден
+             - 409: Резерв уже списан или снят
+             - 429: Кошелек занят другими операциями, повторите запрос через Retry-After секунд""")
+@service_handler
+def release_hold(request: HttpRequest,
+                 wallet_id: uuid.UUID,
+                 hold_id: uuid.UUID) -> HandlerSteps[ApiResponse[WalletTransactionOutSchema]]:
+    transaction_dto = yield call_service(get_billing_use_case(), 'process_release',
+                                         settlement=WalletHoldSettlementDTO(wallet_id=wallet_id, hold_id=hold_id))
+    return ApiResponse(data=WalletTransactionOutSchema.from_dto(transaction_dto))
+
+
+
+
+@router.post('operations/batch',
+             response={200: ApiResponse[list[WalletOperationResultOutSchema]]},
+             description="""Пакетное выполнение операций пополнения и списания.
+
+             Все операции пакета выполняются в одной транзакции БД, кошельки блокируются
+             в порядке возрастания id. Ошибка отдельной операции не отменяет остальные.
+
+             Параметры:
+             - operations: Список операций (до 1000), каждая содержит
+               wallet_id, amount и operation_type ('deposit' или 'withdrawal')
+
+             Возвращает:
+             - Результаты операций в порядке запроса: данные транзакции
+               или сообщение и код ошибки для отклоненной операции
+
+             Ошибки:
+             - 422: Неверный формат запроса или превышен размер пакета
+             - 429: Кошелек занят другими операциями, повторите запрос через Retry-After секунд""")
+@service_handler
+def process_operations_batch(request: HttpRequest,
+                             batch_data: WalletBatchOperationInSchema
+                             ) -> HandlerSteps[ApiResponse[list[WalletOperationResultOutSchema]]]:
+    results = yield call_service(get_billing_use_case(), 'process_batch', operations=batch_data.to_dto())
+    return ApiResponse(data=[WalletOperationResultOutSchema.from_dto(result) for result in results])
+
+
+
+
+@router.post('lookup',
+             response={200: ApiResponse[list[WalletLookupOutSchema]]},
+             description="""Получение нескольких кошельков одним запросом, вместе с 5 последними транзакциями каждого.
+
+             Вместо отдельного запроса GET /wallets/{wallet_id} на каждый кошелек:
+             кошельки и их транзакции загружаются постоянным числом запросов к БД.
+
+             Параметры:
+             - wallet_ids: Список UUID кошельков (до 500)
+             - user_ids: Список id пользователей (до 500), нужно указать хотя бы один из списков
+
+             Возвращает:
+             - Данные найденных кошельков с user_id, упорядоченные по wallet_id
+             - meta.missing_wallet_ids, meta.missing_user_ids: Идентификаторы, для которых кошелек не найден
+
+             Ошибки:
+             - 422: Неверный формат запроса или превышен размер списка""")
+@service_handler
+def lookup_wallets(request: HttpRequest,
+                   lookup_data: WalletLookupInSchema) -> HandlerSteps[ApiResponse[list[WalletLookupOutSchema]]]:
+    wallet_dtos = yield call_service(get_wallet_query_service(), 'get_wallets',
+                                     wallet_ids=lookup_data.wallet_ids, user_ids=lookup_data.user_ids)
+    found_wallet_ids = {wallet_dto.id for wallet_dto in wallet_dtos}
+    found_user_ids = {wallet_dto.user_id for wallet_dto in wallet_dtos}
+    return ApiResponse(
+        data=[WalletLookupOutSchema.from_dto(wallet_dto) for wallet_dto in wallet_dtos],
+        meta={
+            'missing_wallet_ids': [str(wallet_id) for wallet_id in dict.fromkeys(lookup_data.wallet_ids)
+                                   if wallet_id not in found_wallet_ids],
+            'missing_user_ids': [user_id for user_id in dict.fromkeys(lookup_data.user_ids)
+                                 if user_id not in found_user_ids],
+        }
+    )
+
+
+
+
+@router.get('locks',
+            response={200: ApiResponse[list[WalletLockStatsOutSchema]]},
+            description="""Самые часто блокируемые кошельки по профилю блокировок всех процессов.
+
+             Для каждого кошелька: количество блокировок select_for_update(), перцентили ожидания
+             блокировки и время ее удержания до фиксации транзакции. Профили процессов обновляются
+             раз в WALLET_LOCK_PROFILE_DUMP_INTERVAL секунд, профиль обработавшего запрос процесса - сразу.
+             Требует WALLET_LOCK_PROFILING_ENABLED=True.
+
+             Параметры:
+             - limit: Количество кошельков в отчете (по умолчанию 20)
+
+             Возвращает:
+             - lock_count: Количество блокировок, lock_count_error - его возможное завышение после вытеснения из профиля
+             - wait_p50_ms, wait_p95_ms, wait_p99_ms, wait_max_ms: Ожидание блокировки, мс
+             - hold_avg_ms, hold_max_ms: Удержание блокировки, мс
+
+             Ошибки:
+             - 503: Профиль блокировок отключен""")
+@service_handler
+def get_wallet_locks(request: HttpRequest,
+                     limit: int = Query(20, ge=1, le=MAX_LOCK_REPORT_WALLETS)
+                     ) -> HandlerSteps[ApiResponse[list[WalletLockStatsOutSchema]]]:
+    lock_profiler = get_wallet_lock_profiler()
+    if lock_profiler is None:
+        raise HttpError(status_code=503, message='Профиль блокировок кошельков отключен')
+    lock_stats = yield ServiceCall(func=_get_lock_report, afunc=sync_to_async(_get_lock_report),
+                                   kwargs={'limit': limit})
+    return ApiResponse(data=[WalletLockStatsOutSchema.from_dto(stats) for stats in lock_stats])
+
+
+def _get_lock_report(limit: int) -> list[WalletLockStatsDTO]:
+    get_wallet_lock_profiler().dump()
+    return build_lock_report(load_lock_profiles(settings.WALLET_LOCK_PROFILE_DIR), limit)
+
+
+@router.get('stream',
+            description="""Поток изменений балансов кошельков (Server-Sent Events).
+
+             Сразу после подключения для каждого кошелька отправляется событие 'balance'
+             с текущим балансом, затем - после каждого зафиксированного изменения.
+             Пока изменений нет, раз в несколько секунд отправляется комментарий keepalive.
+             Требует WALLET_CHANGE_STREAM_ENABLED=True и режима SERVER_MODE=asgi.
+
+             Параметры:
+             - wallet_id: UUID кошелька, можно указать несколько раз (до 100)
+
+             Данные события 'balance':
+             - wallet_id, balance, reserved_balance, available_balance
+             - version: Версия кошелька, растет с каждым изменением
+
+             Ошибки:
+             - 503: Поток изменений отключен или сервер запущен не в режиме asgi""")
+async def stream_wallet_changes(request: HttpRequest,
+                                wallet_id: list[uuid.UUID] = Query(..., min_length=1,
+                                                                   max_length=MAX_STREAM_WALLETS)
+                                ) -> StreamingHttpResponse:
+    if not settings.WALLET_CHANGE_STREAM_ENABLED:
+        raise HttpError(status_code=503, message='Поток изменений балансов отключен')
+    # Под WSGI StreamingHttpResponse дочитывает асинхронный итератор до конца перед отправкой,
+    # а бесконечный поток событий навсегда занял бы синхронный воркер
+    if settings.SERVER_MODE != 'asgi':
+        raise HttpError(status_code=503, message='Поток изменений балансов доступен только в режиме SERVER_MODE=asgi')
+    response = StreamingHttpResponse(_wallet_change_events(set(wallet_id)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _wallet_change_events(wallet_ids: set[uuid.UUID]) -> AsyncIterator[str]:
+    """События SSE: текущие балансы кошельков, затем их изменения до отключения клиента."""
+    listener = get_wallet_change_listener()
+    # Подписка раньше чтения текущих балансов: изменение между ними придет событием
+    subscription = listener.subscribe(wallet_ids)
+    try:
+        for change in await aget_wallet_changes(wallet_ids):
+            yield _format_change_event(change)
+        while True:
+            change = await subscription.get(timeout=settings.WALLET_CHANGE_STREAM_HEARTBEAT_SECONDS)
+            yield ': keepalive\n\n' if change is None else _format_change_event(change)
+    finally:
+        listener.unsubscribe(subscription)
+
+
+def _format_change_event(change: WalletChangeDTO) -> str:
+    return f'event: balance\ndata: {WalletChangeOutSchema.from_dto(change).model_dump_json()}\n\n'
+
+
+
+
 @router.get('{wallet_id}',
             response=ApiResponse[WalletDataOutSchema],
             description="""Получение кошелька по его id, вместе с 5 последними транзакциями.
@@ -64,20 +456,128 @@ def create_wallet(request: HttpRequest,
              Параметры:
              - wallet_id: UUID кошелька 
 
+             Условные запросы:
+             - Ответ содержит заголовки ETag и Last-Modified. Запрос с If-None-Match
+               (или If-Modified-Since) для неизменившегося кошелька возвращает 304 без тела,
+               транзакции кошелька при этом не загружаются
+
              Возвращает:
              - Данные кошелька
              - Список последних транзакций
 
              Ошибки:
              - 404: Кошелек не найден """)
+@service_handler
 def get_wallet(request: HttpRequest,
-               wallet_id: uuid.UUID) -> ApiResponse[WalletDataOutSchema]:
-    try:
-        wallet_query_service = get_wallet_query_service()
-        wallet_dto = wallet_query_service.get_wallet_by_id(wallet_id=wallet_id)
-    except ServiceException as exc:
-        raise HttpError(status_code=exc.status_code, message=exc.message)
+               response: HttpResponse,
+               wallet_id: uuid.UUID) -> HandlerSteps[ApiResponse[WalletDataOutSchema] | HttpResponse]:
+    wallet_query_service = get_wallet_query_service()
+    if _is_conditional_request(request):
+        validators = yield call_service(wallet_query_service, 'get_wallet_validators', wallet_id=wallet_id)
+        not_modified = _get_not_modified_response(request, validators)
+        if not_modified is not None:
+            return not_modified
+
+    wallet_dto = yield call_service(wallet_query_service, 'get_wallet_by_id', wallet_id=wallet_id)
+    _set_wallet_validators(response, WalletValidatorsDTO.from_wallet(wallet_dto))
     return ApiResponse(data=WalletDataOutSchema.from_dto(wallet_dto))
 
 
+def _is_conditional_request(request: HttpRequest) -> bool:
+    """
+    Запрос с If-None-Match или If-Modified-Since. Только для него валидаторы читаются отдельным запросом,
+    в остальных случаях они берутся из загруженного кошелька.
+    """
+    return 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+
+def _get_not_modified_response(request: HttpRequest, validators: WalletValidatorsDTO) -> HttpResponse | None:
+    """Ответ 304 с заголовками условного запроса или None, если кошелек изменился."""
+    not_modified = get_conditional_response(
+        request,
+        etag=validators.etag,
+        last_modified=int(validators.last_modified.timestamp())
+    )
+    if not_modified is not None:
+        _set_wallet_validators(not_modified, validators)
+    return not_modified
+
+
+def _set_wallet_validators(response: HttpResponse, validators: WalletValidatorsDTO):
+    """Заголовки условного запроса. no-cache требует у клиента перепроверять данные при каждом запросе."""
+    response['ETag'] = validators.etag
+    response['Last-Modified'] = http_date(validators.last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+
+
+@router.get('{wallet_id}/transactions',
+            response=ApiResponse[list[WalletTransactionOutSchema]],
+            description="""Получение истории транзакций кошелька с курсорной пагинацией.
 
+             Транзакции возвращаются от новых к старым. Для получения следующей страницы
+             передайте значение meta.next_cursor из предыдущего ответа в параметр cursor.
+
+             Параметры:
+             - wallet_id: UUID кошелька
+             - cursor: Курсор следующей страницы (необязательный)
+             - limit: Количество транзакций на странице (от 1 до 100, по умолчанию 20)
+             - operation_type: Фильтр по типу операции - 'deposit' или 'withdrawal'
+             - status: Фильтр по статусу транзакции
+
+             Возвращает:
+             - Список транзакций страницы
+             - meta.next_cursor: Курсор следующей страницы или null, если страница последняя
+
+             Ошибки:
+             - 400: Некорректный курсор
+             - 404: Кошелек не найден""")
+@service_handler
+def get_wallet_transactions(request: HttpRequest,
+                            wallet_id: uuid.UUID,
+                            cursor: str | None = None,
+                            limit: int = Query(20, ge=1, le=100),
+                            operation_type: OperationType | None = None,
+                            status: TransactionStatus | None = None
+                            ) -> HandlerSteps[ApiResponse[list[WalletTransactionOutSchema]]]:
+    page_dto = yield call_service(
+        get_transaction_query_service(),
+        'get_wallet_transactions',
+        wallet_id=wallet_id,
+        filters=TransactionFiltersDTO(operation_type=operation_type, status=status),
+        cursor=cursor,
+        limit=limit
+    )
+    return ApiResponse(
+        data=[WalletTransactionOutSchema.from_dto(transaction) for transaction in page_dto.items],
+        meta={'next_cursor': page_dto.next_cursor}
+    )
+
+
+
+
+@router.get('{wallet_id}/operations/{transaction_id}',
+            response=ApiResponse[WalletOperationStatusOutSchema],
+            description="""Получение статуса операции кошелька.
+
+             Используется для опроса результата операции, принятой с mode=async.
+
+             Параметры:
+             - wallet_id: UUID кошелька
+             - transaction_id: UUID транзакции из ответа на запрос операции
+
+             Возвращает:
+             - Данные транзакции: статус 'В обработке', 'Успешно' или 'Ошибка'
+             - Баланс после операции (после успешного выполнения)
+             - error: Причина ошибки (для отклоненной операции)
+
+             Ошибки:
+             - 404: Операция не найдена""")
+@service_handler
+def get_wallet_operation(request: HttpRequest,
+                         wallet_id: uuid.UUID,
+                         transaction_id: uuid.UUID) -> HandlerSteps[ApiResponse[WalletOperationStatusOutSchema]]:
+    transaction_dto = yield call_service(get_transaction_query_service(), 'get_wallet_transaction',
+                                         wallet_id=wallet_id, transaction_id=transaction_id)
+    return ApiResponse(data=WalletOperationStatusOutSchema.from_dto(transaction_dto))
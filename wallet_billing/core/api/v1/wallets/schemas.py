@@ -2,11 +2,32 @@ import datetime
 import uuid
 from decimal import Decimal
 
-from pydantic import BaseModel, condecimal, field_serializer
+from django.conf import settings
+from django.utils import timezone
+from pydantic import BaseModel, Field, condecimal, field_serializer, model_validator
 
 from core.apps.common.enums import OperationType, TransactionStatus
 from core.apps.wallets.dto.transaction import TransactionDTO
-from core.apps.wallets.dto.wallets import WalletOperationDTO, WalletDTO
+from core.apps.wallets.dto.wallets import (
+    WalletChangeDTO,
+    WalletDTO,
+    WalletHoldDTO,
+    WalletHoldSettlementDTO,
+    WalletLockStatsDTO,
+    WalletOperationDTO,
+    WalletOperationResultDTO,
+    WalletTransferDTO,
+    WalletTransferResultDTO,
+)
+
+
+MAX_BATCH_OPERATIONS = 1000
+MAX_LOOKUP_WALLETS = 500
+
+
+def format_datetime(dt: datetime.datetime) -> str:
+    """Дата в формате ответов API "%d.%m.%Y %H:%M:%S" без strftime, который заметно медленнее."""
+    return '%02d.%02d.%d %02d:%02d:%02d' % (dt.day, dt.month, dt.year, dt.hour, dt.minute, dt.second)
 
 
 class TransactionSchema(BaseModel):
@@ -15,51 +36,233 @@ class TransactionSchema(BaseModel):
 
 class WalletTransactionInSchema(TransactionSchema):
 
-    def to_dto(self, wallet_id:uuid.UUID) -> WalletOperationDTO:
+    def to_dto(self, wallet_id:uuid.UUID, idempotency_key: str | None = None) -> WalletOperationDTO:
         return WalletOperationDTO(
             wallet_id=wallet_id,
             operation_type=self.operation_type,
-            amount=self.amount
+            amount=self.amount,
+            idempotency_key=idempotency_key
         )
 
 class WalletTransactionOutSchema(TransactionSchema):
     transaction_id: uuid.UUID
     wallet_id: uuid.UUID
-    balance: Decimal
+    balance: Decimal | None
     status: TransactionStatus | str
     created_at: datetime.datetime
 
     @field_serializer('created_at')
     def serialize_dt(self, dt: datetime, _info):
-        return dt.strftime("%d.%m.%Y %H:%M:%S")
+        return format_datetime(dt)
 
     @classmethod
     def from_dto(cls, dto: TransactionDTO) -> 'WalletTransactionOutSchema':
-        return cls(
+        # Данные DTO построены сервисами и уже проверены, поэтому схема создается без валидации
+        return cls.model_construct(
             transaction_id=dto.id,
             wallet_id=dto.wallet_id,
-            operation_type=dto.operation_type.get_display_name_by_value(value=dto.operation_type),
+            operation_type=OperationType.get_display_name_by_value(dto.operation_type),
             amount=dto.amount,
             balance=dto.balance_after,
-            status=dto.status.get_display_name_by_value(value=dto.status),
+            status=TransactionStatus.get_display_name_by_value(dto.status),
             created_at=dto.created_at
         )
 
 
+class WalletOperationStatusOutSchema(WalletTransactionOutSchema):
+    error: str | None = None
+
+    @classmethod
+    def from_dto(cls, dto: TransactionDTO) -> 'WalletOperationStatusOutSchema':
+        return cls.model_construct(
+            **dict(WalletTransactionOutSchema.from_dto(dto)),
+            error=dto.error_message
+        )
+
+
 class WalletDataOutSchema(BaseModel):
     wallet_id: uuid.UUID
     balance: Decimal
+    reserved_balance: Decimal
+    available_balance: Decimal
     last_transaction_list: list[WalletTransactionOutSchema]
 
     @classmethod
     def from_dto(cls, dto: WalletDTO) -> 'WalletDataOutSchema':
-        return cls(
+        return cls.model_construct(
             wallet_id=dto.id,
             balance=dto.balance,
+            reserved_balance=dto.reserved_balance,
+            available_balance=dto.balance - dto.reserved_balance,
             last_transaction_list=[WalletTransactionOutSchema.from_dto(transaction) for transaction in dto.last_transaction]
         )
 
 
+class WalletLookupInSchema(BaseModel):
+    wallet_ids: list[uuid.UUID] = Field(default_factory=list, max_length=MAX_LOOKUP_WALLETS)
+    user_ids: list[int] = Field(default_factory=list, max_length=MAX_LOOKUP_WALLETS)
+
+    @model_validator(mode='after')
+    def check_not_empty(self) -> 'WalletLookupInSchema':
+        if not self.wallet_ids and not self.user_ids:
+            raise ValueError('Укажите wallet_ids или user_ids')
+        return self
+
+
+class WalletLookupOutSchema(WalletDataOutSchema):
+    user_id: int
+
+    @classmethod
+    def from_dto(cls, dto: WalletDTO) -> 'WalletLookupOutSchema':
+        return cls.model_construct(
+            **dict(WalletDataOutSchema.from_dto(dto)),
+            user_id=dto.user_id
+        )
+
+
+class WalletChangeOutSchema(BaseModel):
+    wallet_id: uuid.UUID
+    balance: Decimal
+    reserved_balance: Decimal
+    available_balance: Decimal
+    version: int
+
+    @classmethod
+    def from_dto(cls, dto: WalletChangeDTO) -> 'WalletChangeOutSchema':
+        return cls.model_construct(
+            wallet_id=dto.wallet_id,
+            balance=dto.balance,
+            reserved_balance=dto.reserved_balance,
+            available_balance=dto.balance - dto.reserved_balance,
+            version=dto.version
+        )
+
+
+class WalletLockStatsOutSchema(BaseModel):
+    wallet_id: uuid.UUID
+    lock_count: int
+    lock_count_error: int
+    wait_p50_ms: float
+    wait_p95_ms: float
+    wait_p99_ms: float
+    wait_max_ms: float
+    hold_avg_ms: float
+    hold_max_ms: float
+
+    @classmethod
+    def from_dto(cls, dto: WalletLockStatsDTO) -> 'WalletLockStatsOutSchema':
+        return cls.model_construct(
+            wallet_id=dto.wallet_id,
+            lock_count=dto.lock_count,
+            lock_count_error=dto.lock_count_error,
+            wait_p50_ms=round(dto.wait_p50_ms, 3),
+            wait_p95_ms=round(dto.wait_p95_ms, 3),
+            wait_p99_ms=round(dto.wait_p99_ms, 3),
+            wait_max_ms=round(dto.wait_max_ms, 3),
+            hold_avg_ms=round(dto.hold_avg_ms, 3),
+            hold_max_ms=round(dto.hold_max_ms, 3)
+        )
+
+
+class WalletBatchOperationItemInSchema(TransactionSchema):
+    wallet_id: uuid.UUID
+
+    def to_dto(self) -> WalletOperationDTO:
+        return WalletOperationDTO(
+            wallet_id=self.wallet_id,
+            operation_type=self.operation_type,
+            amount=self.amount
+        )
+
+
+class WalletBatchOperationInSchema(BaseModel):
+    operations: list[WalletBatchOperationItemInSchema] = Field(min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+    def to_dto(self) -> list[WalletOperationDTO]:
+        return [operation.to_dto() for operation in self.operations]
+
+
+class WalletOperationResultOutSchema(BaseModel):
+    wallet_id: uuid.UUID
+    success: bool
+    transaction: WalletTransactionOutSchema | None = None
+    error: str | None = None
+    error_code: int | None = None
+
+    @classmethod
+    def from_dto(cls, dto: WalletOperationResultDTO) -> 'WalletOperationResultOutSchema':
+        if dto.error is not None:
+            return cls.model_construct(
+                wallet_id=dto.operation.wallet_id,
+                success=False,
+                error=dto.error.message,
+                error_code=dto.error.status_code
+            )
+        return cls.model_construct(
+            wallet_id=dto.operation.wallet_id,
+            success=True,
+            transaction=WalletTransactionOutSchema.from_dto(dto.transaction)
+        )
+
+
+class WalletTransferInSchema(BaseModel):
+    target_wallet_id: uuid.UUID
+    amount: condecimal(gt=0, decimal_places=2)
+
+    def to_dto(self, wallet_id: uuid.UUID) -> WalletTransferDTO:
+        return WalletTransferDTO(
+            source_wallet_id=wallet_id,
+            target_wallet_id=self.target_wallet_id,
+            amount=self.amount
+        )
+
+
+class WalletTransferOutSchema(BaseModel):
+    source_transaction: WalletTransactionOutSchema
+    target_transaction: WalletTransactionOutSchema
+
+    @classmethod
+    def from_dto(cls, dto: WalletTransferResultDTO) -> 'WalletTransferOutSchema':
+        return cls.model_construct(
+            source_transaction=WalletTransactionOutSchema.from_dto(dto.source_transaction),
+            target_transaction=WalletTransactionOutSchema.from_dto(dto.target_transaction)
+        )
+
+
+class WalletHoldInSchema(BaseModel):
+    amount: condecimal(gt=0, decimal_places=2)
+    ttl_seconds: int | None = Field(None, ge=1, le=settings.WALLET_HOLD_MAX_TTL_SECONDS)
+
+    def to_dto(self, wallet_id: uuid.UUID) -> WalletHoldDTO:
+        ttl_seconds = self.ttl_seconds or settings.WALLET_HOLD_TTL_SECONDS
+        return WalletHoldDTO(
+            wallet_id=wallet_id,
+            amount=self.amount,
+            expires_at=timezone.now() + datetime.timedelta(seconds=ttl_seconds)
+        )
 
 
+class WalletHoldOutSchema(WalletTransactionOutSchema):
+    expires_at: datetime.datetime
 
+    @field_serializer('expires_at')
+    def serialize_expires_at(self, dt: datetime, _info):
+        return format_datetime(dt)
+
+    @classmethod
+    def from_dto(cls, dto: TransactionDTO) -> 'WalletHoldOutSchema':
+        return cls.model_construct(
+            **dict(WalletTransactionOutSchema.from_dto(dto)),
+            expires_at=dto.expires_at
+        )
+
+
+class WalletHoldCaptureInSchema(BaseModel):
+    amount: condecimal(gt=0, decimal_places=2) | None = None
+
+    def to_dto(self, wallet_id: uuid.UUID, hold_id: uuid.UUID) -> WalletHoldSettlementDTO:
+        return WalletHoldSettlementDTO(
+            wallet_id=wallet_id,
+            hold_id=hold_id,
+            amount=self.amount
+        )
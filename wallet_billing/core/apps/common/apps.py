@@ -1,7 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = "core.apps.common"
 
+    def ready(self):
+        from core.apps.common.metrics import install_query_observer
+
+        connection_created.connect(install_query_observer, dispatch_uid='install_query_observer')
@@ -1,6 +1,6 @@
-from enum import Enum
+from enum import Enum, StrEnum
 
-class TransactionStatus(str, Enum):
+class TransactionStatus(StrEnum):
     """Статус транзакции"""
     SUCCESS = "success"
     IN_PROCESSING = "in_processing"
@@ -10,21 +10,12 @@ class TransactionStatus(str, Enum):
     @property
     def display_name(self) -> str:
         """Получить человекочитаемое название статуса"""
-        display_names: dict[str, str] = {
-            TransactionStatus.SUCCESS: "Успешно",
-            TransactionStatus.IN_PROCESSING: "В обработке",
-            TransactionStatus.CANCELED: "Отменена",
-            TransactionStatus.FAILED: "Ошибка"
-        }
-        return display_names.get(self, "Неизвестный статус")
+        return _TRANSACTION_STATUS_DISPLAY_NAMES.get(self, "Неизвестный статус")
 
     @classmethod
     def get_display_name_by_value(cls, value: str) -> str:
-        """Получить display name по значению"""
-        try:
-            return cls(value).display_name
-        except ValueError:
-            return "Неизвестный статус"
+        """Получить display name по значению или элементу перечисления"""
+        return _TRANSACTION_STATUS_DISPLAY_NAMES.get(value, "Неизвестный статус")
 
     @classmethod
     def choices(cls) -> list[tuple[str, str]]:
@@ -32,26 +23,51 @@ class TransactionStatus(str, Enum):
         return [(status.value, status.display_name) for status in cls]
 
 
-class OperationType(str, Enum):
+class OperationType(StrEnum):
     """Тип операции транзакции"""
     DEPOSIT = "deposit"
     WITHDRAWAL = "withdrawal"
+    TRANSFER = "transfer"
+    HOLD = "hold"
+    CAPTURE = "capture"
+    RELEASE = "release"
 
     @property
     def display_name(self) -> str:
-        display_names: dict[str, str] = {
-            OperationType.DEPOSIT: "Пополнение",
-            OperationType.WITHDRAWAL: "Списание",
-        }
-        return display_names.get(self, "Неизвестная операция")
+        return _OPERATION_TYPE_DISPLAY_NAMES.get(self, "Неизвестная операция")
 
     @classmethod
     def get_display_name_by_value(cls, value: str) -> str:
-        try:
-            return cls(value).display_name
-        except ValueError:
-            return "Неизвестная операция"
+        return _OPERATION_TYPE_DISPLAY_NAMES.get(value, "Неизвестная операция")
 
     @classmethod
     def choices(cls) -> list[tuple[str, str]]:
-        return [(op.value, op.display_name) for op in cls]
\ No newline at end of file
+        return [(op.value, op.display_name) for op in cls]
+
+
+def _display_names_table(display_names: dict[Enum, str]) -> dict[Enum | str, str]:
+    """
+    Таблица названий по элементу перечисления и по его значению.
+
+    Хэш элемента str-перечисления считается по имени, а не по значению,
+    поэтому значение добавляется в таблицу отдельным ключом.
+    """
+    return {**display_names, **{member.value: name for member, name in display_names.items()}}
+
+
+# Таблицы названий строятся один раз при импорте, а не при каждом обращении к display_name
+_TRANSACTION_STATUS_DISPLAY_NAMES = _display_names_table({
+    TransactionStatus.SUCCESS: "Успешно",
+    TransactionStatus.IN_PROCESSING: "В обработке",
+    TransactionStatus.CANCELED: "Отменена",
+    TransactionStatus.FAILED: "Ошибка",
+})
+
+_OPERATION_TYPE_DISPLAY_NAMES = _display_names_table({
+    OperationType.DEPOSIT: "Пополнение",
+    OperationType.WITHDRAWAL: "Списание",
+    OperationType.TRANSFER: "Перевод",
+    OperationType.HOLD: "Резервирование",
+    OperationType.CAPTURE: "Списание резерва",
+    OperationType.RELEASE: "Снятие резерва",
+})
@@ -9,4 +9,8 @@ class ServiceException(Exception):
 
     @property
     def status_code(self):
-        return 500
\ No newline at end of file
+        return 500
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {}
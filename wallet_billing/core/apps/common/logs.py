@@ -0,0 +1,109 @@
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from core.apps.common.metrics import LOGS_DROPPED
+
+
+# Стандартные атрибуты LogRecord, все остальные переданы через extra и выводятся полями JSON
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class _BlockingStopQueueListener(QueueListener):
+    """QueueListener, который при остановке дожидается места в заполненной очереди, а не падает с queue.Full."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Обработчик логов, который только кладет запись в ограниченную очередь.
+
+    Форматирование и запись в поток выполняет фоновый QueueListener, поэтому поток запроса
+    не ждет вывода логов. Если очередь заполнена, запись отбрасывается (счетчик dropped
+    и метрика wallet_logs_dropped_total), а не блокирует запрос. Очередь дописывается
+    при закрытии обработчика (logging.shutdown).
+    """
+
+    def __init__(self, queue_size: int = 10_000, stream=None):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.dropped = 0
+        self.listener = _BlockingStopQueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def setFormatter(self, fmt):
+        # Форматтер нужен фоновому обработчику: запись форматируется в потоке QueueListener
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Запись передается в очередь внутри процесса, поэтому сообщение и аргументы не форматируются заранее
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOGS_DROPPED.inc()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.target.close()
+        super().close()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Форматирует запись в одну строку JSON.
+
+    Помимо сообщения выводит шаблон и аргументы %-форматирования (template, args), чтобы записи
+    одного вида группировались по шаблону, а также поля, переданные через extra.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.args:
+            entry['template'] = record.msg
+            entry['args'] = record.args
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SuccessSamplingFilter(logging.Filter):
+    """
+    Пропускает долю rate записей ниже WARNING от логгеров с префиксами loggers.
+
+    Записи успешных операций под нагрузкой выборочно отбрасываются, предупреждения и ошибки,
+    а также записи других логгеров пропускаются всегда.
+    """
+
+    def __init__(self, rate: float = 1.0, loggers: tuple[str, ...] = ('core.apps',)):
+        super().__init__()
+        self.rate = rate
+        self.loggers = tuple(loggers)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING or not record.name.startswith(self.loggers):
+            return True
+        return random.random() < self.rate
@@ -0,0 +1,118 @@
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+# Метрики пишутся в файлы каталога PROMETHEUS_MULTIPROC_DIR (если переменная задана до запуска воркеров),
+# поэтому /api/metrics любого воркера gunicorn отдает значения, собранные со всех воркеров
+REQUEST_DURATION = Histogram(
+    'wallet_http_request_duration_seconds',
+    'Время обработки запроса',
+    ['method', 'route'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    'wallet_http_requests_total',
+    'Количество запросов по коду ответа',
+    ['method', 'route', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'wallet_http_request_db_queries',
+    'Количество запросов к БД за запрос',
+    ['method', 'route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_DURATION = Histogram(
+    'wallet_http_request_db_duration_seconds',
+    'Суммарное время запросов к БД за запрос',
+    ['method', 'route'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+SERVICE_EXCEPTIONS = Counter(
+    'wallet_service_exceptions_total',
+    'Количество ошибок сервисов, возвращенных клиенту',
+    ['exception', 'status'],
+)
+BILLING_OPERATIONS = Counter(
+    'wallet_billing_operations_total',
+    'Количество операций BillingUseCase.process_operation по типу и результату',
+    ['operation_type', 'outcome'],
+)
+WALLET_CACHE_REQUESTS = Counter(
+    'wallet_cache_requests_total',
+    'Обращения к кэшу кошельков: попадания (hit) и промахи (miss)',
+    ['result'],
+)
+LOGS_DROPPED = Counter(
+    'wallet_logs_dropped_total',
+    'Записи логов, отброшенные из-за заполненной очереди',
+)
+
+
+@dataclass(slots=True)
+class DatabaseStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+# Статистика запросов к БД текущего HTTP-запроса. Контекст копируется в потоки sync_to_async,
+# поэтому запросы асинхронных обработчиков учитываются в том же объекте
+_database_stats: ContextVar[DatabaseStats | None] = ContextVar('database_stats', default=None)
+
+
+def observe_queries(execute, sql, params, many, context):
+    """Обертка выполнения запросов БД (connection.execute_wrapper), учитывающая запросы текущего HTTP-запроса."""
+    stats = _database_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """Обработчик сигнала connection_created: подключает observe_queries к новому соединению."""
+    if observe_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_queries)
+
+
+@contextmanager
+def track_database() -> Iterator[DatabaseStats]:
+    """Собирает количество и время запросов к БД внутри блока."""
+    stats = DatabaseStats()
+    token = _database_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _database_stats.reset(token)
+
+
+@contextmanager
+def observe_billing_operation(operation_type: str) -> Iterator[None]:
+    """Считает операцию по типу и результату: success или имя класса исключения."""
+    try:
+        yield
+    except Exception as exc:
+        BILLING_OPERATIONS.labels(operation_type=operation_type, outcome=type(exc).__name__).inc()
+        raise
+    BILLING_OPERATIONS.labels(operation_type=operation_type, outcome='success').inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Метрики в текстовом формате Prometheus и тип содержимого ответа."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
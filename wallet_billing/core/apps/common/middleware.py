@@ -0,0 +1,58 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse
+
+from core.apps.common import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Записывает метрики запроса: время обработки, код ответа, количество и время запросов к БД.
+
+    Запросы группируются по шаблону маршрута (например, api/v1/wallets/<wallet_id>), а не по пути,
+    чтобы идентификаторы кошельков не создавали отдельные серии. Работает и в синхронном,
+    и в асинхронном режиме без переключения между ними.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        status = 500
+        with metrics.track_database() as database_stats:
+            try:
+                response = self.get_response(request)
+                status = response.status_code
+            finally:
+                self._observe(request, status, time.perf_counter() - started, database_stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        started = time.perf_counter()
+        status = 500
+        with metrics.track_database() as database_stats:
+            try:
+                response = await self.get_response(request)
+                status = response.status_code
+            finally:
+                self._observe(request, status, time.perf_counter() - started, database_stats)
+        return response
+
+    @staticmethod
+    def _observe(request: HttpRequest, status: int, duration: float, database_stats: metrics.DatabaseStats):
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.route if resolver_match is not None else 'unmatched'
+        labels = {'method': request.method, 'route': route}
+        metrics.REQUEST_DURATION.labels(**labels).observe(duration)
+        metrics.REQUESTS.labels(status=status, **labels).inc()
+        metrics.REQUEST_DB_QUERIES.labels(**labels).observe(database_stats.queries)
+        metrics.REQUEST_DB_DURATION.labels(**labels).observe(database_stats.seconds)
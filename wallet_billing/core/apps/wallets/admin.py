@@ -1,15 +1,22 @@
 from django.contrib import admin
 
+from core.apps.wallets.models.outbox import OutboxEvent
 from core.apps.wallets.models.transaction import WalletTransaction
 from core.apps.wallets.models.wallets import Wallet
 
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
-    list_display = ('id', 'balance')
+    list_display = ('id', 'balance', 'reserved_balance', 'shard_count')
+    readonly_fields = ('last_transactions',)
 
 
 @admin.register(WalletTransaction)
 class WalletTransactionAdmin(admin.ModelAdmin):
     list_display = ('id', 'balance_after')
 
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'wallet_id', 'created_at')
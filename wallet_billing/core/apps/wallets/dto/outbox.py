@@ -0,0 +1,12 @@
+import datetime
+import uuid
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class OutboxEventDTO:
+    id: int
+    event_type: str
+    wallet_id: uuid.UUID
+    payload: dict
+    created_at: datetime.datetime
@@ -6,7 +6,7 @@ from decimal import Decimal
 from core.apps.common.enums import OperationType, TransactionStatus
 
 
-@dataclass
+@dataclass(slots=True)
 class TransactionDTO:
     amount: Decimal
     operation_type: OperationType
@@ -16,8 +16,77 @@ class TransactionDTO:
     wallet_id: uuid.UUID
     id: uuid.UUID = None
     created_at: datetime.datetime = None
+    updated_at: datetime.datetime = None
+    related_transaction_id: uuid.UUID = None
+    idempotency_key: str = None
+    error_message: str = None
+    expires_at: datetime.datetime = None
 
+    @classmethod
+    def from_row(cls, row: tuple) -> 'TransactionDTO':
+        """
+        DTO из строки values_list с полями в порядке полей DTO, без создания модели.
 
+        Поля модели транзакции называются так же, как поля DTO, см. TRANSACTION_DTO_FIELDS.
+        """
+        amount, operation_type, status, *values = row
+        return cls(amount, OperationType(operation_type), TransactionStatus(status), *values)
 
+    def to_snapshot(self) -> dict:
+        """Запись транзакции в снимке последних транзакций кошелька (Wallet.last_transactions)."""
+        return {
+            'id': str(self.id),
+            'operation_type': OperationType(self.operation_type).value,
+            'status': TransactionStatus(self.status).value,
+            'amount': str(self.amount),
+            'balance_before': _to_snapshot_value(self.balance_before),
+            'balance_after': _to_snapshot_value(self.balance_after),
+            'created_at': _to_snapshot_value(self.created_at),
+            'updated_at': _to_snapshot_value(self.updated_at),
+            'related_transaction_id': _to_snapshot_value(self.related_transaction_id),
+            'idempotency_key': self.idempotency_key,
+            'error_message': self.error_message,
+            'expires_at': _to_snapshot_value(self.expires_at),
+        }
 
+    @classmethod
+    def from_snapshot(cls, wallet_id: uuid.UUID, entry: dict) -> 'TransactionDTO':
+        return cls(
+            id=uuid.UUID(entry['id']),
+            wallet_id=wallet_id,
+            operation_type=OperationType(entry['operation_type']),
+            status=TransactionStatus(entry['status']),
+            amount=Decimal(entry['amount']),
+            balance_before=_from_snapshot_value(entry['balance_before'], Decimal),
+            balance_after=_from_snapshot_value(entry['balance_after'], Decimal),
+            created_at=_from_snapshot_value(entry['created_at'], datetime.datetime.fromisoformat),
+            updated_at=_from_snapshot_value(entry['updated_at'], datetime.datetime.fromisoformat),
+            related_transaction_id=_from_snapshot_value(entry['related_transaction_id'], uuid.UUID),
+            idempotency_key=entry['idempotency_key'],
+            error_message=entry['error_message'],
+            expires_at=_from_snapshot_value(entry['expires_at'], datetime.datetime.fromisoformat)
+        )
 
+
+def _to_snapshot_value(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(timespec='microseconds')
+    return str(value)
+
+
+def _from_snapshot_value(value: str | None, parse):
+    return None if value is None else parse(value)
+
+
+@dataclass(slots=True)
+class TransactionFiltersDTO:
+    operation_type: OperationType = None
+    status: TransactionStatus = None
+
+
+@dataclass(slots=True)
+class TransactionPageDTO:
+    items: list[TransactionDTO]
+    next_cursor: str = None
@@ -1,21 +1,103 @@
+import datetime
 import uuid
 from dataclasses import dataclass
 from decimal import Decimal
 
 from core.apps.common.enums import OperationType
+from core.apps.common.exception.base import ServiceException
 from core.apps.wallets.dto.transaction import TransactionDTO
 
 
-@dataclass
+@dataclass(slots=True)
 class WalletDTO:
     id: uuid.UUID
     balance: Decimal
     last_transaction: list[TransactionDTO]
     user_id: int = None
     is_active: bool = None
+    reserved_balance: Decimal = Decimal('0.00')
+    version: int = None
+    updated_at: datetime.datetime = None
 
-@dataclass
+
+@dataclass(slots=True)
+class WalletValidatorsDTO:
+    """Валидаторы условного запроса кошелька: версия и время последнего изменения его данных."""
+    version: int
+    last_modified: datetime.datetime
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}-{int(self.last_modified.timestamp() * 1_000_000)}"'
+
+    @classmethod
+    def from_wallet(cls, wallet_dto: WalletDTO) -> 'WalletValidatorsDTO':
+        """Валидаторы данных кошелька: последнее изменение кошелька или его последних транзакций."""
+        timestamps = [wallet_dto.updated_at, *(transaction.updated_at for transaction in wallet_dto.last_transaction)]
+        return cls(
+            version=wallet_dto.version,
+            last_modified=max(timestamp for timestamp in timestamps if timestamp is not None)
+        )
+
+
+@dataclass(slots=True)
+class WalletChangeDTO:
+    wallet_id: uuid.UUID
+    balance: Decimal
+    reserved_balance: Decimal
+    version: int
+
+
+@dataclass(slots=True)
+class WalletLockStatsDTO:
+    wallet_id: uuid.UUID
+    lock_count: int
+    lock_count_error: int
+    wait_p50_ms: float
+    wait_p95_ms: float
+    wait_p99_ms: float
+    wait_max_ms: float
+    hold_avg_ms: float
+    hold_max_ms: float
+
+
+@dataclass(slots=True)
 class WalletOperationDTO:
     wallet_id: uuid.UUID
     operation_type: OperationType
-    amount: Decimal
\ No newline at end of file
+    amount: Decimal
+    idempotency_key: str = None
+
+
+@dataclass(slots=True)
+class WalletOperationResultDTO:
+    operation: WalletOperationDTO
+    transaction: TransactionDTO = None
+    error: ServiceException = None
+
+
+@dataclass(slots=True)
+class WalletHoldDTO:
+    wallet_id: uuid.UUID
+    amount: Decimal
+    expires_at: datetime.datetime
+
+
+@dataclass(slots=True)
+class WalletHoldSettlementDTO:
+    wallet_id: uuid.UUID
+    hold_id: uuid.UUID
+    amount: Decimal = None
+
+
+@dataclass(slots=True)
+class WalletTransferDTO:
+    source_wallet_id: uuid.UUID
+    target_wallet_id: uuid.UUID
+    amount: Decimal
+
+
+@dataclass(slots=True)
+class WalletTransferResultDTO:
+    source_transaction: TransactionDTO
+    target_transaction: TransactionDTO
@@ -0,0 +1,62 @@
+import datetime
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+
+from core.apps.common.exception.base import ServiceException
+
+
+@dataclass(eq=False)
+class HoldNotFoundException(ServiceException):
+    wallet_id: uuid.UUID
+    hold_id: uuid.UUID
+
+    @property
+    def message(self):
+        return f"Резерв {self.hold_id} кошелька {self.wallet_id} не найден"
+
+    @property
+    def status_code(self):
+        return 404
+
+
+@dataclass(eq=False)
+class HoldNotActiveException(ServiceException):
+    hold_id: uuid.UUID
+    status: str
+
+    @property
+    def message(self):
+        return f"Резерв {self.hold_id} уже завершен, статус: {self.status}"
+
+    @property
+    def status_code(self):
+        return 409
+
+
+@dataclass(eq=False)
+class HoldExpiredException(ServiceException):
+    hold_id: uuid.UUID
+    expires_at: datetime.datetime
+
+    @property
+    def message(self):
+        return f"Срок действия резерва {self.hold_id} истек {self.expires_at:%d.%m.%Y %H:%M:%S}"
+
+    @property
+    def status_code(self):
+        return 409
+
+
+@dataclass(eq=False)
+class HoldAmountExceededException(ServiceException):
+    hold_amount: Decimal
+    amount: Decimal
+
+    @property
+    def message(self):
+        return f"Сумма списания {self.amount} превышает сумму резерва {self.hold_amount}"
+
+    @property
+    def status_code(self):
+        return 400
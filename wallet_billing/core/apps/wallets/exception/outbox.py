@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+from core.apps.common.exception.base import ServiceException
+
+
+@dataclass(eq=False)
+class OutboxPublishException(ServiceException):
+    sink: str = None
+    reason: str = None
+
+    @property
+    def message(self):
+        return f"Не удалось опубликовать события через {self.sink}: {self.reason}"
+
+    @property
+    def status_code(self):
+        return 502
@@ -18,3 +18,75 @@ class TransactionCreationException(ServiceException):
     @property
     def status_code(self):
         return 500
+
+
+@dataclass(eq=False)
+class TransactionBatchCreationException(ServiceException):
+    wallet_ids: list[uuid.UUID] = None
+    count: int = None
+
+    @property
+    def message(self):
+        return (f"Ошибка создания {self.count} транзакций для кошельков "
+                f"{', '.join(str(wallet_id) for wallet_id in self.wallet_ids)}")
+
+    @property
+    def status_code(self):
+        return 500
+
+
+@dataclass(eq=False)
+class IdempotencyKeyConflictException(ServiceException):
+    wallet_id: uuid.UUID = None
+    idempotency_key: str = None
+
+    @property
+    def message(self):
+        return (f"Операция с ключом идемпотентности {self.idempotency_key} "
+                f"для кошелька {self.wallet_id} уже выполняется")
+
+    @property
+    def status_code(self):
+        return 409
+
+
+@dataclass(eq=False)
+class IdempotencyKeyMismatchException(ServiceException):
+    wallet_id: uuid.UUID = None
+    idempotency_key: str = None
+
+    @property
+    def message(self):
+        return (f"Ключ идемпотентности {self.idempotency_key} для кошелька {self.wallet_id} "
+                f"уже использован для операции с другими параметрами")
+
+    @property
+    def status_code(self):
+        return 422
+
+
+@dataclass(eq=False)
+class InvalidCursorException(ServiceException):
+    cursor: str = None
+
+    @property
+    def message(self):
+        return f"Некорректный курсор пагинации {self.cursor}"
+
+    @property
+    def status_code(self):
+        return 400
+
+
+@dataclass(eq=False)
+class TransactionNotFoundException(ServiceException):
+    wallet_id: uuid.UUID = None
+    transaction_id: uuid.UUID = None
+
+    @property
+    def message(self):
+        return f"Операция {self.transaction_id} кошелька {self.wallet_id} не найдена"
+
+    @property
+    def status_code(self):
+        return 404
@@ -29,4 +29,64 @@ class InsufficientFundsException(ServiceException):
 
     @property
     def status_code(self):
-        return 400
\ No newline at end of file
+        return 400
+
+
+@dataclass(eq=False)
+class BalanceLimitExceededException(ServiceException):
+    balance: Decimal
+    amount: Decimal
+
+    @property
+    def message(self):
+        return f"Превышен максимальный баланс кошелька. Баланс: {self.balance}, Пополнение: {self.amount}"
+
+    @property
+    def status_code(self):
+        return 400
+
+
+@dataclass(eq=False)
+class SameWalletTransferException(ServiceException):
+    wallet_id: uuid.UUID
+
+    @property
+    def message(self):
+        return f"Перевод на тот же кошелек {self.wallet_id} невозможен"
+
+    @property
+    def status_code(self):
+        return 400
+
+
+@dataclass(eq=False)
+class WalletConcurrentUpdateException(ServiceException):
+    wallet_id: uuid.UUID
+    attempts: int
+
+    @property
+    def message(self):
+        return f"Кошелек {self.wallet_id} одновременно изменяется другими операциями, попыток: {self.attempts}"
+
+    @property
+    def status_code(self):
+        return 409
+
+
+@dataclass(eq=False)
+class WalletLockTimeoutException(ServiceException):
+    waited_ms: float
+    retry_after: int
+
+    @property
+    def message(self):
+        return (f"Кошелек занят другими операциями, блокировка не получена за {self.waited_ms:.0f} мс. "
+                f"Повторите запрос через {self.retry_after} с")
+
+    @property
+    def status_code(self):
+        return 429
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {'Retry-After': str(self.retry_after)}
@@ -1,18 +1,106 @@
+import logging
 from functools import lru_cache
 
-from core.apps.wallets.services.transactions import TransactionService
-from core.apps.wallets.services.wallets import WalletCommandService, WalletQueryService
+from django.conf import settings
+
+from core.apps.wallets.services.cache import WalletCacheService
+from core.apps.wallets.services.coalescing import WalletOperationCoalescer
+from core.apps.wallets.services.locks import WalletLockProfiler
+from core.apps.wallets.services.notifications import WalletChangeListener
+from core.apps.wallets.services.outbox import BaseOutboxSink, FileOutboxSink, HttpOutboxSink, StreamOutboxSink
+from core.apps.wallets.services.transactions import TransactionQueryService, TransactionService
+from core.apps.wallets.services.wallets import (
+    AtomicUpdateWalletCommandService,
+    BaseWalletCommandService,
+    BaseWalletQueryService,
+    CachedWalletQueryService,
+    OptimisticWalletCommandService,
+    ShardedWalletCommandService,
+    WalletCommandService,
+    WalletQueryService,
+)
 from core.apps.wallets.use_cases.billing_use_case import BillingUseCase
 
 
+logger = logging.getLogger(__name__)
+
+WALLET_COMMAND_SERVICES: dict[str, type[BaseWalletCommandService]] = {
+    'pessimistic': WalletCommandService,
+    'atomic_update': AtomicUpdateWalletCommandService,
+    'optimistic': OptimisticWalletCommandService,
+    'sharded': ShardedWalletCommandService,
+}
+
+OUTBOX_SINKS: dict[str, type[BaseOutboxSink]] = {
+    'stdout': StreamOutboxSink,
+    'file': FileOutboxSink,
+    'http': HttpOutboxSink,
+}
+
+
+@lru_cache(1)
+def get_wallet_cache() -> WalletCacheService | None:
+    if not settings.WALLET_CACHE_ENABLED:
+        return None
+    return WalletCacheService(invalidation_ttl=settings.WALLET_CACHE_INVALIDATION_TTL)
+
+@lru_cache(1)
+def get_wallet_lock_profiler() -> WalletLockProfiler | None:
+    if not settings.WALLET_LOCK_PROFILING_ENABLED:
+        return None
+    return WalletLockProfiler(
+        capacity=settings.WALLET_LOCK_PROFILE_CAPACITY,
+        dump_dir=settings.WALLET_LOCK_PROFILE_DIR,
+        dump_interval=settings.WALLET_LOCK_PROFILE_DUMP_INTERVAL,
+    )
+
+@lru_cache(1)
+def get_wallet_command_service() -> BaseWalletCommandService:
+    service_class = WALLET_COMMAND_SERVICES[settings.WALLET_COMMAND_MODE]
+    return service_class(
+        transaction_service=TransactionService(),
+        wallet_cache=get_wallet_cache(),
+        lock_timeout_ms=settings.WALLET_LOCK_TIMEOUT_MS,
+        lock_retry_after=settings.WALLET_LOCK_RETRY_AFTER,
+        notify_changes=settings.WALLET_CHANGE_STREAM_ENABLED,
+        lock_profiler=get_wallet_lock_profiler(),
+    )
+
+@lru_cache(1)
+def get_wallet_operation_coalescer() -> WalletOperationCoalescer | None:
+    if not settings.WALLET_COALESCING_ENABLED:
+        return None
+    if settings.SERVER_MODE != 'asgi':
+        logger.warning('WALLET_COALESCING_ENABLED не действует при SERVER_MODE=%s: объединение работает только в asgi',
+                       settings.SERVER_MODE)
+        return None
+    return WalletOperationCoalescer(
+        wallet_service=get_wallet_command_service(),
+        window=settings.WALLET_COALESCING_WINDOW_MS / 1000,
+        max_batch_size=settings.WALLET_COALESCING_MAX_BATCH_SIZE,
+    )
+
+@lru_cache(1)
+def get_wallet_change_listener() -> WalletChangeListener:
+    return WalletChangeListener()
+
 @lru_cache(1)
 def get_billing_use_case():
     return BillingUseCase(
-        wallet_service=WalletCommandService(
-            transaction_service=TransactionService()
-        ),
+        wallet_service=get_wallet_command_service(),
+        operation_coalescer=get_wallet_operation_coalescer(),
+    )
+
+@lru_cache(1)
+def get_wallet_query_service() -> BaseWalletQueryService:
+    wallet_cache = get_wallet_cache()
+    if wallet_cache is None:
+        return WalletQueryService()
+    return CachedWalletQueryService(
+        query_service=WalletQueryService(),
+        wallet_cache=wallet_cache,
     )
 
 @lru_cache(1)
-def get_wallet_query_service():
-    return WalletQueryService()
\ No newline at end of file
+def get_transaction_query_service():
+    return TransactionQueryService()
@@ -0,0 +1,92 @@
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.transaction import TransactionDTO
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+
+
+class Command(BaseCommand):
+    help = ("Сравнивает чтение транзакций через модели (to_dto) и через строки values_list (from_row): "
+            "время и выделенная память на 10 000 строк. Тестовые данные удаляются откатом транзакции БД")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10_000,
+            help='Количество транзакций в тестовом кошельке'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Количество замеров каждого способа, выводится лучший'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            wallet_id = self._create_wallet(rows)
+            queryset = WalletTransaction.objects.filter(wallet_id=wallet_id).order_by('-created_at', 'id')
+            # Каждый замер выполняет запрос заново: all() не использует кэш результатов queryset
+            read_paths = {
+                'models + to_dto': lambda: [transaction_model.to_dto() for transaction_model in queryset.all()],
+                'values_list + from_row': lambda: list(map(TransactionDTO.from_row, queryset.dto_rows())),
+            }
+            for name, read in read_paths.items():
+                elapsed, peak_memory, blocks = self._measure(read, options['repeat'])
+                scale = 10_000 / rows
+                self.stdout.write(
+                    f'{name:<24} {elapsed * scale * 1000:8.1f} мс  '
+                    f'{peak_memory * scale / 1024 / 1024:7.1f} МБ пик  '
+                    f'{int(blocks * scale):>9} блоков в результате на 10 000 строк'
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _create_wallet(rows: int) -> uuid.UUID:
+        user = User.objects.create(username=f'benchmark-{uuid.uuid4()}')
+        wallet = Wallet.objects.create(user=user, balance=Decimal('0.00'))
+        WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(
+                    wallet=wallet,
+                    operation_type=OperationType.DEPOSIT.value,
+                    amount=Decimal('1.00'),
+                    balance_before=Decimal(index),
+                    balance_after=Decimal(index + 1),
+                    status=TransactionStatus.SUCCESS.value,
+                )
+                for index in range(rows)
+            ],
+            batch_size=1000
+        )
+        return wallet.id
+
+    @staticmethod
+    def _measure(read, repeat: int) -> tuple[float, int, int]:
+        """Лучшее время чтения и выделения памяти при чтении (пик и число блоков результата)."""
+        best = min(Command._time(read) for _ in range(repeat))
+        tracemalloc.start()
+        try:
+            result = read()
+            _, peak_memory = tracemalloc.get_traced_memory()
+            blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        finally:
+            tracemalloc.stop()
+        del result
+        return best, peak_memory, blocks
+
+    @staticmethod
+    def _time(read) -> float:
+        started = time.perf_counter()
+        read()
+        return time.perf_counter() - started
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.apps.common.exception.base import ServiceException
+from core.apps.wallets.factories import get_wallet_command_service
+
+
+class Command(BaseCommand):
+    help = ("Выполняет операции, принятые в асинхронном режиме. "
+            "Несколько запущенных обработчиков разбирают очередь параллельно")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Количество операций, выполняемых в одной транзакции БД'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.5,
+            help='Пауза в секундах, если очередь пуста'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь один раз и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        wallet_service = get_wallet_command_service()
+        processed_total = 0
+        try:
+            while True:
+                try:
+                    processed = wallet_service.process_pending_operations(batch_size=options['batch_size'])
+                except ServiceException as exc:
+                    self.stderr.write(f'Пакет не выполнен: {exc.message}')
+                    processed = 0
+                processed_total += processed
+
+                if processed:
+                    continue
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Обработано отложенных операций: {processed_total}'))
@@ -0,0 +1,33 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.apps.wallets.services.transactions import TransactionService
+
+
+class Command(BaseCommand):
+    help = "Очищает просроченные ключи идемпотентности транзакций пачками"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество транзакций, очищаемых одним запросом'
+        )
+        parser.add_argument(
+            '--ttl-hours',
+            type=int,
+            default=settings.IDEMPOTENCY_KEY_TTL_HOURS,
+            help='Время жизни ключа идемпотентности в часах'
+        )
+
+    def handle(self, *args, **options):
+        expired_before = timezone.now() - datetime.timedelta(hours=options['ttl_hours'])
+        pruned = TransactionService.prune_idempotency_keys(
+            expired_before=expired_before,
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Очищено ключей идемпотентности: {pruned}'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core.apps.wallets.factories import get_wallet_command_service
+
+
+class Command(BaseCommand):
+    help = ("Пересобирает снимки последних транзакций кошельков по таблице транзакций пачками. "
+            "Используется для заполнения снимков после миграции и для исправления расхождений")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество кошельков, обрабатываемых в одной транзакции БД'
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Только кошельки, для которых снимок еще не построен'
+        )
+
+    def handle(self, *args, **options):
+        wallet_service = get_wallet_command_service()
+        rebuilt_total = 0
+        after = None
+        while True:
+            rebuilt = wallet_service.rebuild_last_transactions(
+                chunk_size=options['chunk_size'],
+                after=after,
+                missing_only=options['missing_only']
+            )
+            if not rebuilt:
+                break
+            rebuilt_total += len(rebuilt)
+            after = rebuilt[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Пересобрано снимков последних транзакций: {rebuilt_total}'))
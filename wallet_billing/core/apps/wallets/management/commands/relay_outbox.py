@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.apps.common.exception.base import ServiceException
+from core.apps.wallets.factories import OUTBOX_SINKS
+from core.apps.wallets.services.outbox import OutboxService
+
+
+class Command(BaseCommand):
+    help = ("Публикует события outbox пачками и удаляет опубликованные. "
+            "Для строгого порядка событий запускается в одном экземпляре")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sink',
+            choices=sorted(OUTBOX_SINKS),
+            default='stdout',
+            help='Получатель событий: stdout, file (JSON по строкам) или http (POST пачки событий)'
+        )
+        parser.add_argument(
+            '--path',
+            help='Файл для получателя file'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес для получателя http'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество событий, публикуемых в одной транзакции БД'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.5,
+            help='Пауза в секундах, если событий нет или публикация не удалась'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Опубликовать накопленные события один раз и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        sink = self._get_sink(options)
+        published_total = 0
+        try:
+            while True:
+                try:
+                    published = OutboxService.relay(sink=sink, batch_size=options['batch_size'])
+                except ServiceException as exc:
+                    self.stderr.write(f'Пачка не опубликована: {exc.message}')
+                    if options['once']:
+                        break
+                    published = 0
+                published_total += published
+
+                if published == options['batch_size']:
+                    continue
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        # stdout занят потоком событий, итог выводится в stderr
+        self.stderr.write(self.style.SUCCESS(f'Опубликовано событий: {published_total}'))
+
+    def _get_sink(self, options):
+        sink_class = OUTBOX_SINKS[options['sink']]
+        if options['sink'] == 'file':
+            if not options['path']:
+                raise CommandError('Для получателя file требуется --path')
+            return sink_class(path=options['path'])
+        if options['sink'] == 'http':
+            if not options['url']:
+                raise CommandError('Для получателя http требуется --url')
+            return sink_class(url=options['url'])
+        return sink_class(stream=self.stdout)
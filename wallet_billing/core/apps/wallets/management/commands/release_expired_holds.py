@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.apps.common.exception.base import ServiceException
+from core.apps.wallets.factories import get_wallet_command_service
+
+
+class Command(BaseCommand):
+    help = ("Снимает резервы средств с истекшим сроком действия пачками. "
+            "Каждая пачка снимается в отдельной транзакции БД фиксированным числом запросов")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество резервов, снимаемых в одной транзакции БД'
+        )
+
+    def handle(self, *args, **options):
+        wallet_service = get_wallet_command_service()
+        released_total = 0
+        while True:
+            try:
+                released = wallet_service.release_expired_holds(chunk_size=options['chunk_size'])
+            except ServiceException as exc:
+                self.stderr.write(f'Пачка не снята: {exc.message}')
+                break
+            released_total += released
+            if released < options['chunk_size']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'Снято резервов с истекшим сроком: {released_total}'))
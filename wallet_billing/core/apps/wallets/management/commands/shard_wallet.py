@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.apps.common.exception.base import ServiceException
+from core.apps.wallets.services.shards import WalletShardService
+
+
+class Command(BaseCommand):
+    help = "Включает или выключает шардированный баланс кошелька"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'wallet_id',
+            help='Идентификатор кошелька'
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=8,
+            help='Количество частей баланса'
+        )
+        parser.add_argument(
+            '--disable',
+            action='store_true',
+            help='Перенести баланс из частей обратно в кошелек'
+        )
+
+    def handle(self, *args, **options):
+        shard_service = WalletShardService()
+        try:
+            if options['disable']:
+                shard_service.disable_sharding(wallet_id=options['wallet_id'])
+                self.stdout.write(self.style.SUCCESS(f'Шардированный баланс кошелька {options["wallet_id"]} выключен'))
+                return
+
+            if options['shards'] < 1:
+                raise CommandError('Количество частей баланса должно быть положительным')
+            shard_service.enable_sharding(wallet_id=options['wallet_id'], shard_count=options['shards'])
+        except ServiceException as exc:
+            raise CommandError(exc.message)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Для кошелька {options["wallet_id"]} включен шардированный баланс из {options["shards"]} частей'
+        ))
+        if settings.WALLET_COMMAND_MODE != 'sharded':
+            self.stdout.write(self.style.WARNING(
+                'Операции с шардированными кошельками поддерживает только WALLET_COMMAND_MODE=sharded'
+            ))
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.apps.wallets.services.locks import build_lock_report, load_lock_profiles
+
+
+class Command(BaseCommand):
+    help = ("Выводит самые часто блокируемые кошельки с перцентилями ожидания блокировки и временем ее удержания. "
+            "Объединяет профили всех процессов из WALLET_LOCK_PROFILE_DIR (WALLET_LOCK_PROFILING_ENABLED=True)")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Количество кошельков в отчете'
+        )
+        parser.add_argument(
+            '--dir',
+            default=settings.WALLET_LOCK_PROFILE_DIR,
+            help='Каталог профилей блокировок процессов'
+        )
+
+    def handle(self, *args, **options):
+        lock_stats = build_lock_report(load_lock_profiles(options['dir']), options['limit'])
+        if not lock_stats:
+            self.stdout.write(f'Профили блокировок в {options["dir"]} не найдены')
+            return
+
+        self.stdout.write(
+            f'{"wallet_id":<36} {"блокировок":>10} {"±":>6} '
+            f'{"p50, мс":>9} {"p95, мс":>9} {"p99, мс":>9} {"max, мс":>9} {"удерж. ср.":>10} {"удерж. max":>10}'
+        )
+        for stats in lock_stats:
+            self.stdout.write(
+                f'{str(stats.wallet_id):<36} {stats.lock_count:>10} {stats.lock_count_error:>6} '
+                f'{stats.wait_p50_ms:>9.2f} {stats.wait_p95_ms:>9.2f} {stats.wait_p99_ms:>9.2f} '
+                f'{stats.wait_max_ms:>9.2f} {stats.hold_avg_ms:>10.2f} {stats.hold_max_ms:>10.2f}'
+            )
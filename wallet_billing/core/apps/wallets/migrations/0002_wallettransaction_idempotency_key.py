@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:12
+
+import core.apps.common.enums
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Ключ идемпотентности'),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=15, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(Decimal('999999999'))], verbose_name='Баланс'),
+        ),
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='operation_type',
+            field=models.CharField(choices=core.apps.common.enums.OperationType.choices, max_length=32, verbose_name='Тип операции'),
+        ),
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='status',
+            field=models.CharField(choices=core.apps.common.enums.TransactionStatus.choices, max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(condition=models.Q(('idempotency_key__isnull', False)), fields=['created_at'], name='wallet_tx_idem_key_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('wallet', 'idempotency_key'), name='unique_wallet_idempotency_key'),
+        ),
+    ]
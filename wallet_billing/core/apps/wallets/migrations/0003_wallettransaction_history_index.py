@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индекс строится без блокировки записи в таблицу транзакций
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0002_wallettransaction_idempotency_key'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', '-created_at', 'id'], name='wallet_tx_wallet_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0003_wallettransaction_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='related_transaction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='wallets.wallettransaction', verbose_name='Связанная транзакция'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:25
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0004_wallettransaction_related_transaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Количество частей баланса'),
+        ),
+        migrations.CreateModel(
+            name='WalletBalanceShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField(verbose_name='Номер части')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=15, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Баланс')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_shards', to='wallets.wallet', verbose_name='Кошелек')),
+            ],
+            options={
+                'verbose_name': 'Часть баланса кошелька',
+                'verbose_name_plural': 'Части баланса кошельков',
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'index'), name='unique_wallet_balance_shard')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0005_wallet_balance_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Версия'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:32
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0006_wallet_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='wallet',
+            constraint=models.CheckConstraint(condition=models.Q(('balance__gte', 0), ('balance__lte', Decimal('999999999'))), name='wallet_balance_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='walletbalanceshard',
+            constraint=models.CheckConstraint(condition=models.Q(('balance__gte', 0)), name='wallet_balance_shard_balance_gte_0'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(('amount__gte', Decimal('0.01'))), name='wallet_tx_amount_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(('balance_after__gte', 0), ('balance_before__gte', 0)), name='wallet_tx_balances_gte_0'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(('operation_type__in', ['deposit', 'transfer', 'withdrawal'])), name='wallet_tx_operation_type_valid'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(('status__in', ['canceled', 'failed', 'in_processing', 'success'])), name='wallet_tx_status_valid'),
+        ),
+    ]
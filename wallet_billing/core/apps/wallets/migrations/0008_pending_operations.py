@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:35
+
+import django.core.validators
+from decimal import Decimal
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индекс очереди операций строится без блокировки записи в таблицу транзакций
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0007_balance_check_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='error_message',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Причина ошибки'),
+        ),
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        migrations.AlterField(
+            model_name='wallettransaction',
+            name='balance_before',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, validators=[django.core.validators.MinValueValidator(Decimal('0.00'))]),
+        ),
+        AddIndexConcurrently(
+            model_name='wallettransaction',
+            index=models.Index(condition=models.Q(('status', 'in_processing')), fields=['created_at'], name='wallet_tx_pending_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('status', 'success'), _negated=True), models.Q(('balance_after__isnull', False), ('balance_before__isnull', False)), _connector='OR'), name='wallet_tx_success_has_balances'),
+        ),
+    ]
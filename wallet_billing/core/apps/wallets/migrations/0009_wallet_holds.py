@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:40
+
+import django.core.validators
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Индексы очереди операций и активных резервов перестраиваются без блокировки записи в таблицу транзакций
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0008_pending_operations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='wallettransaction',
+            name='wallet_tx_operation_type_valid',
+        ),
+        RemoveIndexConcurrently(
+            model_name='wallettransaction',
+            name='wallet_tx_pending_created_idx',
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='reserved_balance',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=15, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Зарезервировано'),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Действует до'),
+        ),
+        AddIndexConcurrently(
+            model_name='wallettransaction',
+            index=models.Index(condition=models.Q(('status', 'in_processing'), models.Q(('operation_type', 'hold'), _negated=True)), fields=['created_at'], name='wallet_tx_pending_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='wallettransaction',
+            index=models.Index(condition=models.Q(('operation_type', 'hold'), ('status', 'in_processing')), fields=['expires_at'], name='wallet_tx_active_hold_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallet',
+            constraint=models.CheckConstraint(condition=models.Q(('reserved_balance__gte', 0), ('reserved_balance__lte', models.F('balance'))), name='wallet_reserved_balance_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(('operation_type__in', ['capture', 'deposit', 'hold', 'release', 'transfer', 'withdrawal'])), name='wallet_tx_operation_type_valid'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('operation_type', 'hold'), _negated=True), ('expires_at__isnull', False), _connector='OR'), name='wallet_tx_hold_has_expiry'),
+        ),
+    ]
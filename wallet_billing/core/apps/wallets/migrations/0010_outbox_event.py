@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:46
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0009_wallet_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('event_type', models.CharField(max_length=64, verbose_name='Тип события')),
+                ('wallet_id', models.UUIDField(verbose_name='Кошелек')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Данные события')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Событие для публикации',
+                'verbose_name_plural': 'События для публикации',
+            },
+        ),
+    ]
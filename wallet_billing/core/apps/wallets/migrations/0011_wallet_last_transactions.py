@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Снимок последних транзакций кошелька.
+
+    Колонка добавляется без значения по умолчанию, поэтому у существующих кошельков
+    снимок не построен (NULL) и их транзакции читаются из таблицы транзакций до запуска
+    rebuild_last_transactions --missing-only. Новые кошельки создаются с пустым снимком.
+    """
+
+    dependencies = [
+        ('wallets', '0010_outbox_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='last_transactions',
+            field=models.JSONField(blank=True, null=True, verbose_name='Последние транзакции'),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='last_transactions',
+            field=models.JSONField(blank=True, default=list, null=True, verbose_name='Последние транзакции'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from core.apps.wallets.dto.outbox import OutboxEventDTO
+
+
+class OutboxEvent(models.Model):
+    """
+    Событие для внешних систем, записанное в той же транзакции БД, что и изменение данных.
+
+    Событие появляется в таблице только вместе с зафиксированной транзакцией кошелька
+    и удаляется после публикации командой relay_outbox. Первичный ключ задает порядок публикации.
+    """
+
+    id = models.BigAutoField(
+        primary_key=True
+    )
+
+    event_type = models.CharField(
+        max_length=64,
+        verbose_name='Тип события'
+    )
+
+    wallet_id = models.UUIDField(
+        verbose_name='Кошелек'
+    )
+
+    payload = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        verbose_name='Данные события'
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+    class Meta:
+        verbose_name = 'Событие для публикации'
+        verbose_name_plural = 'События для публикации'
+
+    def __str__(self) -> str:
+        return f"{self.event_type} {self.id} для {self.wallet_id}"
+
+    def to_dto(self) -> OutboxEventDTO:
+        return OutboxEventDTO(
+            id=self.id,
+            event_type=self.event_type,
+            wallet_id=self.wallet_id,
+            payload=self.payload,
+            created_at=self.created_at
+        )
@@ -0,0 +1,42 @@
+from django.core.validators import MinValueValidator
+from django.db import models
+
+
+class WalletBalanceShard(models.Model):
+    """
+    Часть баланса шардированного кошелька.
+
+    Пополнения шардированного кошелька зачисляются на одну из частей, поэтому
+    параллельные пополнения не блокируют общую строку кошелька. Полный баланс
+    равен сумме Wallet.balance и балансов всех частей.
+    """
+
+    wallet = models.ForeignKey(
+        'Wallet',
+        on_delete=models.CASCADE,
+        related_name='balance_shards',
+        verbose_name='Кошелек'
+    )
+
+    index = models.PositiveSmallIntegerField(
+        verbose_name='Номер части'
+    )
+
+    balance = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        validators=[MinValueValidator(0)],
+        verbose_name='Баланс'
+    )
+
+    class Meta:
+        verbose_name = 'Часть баланса кошелька'
+        verbose_name_plural = 'Части баланса кошельков'
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'index'], name='unique_wallet_balance_shard'),
+            models.CheckConstraint(condition=models.Q(balance__gte=0), name='wallet_balance_shard_balance_gte_0'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Часть {self.index} кошелька {self.wallet_id}"
@@ -1,12 +1,47 @@
 import uuid
+from dataclasses import fields
 from decimal import Decimal
 
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 
 from core.apps.common.enums import OperationType, TransactionStatus
 from core.apps.common.models import TimedBaseModel
 from core.apps.wallets.dto.transaction import TransactionDTO
+from core.apps.wallets.validators import MIN_TRANSACTION_AMOUNT, OPERATION_TYPE_VALUES, TRANSACTION_STATUS_VALUES
+
+
+IDEMPOTENCY_KEY_CONSTRAINT = 'unique_wallet_idempotency_key'
+
+# Поля транзакции в порядке полей TransactionDTO для TransactionDTO.from_row
+TRANSACTION_DTO_FIELDS = tuple(dto_field.name for dto_field in fields(TransactionDTO))
+
+
+class WalletTransactionQuerySet(models.QuerySet):
+
+    def dto_rows(self) -> 'WalletTransactionQuerySet':
+        """Строки транзакций для TransactionDTO.from_row: без создания моделей."""
+        return self.values_list(*TRANSACTION_DTO_FIELDS)
+
+    def last_per_wallet(self, wallet_ids: list[uuid.UUID], limit: int) -> 'WalletTransactionQuerySet':
+        """
+        Последние limit транзакций каждого из кошельков одним запросом.
+
+        Номер строки в окне по кошельку считается по индексу (wallet, -created_at, id),
+        результат упорядочен по кошельку, внутри кошелька - новые первыми.
+        """
+        return (
+            self.filter(wallet_id__in=wallet_ids)
+            .annotate(row_number=Window(
+                RowNumber(),
+                partition_by=F('wallet_id'),
+                order_by=[F('created_at').desc(), F('id')]
+            ))
+            .filter(row_number__lte=limit)
+            .order_by('wallet_id', '-created_at', 'id')
+        )
 
 
 class WalletTransaction(TimedBaseModel):
@@ -38,15 +73,20 @@ class WalletTransaction(TimedBaseModel):
         verbose_name='Сумма'
     )
 
+    # Балансы не заполнены, пока операция в статусе IN_PROCESSING или завершилась ошибкой
     balance_after = models.DecimalField(
         max_digits=15,
         decimal_places=2,
+        null=True,
+        blank=True,
         validators=[MinValueValidator(Decimal('0.00'))],
     )
 
     balance_before = models.DecimalField(
         max_digits=15,
         decimal_places=2,
+        null=True,
+        blank=True,
         validators=[MinValueValidator(Decimal('0.00'))],
     )
 
@@ -55,11 +95,103 @@ class WalletTransaction(TimedBaseModel):
         choices=TransactionStatus.choices,
     )
 
+    related_transaction = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Связанная транзакция'
+    )
+
+    idempotency_key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        verbose_name='Ключ идемпотентности'
+    )
+
+    error_message = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        verbose_name='Причина ошибки'
+    )
+
+    # Срок действия резерва (HOLD): по его истечении резерв снимается release_expired_holds
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Действует до'
+    )
+
+    objects = WalletTransactionQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Транзакция'
         verbose_name_plural = 'Транзакции'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wallet', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name=IDEMPOTENCY_KEY_CONSTRAINT,
+            ),
+            models.CheckConstraint(
+                condition=models.Q(amount__gte=MIN_TRANSACTION_AMOUNT),
+                name='wallet_tx_amount_positive',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(balance_before__gte=0, balance_after__gte=0),
+                name='wallet_tx_balances_gte_0',
+            ),
+            models.CheckConstraint(
+                condition=(
+                    ~models.Q(status=TransactionStatus.SUCCESS.value)
+                    | models.Q(balance_before__isnull=False, balance_after__isnull=False)
+                ),
+                name='wallet_tx_success_has_balances',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(operation_type__in=sorted(OPERATION_TYPE_VALUES)),
+                name='wallet_tx_operation_type_valid',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(status__in=sorted(TRANSACTION_STATUS_VALUES)),
+                name='wallet_tx_status_valid',
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(operation_type=OperationType.HOLD.value) | models.Q(expires_at__isnull=False),
+                name='wallet_tx_hold_has_expiry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['wallet', '-created_at', 'id'],
+                name='wallet_tx_wallet_created_idx',
+            ),
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='wallet_tx_idem_key_created_idx',
+            ),
+            models.Index(
+                fields=['created_at'],
+                condition=(
+                    models.Q(status=TransactionStatus.IN_PROCESSING.value)
+                    & ~models.Q(operation_type=OperationType.HOLD.value)
+                ),
+                name='wallet_tx_pending_created_idx',
+            ),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(
+                    operation_type=OperationType.HOLD.value,
+                    status=TransactionStatus.IN_PROCESSING.value,
+                ),
+                name='wallet_tx_active_hold_idx',
+            ),
+        ]
 
 
     def __str__(self) -> str:
@@ -67,14 +199,21 @@ class WalletTransaction(TimedBaseModel):
 
     @classmethod
     def from_dto(cls, dto: TransactionDTO):
-        return cls(
+        transaction_model = cls(
             wallet_id=dto.wallet_id,
             operation_type=dto.operation_type,
             amount=dto.amount,
             balance_after=dto.balance_after,
             balance_before=dto.balance_before,
-            status=dto.status
+            status=dto.status,
+            related_transaction_id=dto.related_transaction_id,
+            idempotency_key=dto.idempotency_key,
+            error_message=dto.error_message,
+            expires_at=dto.expires_at
         )
+        if dto.id is not None:
+            transaction_model.id = dto.id
+        return transaction_model
 
     def to_dto(self):
         return TransactionDTO(
@@ -85,5 +224,10 @@ class WalletTransaction(TimedBaseModel):
             balance_after=self.balance_after,
             balance_before=self.balance_before,
             status=TransactionStatus(self.status),
-            created_at=self.created_at
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            related_transaction_id=self.related_transaction_id,
+            idempotency_key=self.idempotency_key,
+            error_message=self.error_message,
+            expires_at=self.expires_at
         )
\ No newline at end of file
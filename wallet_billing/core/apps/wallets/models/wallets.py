@@ -3,9 +3,90 @@ from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from core.apps.common.models import TimedBaseModel
+from core.apps.wallets.dto.transaction import TransactionDTO
 from core.apps.wallets.dto.wallets import WalletDTO
+from core.apps.wallets.models.shards import WalletBalanceShard
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.validators import MAX_WALLET_BALANCE, validate_wallet_balance
+
+
+# Количество последних транзакций в данных кошелька
+LAST_TRANSACTIONS_LIMIT = 5
+
+# Снимок последних транзакций построен и актуален. Пополнения шардированного кошелька
+# не изменяют строку кошелька, поэтому его транзакции читаются из таблицы транзакций
+LAST_TRANSACTIONS_SNAPSHOT = models.Q(last_transactions__isnull=False, shard_count=0)
+
+# Атрибут с полным балансом кошелька, включая части шардированного баланса
+TOTAL_BALANCE = 'total_balance'
+
+# Поля строки кошелька для построения WalletDTO без создания модели
+WALLET_DTO_FIELDS = (
+    'id', TOTAL_BALANCE, 'user_id', 'is_active', 'reserved_balance', 'version', 'updated_at',
+    'shard_count', 'last_transactions',
+)
+
+
+class WalletQuerySet(models.QuerySet):
+
+    def with_total_balance(self):
+        """Добавляет полный баланс кошелька: Wallet.balance и сумму частей баланса."""
+        shards_balance = (
+            WalletBalanceShard.objects
+            .filter(wallet_id=OuterRef('pk'))
+            .order_by()
+            .values('wallet_id')
+            .annotate(total=Sum('balance'))
+            .values('total')
+        )
+        # Подзапрос к частям баланса выполняется только для шардированных кошельков
+        return self.annotate(**{
+            TOTAL_BALANCE: Case(
+                When(shard_count=0, then=F('balance')),
+                default=F('balance') + Coalesce(
+                    Subquery(shards_balance, output_field=models.DecimalField(max_digits=15, decimal_places=2)),
+                    Decimal('0.00'),
+                ),
+            )
+        })
+
+    def dto_rows(self):
+        """Именованные строки кошельков с полным балансом (WALLET_DTO_FIELDS): без создания моделей."""
+        return self.with_total_balance().values_list(*WALLET_DTO_FIELDS, named=True)
+
+    def rebuild_last_transactions(self) -> list[uuid.UUID]:
+        """
+        Пересобирает снимок последних транзакций кошельков queryset по таблице транзакций.
+
+        Кошельки блокируются в порядке возрастания id, как и операциями, поэтому параллельная
+        операция не перезапишет пересобранный снимок. Последние транзакции всех кошельков
+        выбираются одним запросом с оконной функцией, снимки записываются одним UPDATE.
+
+        Returns:
+            list[uuid.UUID]: Идентификаторы обработанных кошельков
+        """
+        with transaction.atomic(using=self.db):
+            wallet_ids = list(self.select_for_update(no_key=True).order_by('id').values_list('id', flat=True))
+            if not wallet_ids:
+                return []
+
+            transactions = WalletTransaction.objects.last_per_wallet(wallet_ids, limit=LAST_TRANSACTIONS_LIMIT)
+            snapshots = {wallet_id: [] for wallet_id in wallet_ids}
+            for transaction_dto in map(TransactionDTO.from_row, transactions.dto_rows()):
+                snapshots[transaction_dto.wallet_id].append(transaction_dto.to_snapshot())
+
+            now = timezone.now()
+            self.model.objects.bulk_update(
+                [self.model(id=wallet_id, last_transactions=snapshot, updated_at=now)
+                 for wallet_id, snapshot in snapshots.items()],
+                fields=['last_transactions', 'updated_at']
+            )
+        return wallet_ids
 
 
 class Wallet(TimedBaseModel):
@@ -28,18 +109,58 @@ class Wallet(TimedBaseModel):
         max_digits=15,
         decimal_places=2,
         default=0.00,
-        validators=[MinValueValidator(0), MaxValueValidator(Decimal('999999999'))],
+        validators=[MinValueValidator(0), MaxValueValidator(MAX_WALLET_BALANCE)],
         verbose_name='Баланс'
     )
 
+    # Часть баланса, зарезервированная активными резервами (HOLD) и недоступная для списания
+    reserved_balance = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0.00,
+        validators=[MinValueValidator(0)],
+        verbose_name='Зарезервировано'
+    )
+
     is_active = models.BooleanField(
         default=True,
         verbose_name='Статус кошелька'
     )
 
+    shard_count = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Количество частей баланса'
+    )
+
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Версия'
+    )
+
+    # Снимок последних транзакций (новые первыми), обновляется тем же UPDATE, что и баланс.
+    # NULL - снимок не построен (команда rebuild_last_transactions), транзакции читаются из таблицы
+    last_transactions = models.JSONField(
+        null=True,
+        blank=True,
+        default=list,
+        verbose_name='Последние транзакции'
+    )
+
+    objects = WalletQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Кошелек'
         verbose_name_plural = 'Кошельки'
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(balance__gte=0, balance__lte=MAX_WALLET_BALANCE),
+                name='wallet_balance_range',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(reserved_balance__gte=0, reserved_balance__lte=F('balance')),
+                name='wallet_reserved_balance_range',
+            ),
+        ]
 
 
     def __str__(self) -> str:
@@ -47,17 +168,88 @@ class Wallet(TimedBaseModel):
 
     def deposit(self, amount: Decimal):
         self.balance += amount
-        self.full_clean()
+        validate_wallet_balance(self.balance)
+        self.version += 1
 
     def withdrawal(self, amount: Decimal):
         self.balance -= amount
-        self.full_clean()
+        validate_wallet_balance(self.balance, self.reserved_balance)
+        self.version += 1
+
+    def reserve(self, amount: Decimal):
+        self.reserved_balance += amount
+        validate_wallet_balance(self.balance, self.reserved_balance)
+        self.version += 1
+
+    def capture(self, amount: Decimal, reserved_amount: Decimal):
+        """Списывает amount из резерва reserved_amount, остаток резерва освобождается."""
+        self.reserved_balance -= reserved_amount
+        self.balance -= amount
+        validate_wallet_balance(self.balance, self.reserved_balance)
+        self.version += 1
+
+    def release(self, reserved_amount: Decimal):
+        self.reserved_balance -= reserved_amount
+        validate_wallet_balance(self.balance, self.reserved_balance)
+        self.version += 1
+
+    @property
+    def available_balance(self) -> Decimal:
+        """Баланс строки кошелька, доступный для списания: без зарезервированной суммы."""
+        return self.balance - self.reserved_balance
+
+    @property
+    def is_sharded(self) -> bool:
+        return self.shard_count > 0
+
+    def get_total_balance(self) -> Decimal:
+        """Полный баланс кошелька с учетом частей шардированного баланса."""
+        total_balance = getattr(self, TOTAL_BALANCE, None)
+        if total_balance is not None:
+            return total_balance
+        if not self.is_sharded:
+            return self.balance
+        shards_balance = self.balance_shards.aggregate(total=Sum('balance'))['total']
+        return self.balance + (shards_balance or Decimal('0.00'))
+
+    @property
+    def has_last_transactions_snapshot(self) -> bool:
+        return self.last_transactions is not None and not self.is_sharded
+
+    def push_last_transactions(self, transactions: list[TransactionDTO]):
+        """
+        Добавляет в снимок новые и измененные транзакции, заменяя записи с теми же id.
+
+        Снимок упорядочен по дате создания, поэтому выполненная позже отложенная операция
+        занимает место по времени приема. Снимок, который не построен, не изменяется.
+        """
+        if self.last_transactions is None:
+            return
+        last_transactions = {
+            transaction_dto.id: transaction_dto
+            for transaction_dto in self.get_snapshot_transactions()
+        }
+        last_transactions.update((transaction_dto.id, transaction_dto) for transaction_dto in transactions)
+        ordered = sorted(last_transactions.values(), key=lambda transaction_dto: transaction_dto.created_at, reverse=True)
+        self.last_transactions = [transaction_dto.to_snapshot() for transaction_dto in ordered[:LAST_TRANSACTIONS_LIMIT]]
+
+    def get_snapshot_transactions(self) -> list[TransactionDTO]:
+        return [TransactionDTO.from_snapshot(self.id, entry) for entry in self.last_transactions or []]
 
-    def to_dto(self):
+    def to_dto(self, last_transaction: list[TransactionDTO] = None):
+        if last_transaction is None:
+            if self.has_last_transactions_snapshot:
+                last_transaction = self.get_snapshot_transactions()
+            else:
+                transactions = self.transactions.all().order_by('-created_at')[:LAST_TRANSACTIONS_LIMIT]
+                last_transaction = [transaction.to_dto() for transaction in transactions]
         return WalletDTO(
             id=self.id,
-            balance=self.balance,
-            last_transaction=[transaction.to_dto() for transaction in self.transactions.all().order_by('-created_at')[:5]],
-            user_id=self.user.id,
-            is_active=self.is_active
+            balance=self.get_total_balance(),
+            last_transaction=last_transaction,
+            user_id=self.user_id,
+            is_active=self.is_active,
+            reserved_balance=self.reserved_balance,
+            version=self.version,
+            updated_at=self.updated_at
         )
\ No newline at end of file
@@ -0,0 +1,135 @@
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+
+from django.core.cache import BaseCache, caches
+
+from core.apps.common import metrics
+from core.apps.wallets.dto.wallets import WalletDTO
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WalletCacheStats:
+    """Счетчики попаданий и промахов кэша кошельков в текущем процессе, экспортируются в wallet_cache_requests_total."""
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.WALLET_CACHE_REQUESTS.labels(result='hit' if hit else 'miss').inc()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class WalletCacheService:
+    """
+    Кэш данных кошелька (баланс и последние транзакции) поверх кэш-фреймворка Django.
+
+    Хранит WalletDTO под ключом кошелька. Время жизни и размер задаются
+    настройками кэша ``cache_alias``.
+
+    Читатель может загрузить кошелек до фиксации изменения, а сохранить в кэш уже после
+    invalidate. Поэтому invalidate оставляет метку сброса на invalidation_ttl секунд, и сохранение,
+    заставшее метку, сразу удаляет свое значение: метка ставится до удаления, а проверяется после записи,
+    так что устаревшее значение удаляет либо сам читатель, либо invalidate.
+    """
+    cache_alias: str = 'wallets'
+    invalidation_ttl: float = 2
+    stats: WalletCacheStats = field(default_factory=WalletCacheStats)
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def make_key(wallet_id: uuid.UUID) -> str:
+        return f'wallet:{wallet_id}'
+
+    @staticmethod
+    def make_invalidation_key(wallet_id: uuid.UUID) -> str:
+        return f'wallet-invalidated:{wallet_id}'
+
+    def get(self, wallet_id: uuid.UUID) -> WalletDTO | None:
+        """Получает DTO кошелька из кэша и учитывает попадание или промах."""
+        wallet_dto = self.cache.get(self.make_key(wallet_id))
+        self.stats.record(hit=wallet_dto is not None)
+        return wallet_dto
+
+    async def aget(self, wallet_id: uuid.UUID) -> WalletDTO | None:
+        """Асинхронно получает DTO кошелька из кэша."""
+        wallet_dto = await self.cache.aget(self.make_key(wallet_id))
+        self.stats.record(hit=wallet_dto is not None)
+        return wallet_dto
+
+    def get_many(self, wallet_ids: list[uuid.UUID]) -> dict[uuid.UUID, WalletDTO]:
+        """Получает DTO кошельков из кэша одним обращением, отсутствующие не возвращаются."""
+        found = self.cache.get_many([self.make_key(wallet_id) for wallet_id in wallet_ids])
+        return self._record_many(wallet_ids, found)
+
+    async def aget_many(self, wallet_ids: list[uuid.UUID]) -> dict[uuid.UUID, WalletDTO]:
+        """Асинхронно получает DTO кошельков из кэша одним обращением."""
+        found = await self.cache.aget_many([self.make_key(wallet_id) for wallet_id in wallet_ids])
+        return self._record_many(wallet_ids, found)
+
+    def set(self, wallet_dto: WalletDTO):
+        """Сохраняет DTO кошелька в кэш, если кошелек не сброшен во время загрузки."""
+        self.cache.set(self.make_key(wallet_dto.id), wallet_dto)
+        if self.cache.has_key(self.make_invalidation_key(wallet_dto.id)):
+            self.cache.delete(self.make_key(wallet_dto.id))
+
+    async def aset(self, wallet_dto: WalletDTO):
+        """Асинхронно сохраняет DTO кошелька в кэш."""
+        await self.cache.aset(self.make_key(wallet_dto.id), wallet_dto)
+        if await self.cache.ahas_key(self.make_invalidation_key(wallet_dto.id)):
+            await self.cache.adelete(self.make_key(wallet_dto.id))
+
+    def set_many(self, wallet_dtos: list[WalletDTO]):
+        """Сохраняет DTO кошельков в кэш одним обращением, кроме сброшенных во время загрузки."""
+        if not wallet_dtos:
+            return
+        self.cache.set_many({self.make_key(wallet_dto.id): wallet_dto for wallet_dto in wallet_dtos})
+        invalidated = self.cache.get_many([self.make_invalidation_key(wallet_dto.id) for wallet_dto in wallet_dtos])
+        self.cache.delete_many(self._get_invalidated_keys(wallet_dtos, invalidated))
+
+    async def aset_many(self, wallet_dtos: list[WalletDTO]):
+        """Асинхронно сохраняет DTO кошельков в кэш одним обращением."""
+        if not wallet_dtos:
+            return
+        await self.cache.aset_many({self.make_key(wallet_dto.id): wallet_dto for wallet_dto in wallet_dtos})
+        invalidated = await self.cache.aget_many(
+            [self.make_invalidation_key(wallet_dto.id) for wallet_dto in wallet_dtos]
+        )
+        await self.cache.adelete_many(self._get_invalidated_keys(wallet_dtos, invalidated))
+
+    def _get_invalidated_keys(self, wallet_dtos: list[WalletDTO], invalidated: dict[str, bool]) -> list[str]:
+        return [self.make_key(wallet_dto.id) for wallet_dto in wallet_dtos
+                if self.make_invalidation_key(wallet_dto.id) in invalidated]
+
+    def _record_many(self, wallet_ids: list[uuid.UUID], found: dict[str, WalletDTO]) -> dict[uuid.UUID, WalletDTO]:
+        wallets = {}
+        for wallet_id in wallet_ids:
+            wallet_dto = found.get(self.make_key(wallet_id))
+            self.stats.record(hit=wallet_dto is not None)
+            if wallet_dto is not None:
+                wallets[wallet_id] = wallet_dto
+        return wallets
+
+    def invalidate(self, wallet_ids: list[uuid.UUID]):
+        """Удаляет данные кошельков из кэша и на invalidation_ttl запрещает сохранять загруженные ранее."""
+        self.cache.set_many({self.make_invalidation_key(wallet_id): True for wallet_id in wallet_ids},
+                            timeout=self.invalidation_ttl)
+        self.cache.delete_many([self.make_key(wallet_id) for wallet_id in wallet_ids])
+        logger.info('Кэш кошельков %s сброшен', ", ".join(map(str, wallet_ids)))
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+
+from core.apps.wallets.dto.transaction import TransactionDTO
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.services.wallets import BaseWalletCommandService
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingBatch:
+    """Операции одного кошелька, ожидающие совместного выполнения."""
+    operations: list[WalletOperationDTO] = field(default_factory=list)
+    futures: list[asyncio.Future] = field(default_factory=list)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+@dataclass
+class WalletOperationCoalescer:
+    """
+    Объединяет параллельные операции одного кошелька в пакеты.
+
+    Первая операция кошелька открывает пакет, который выполняется через window секунд
+    или сразу по достижении max_batch_size операций одним вызовом apply_batch:
+    одна блокировка кошелька, одна фиксация и один bulk_create транзакций на пакет.
+    Каждый вызывающий получает свою транзакцию или свою ошибку, отклоненная операция
+    не отменяет остальные операции пакета.
+
+    Пакеты собираются в пределах одного event loop, поэтому объединение работает
+    в режиме asgi, где запросы воркера обрабатываются конкурентно.
+    """
+    wallet_service: BaseWalletCommandService
+    window: float = 0.002
+    max_batch_size: int = 100
+    _pending: dict[tuple[int, uuid.UUID], _PendingBatch] = field(default_factory=dict, init=False, repr=False)
+    _tasks: set[asyncio.Task] = field(default_factory=set, init=False, repr=False)
+
+    async def submit(self, operation: WalletOperationDTO) -> TransactionDTO:
+        """
+        Добавляет операцию в пакет ее кошелька и ожидает результат.
+
+        Args:
+            operation: Данные операции пополнения или снятия
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            ServiceException: Ошибка выполнения этой операции
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), operation.wallet_id)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch()
+            task = loop.create_task(self._flush_later(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        future = loop.create_future()
+        batch.operations.append(operation)
+        batch.futures.append(future)
+        if len(batch.operations) >= self.max_batch_size:
+            self._close(key, batch)
+            batch.full.set()
+
+        return await future
+
+    async def _flush_later(self, key: tuple[int, uuid.UUID], batch: _PendingBatch):
+        """Выполняет пакет по истечении окна ожидания или при его заполнении."""
+        try:
+            await asyncio.wait_for(batch.full.wait(), timeout=self.window)
+        except asyncio.TimeoutError:
+            pass
+        self._close(key, batch)
+
+        try:
+            results = await self.wallet_service.aapply_batch(batch.operations)
+        except Exception as exc:
+            logger.exception('Ошибка выполнения пакета из %s операций для кошелька %s',
+                             len(batch.operations), key[1])
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        logger.info('Объединено %s операций для кошелька %s', len(batch.operations), key[1])
+        for future, result in zip(batch.futures, results):
+            if future.done():
+                continue
+            if result.error is not None:
+                future.set_exception(result.error)
+            else:
+                future.set_result(result.transaction)
+
+    def _close(self, key: tuple[int, uuid.UUID], batch: _PendingBatch):
+        """Закрывает пакет для новых операций: следующая операция кошелька откроет новый."""
+        if self._pending.get(key) is batch:
+            del self._pending[key]
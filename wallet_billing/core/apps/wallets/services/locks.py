@@ -0,0 +1,208 @@
+import atexit
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core.apps.wallets.dto.wallets import WalletLockStatsDTO
+
+
+logger = logging.getLogger(__name__)
+
+# Количество последних ожиданий блокировки кошелька, по которым считаются перцентили
+LOCK_WAIT_SAMPLES = 64
+
+
+@dataclass(slots=True)
+class WalletLockEntry:
+    """Блокировки одного кошелька в профиле, время в секундах."""
+    count: int = 0
+    # Погрешность count после вытеснения: кошелек мог быть заблокирован на столько раз меньше
+    error: int = 0
+    wait_samples: deque[float] = field(default_factory=lambda: deque(maxlen=LOCK_WAIT_SAMPLES))
+    wait_max: float = 0.0
+    hold_count: int = 0
+    hold_total: float = 0.0
+    hold_max: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'error': self.error,
+            'wait_samples': list(self.wait_samples),
+            'wait_max': self.wait_max,
+            'hold_count': self.hold_count,
+            'hold_total': self.hold_total,
+            'hold_max': self.hold_max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'WalletLockEntry':
+        # Профили процессов объединяются, поэтому загруженные ожидания не ограничиваются LOCK_WAIT_SAMPLES
+        return cls(**{**data, 'wait_samples': deque(data['wait_samples'])})
+
+    def merge(self, other: 'WalletLockEntry'):
+        self.count += other.count
+        self.error += other.error
+        self.wait_samples.extend(other.wait_samples)
+        self.wait_max = max(self.wait_max, other.wait_max)
+        self.hold_count += other.hold_count
+        self.hold_total += other.hold_total
+        self.hold_max = max(self.hold_max, other.hold_max)
+
+
+@dataclass
+class WalletLockProfiler:
+    """
+    Профиль блокировок кошельков в текущем процессе: ожидание select_for_update()
+    и удержание блокировки до фиксации транзакции.
+
+    Хранит не больше capacity кошельков по алгоритму Space-Saving: новый кошелек при заполнении
+    вытесняет кошелек с наименьшим числом блокировок и наследует его счетчик как погрешность,
+    поэтому часто блокируемые кошельки остаются в профиле при любом количестве редких.
+    Кандидат на вытеснение берется из кучи (счетчик, кошелек) за O(log capacity): счетчики в куче
+    обновляются лениво, только когда устаревшая запись оказывается на вершине.
+    При заданном dump_dir фоновый поток раз в dump_interval секунд записывает профиль
+    в файл <dump_dir>/<pid>.json, отчет объединяет профили всех процессов (load_lock_profiles).
+    """
+    capacity: int = 1000
+    dump_dir: str = None
+    dump_interval: float = 10.0
+    entries: dict[uuid.UUID, WalletLockEntry] = field(default_factory=dict, init=False)
+    # По одной записи на кошелек профиля, счетчик записи может быть меньше текущего
+    _heap: list[tuple[int, uuid.UUID]] = field(default_factory=list, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _dump_thread: threading.Thread = field(default=None, init=False, repr=False)
+
+    def record_wait(self, wallet_ids: Iterable[uuid.UUID], seconds: float):
+        """Учитывает блокировку кошельков, полученную (или не полученную) после ожидания seconds."""
+        with self._lock:
+            for wallet_id in wallet_ids:
+                entry = self.entries.get(wallet_id)
+                if entry is None:
+                    entry = self._add_entry(wallet_id)
+                entry.count += 1
+                entry.wait_samples.append(seconds)
+                entry.wait_max = max(entry.wait_max, seconds)
+            if self.dump_dir and self._dump_thread is None:
+                self._start_dumping()
+
+    def record_hold(self, wallet_ids: Iterable[uuid.UUID], acquired_at: float):
+        """Учитывает удержание блокировки кошельков с момента acquired_at (time.monotonic())."""
+        seconds = time.monotonic() - acquired_at
+        with self._lock:
+            for wallet_id in wallet_ids:
+                entry = self.entries.get(wallet_id)
+                if entry is not None:
+                    entry.hold_count += 1
+                    entry.hold_total += seconds
+                    entry.hold_max = max(entry.hold_max, seconds)
+
+    def report(self, limit: int) -> list[WalletLockStatsDTO]:
+        """Самые часто блокируемые кошельки текущего процесса."""
+        with self._lock:
+            entries = {wallet_id: WalletLockEntry.from_dict(entry.to_dict())
+                       for wallet_id, entry in self.entries.items()}
+        return build_lock_report(entries, limit)
+
+    def dump(self):
+        """Записывает профиль процесса в <dump_dir>/<pid>.json, заменяя предыдущий."""
+        with self._lock:
+            data = {str(wallet_id): entry.to_dict() for wallet_id, entry in self.entries.items()}
+        path = Path(self.dump_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        temporary_path = path / f'{os.getpid()}.json.tmp'
+        temporary_path.write_text(json.dumps(data))
+        os.replace(temporary_path, path / f'{os.getpid()}.json')
+
+    def _add_entry(self, wallet_id: uuid.UUID) -> WalletLockEntry:
+        if len(self.entries) < self.capacity:
+            entry = WalletLockEntry()
+        else:
+            evicted = self.entries.pop(self._pop_least_locked())
+            entry = WalletLockEntry(count=evicted.count, error=evicted.count)
+        self.entries[wallet_id] = entry
+        heapq.heappush(self._heap, (entry.count, wallet_id))
+        return entry
+
+    def _pop_least_locked(self) -> uuid.UUID:
+        """Извлекает из кучи кошелек с наименьшим числом блокировок."""
+        while True:
+            count, wallet_id = heapq.heappop(self._heap)
+            current_count = self.entries[wallet_id].count
+            if count == current_count:
+                return wallet_id
+            # Каждое обновление увеличивает счетчик записи, поэтому на одну блокировку приходится
+            # не больше одного повторного добавления в кучу
+            heapq.heappush(self._heap, (current_count, wallet_id))
+
+    def _start_dumping(self):
+        # Поток запускается при первой блокировке, то есть уже в воркере после fork
+        self._dump_thread = threading.Thread(target=self._dump_periodically, name='wallet-lock-profile', daemon=True)
+        self._dump_thread.start()
+        atexit.register(self._dump_safely)
+
+    def _dump_periodically(self):
+        while True:
+            time.sleep(self.dump_interval)
+            self._dump_safely()
+
+    def _dump_safely(self):
+        try:
+            self.dump()
+        except OSError as exc:
+            logger.warning('Не удалось записать профиль блокировок в %s: %s', self.dump_dir, exc)
+
+
+def load_lock_profiles(dump_dir: str) -> dict[uuid.UUID, WalletLockEntry]:
+    """Объединяет профили блокировок всех процессов из каталога dump_dir."""
+    entries: dict[uuid.UUID, WalletLockEntry] = {}
+    for path in sorted(Path(dump_dir).glob('*.json')):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning('Профиль блокировок %s не прочитан: %s', path, exc)
+            continue
+        for wallet_id, entry_data in data.items():
+            entry = WalletLockEntry.from_dict(entry_data)
+            wallet_id = uuid.UUID(wallet_id)
+            if wallet_id in entries:
+                entries[wallet_id].merge(entry)
+            else:
+                entries[wallet_id] = entry
+    return entries
+
+
+def build_lock_report(entries: dict[uuid.UUID, WalletLockEntry], limit: int) -> list[WalletLockStatsDTO]:
+    """Кошельки с наибольшим числом блокировок и перцентили ожидания блокировки в миллисекундах."""
+    hottest = sorted(entries.items(), key=lambda item: (-item[1].count, str(item[0])))[:limit]
+    return [_to_lock_stats(wallet_id, entry) for wallet_id, entry in hottest]
+
+
+def _to_lock_stats(wallet_id: uuid.UUID, entry: WalletLockEntry) -> WalletLockStatsDTO:
+    wait_samples = sorted(entry.wait_samples)
+    return WalletLockStatsDTO(
+        wallet_id=wallet_id,
+        lock_count=entry.count,
+        lock_count_error=entry.error,
+        wait_p50_ms=_percentile(wait_samples, 0.5) * 1000,
+        wait_p95_ms=_percentile(wait_samples, 0.95) * 1000,
+        wait_p99_ms=_percentile(wait_samples, 0.99) * 1000,
+        wait_max_ms=entry.wait_max * 1000,
+        hold_avg_ms=(entry.hold_total / entry.hold_count if entry.hold_count else 0.0) * 1000,
+        hold_max_ms=entry.hold_max * 1000,
+    )
+
+
+def _percentile(sorted_samples: list[float], quantile: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[max(math.ceil(quantile * len(sorted_samples)) - 1, 0)]
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import select
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections
+
+from core.apps.wallets.dto.wallets import WalletChangeDTO
+from core.apps.wallets.models.wallets import TOTAL_BALANCE, Wallet
+
+
+logger = logging.getLogger(__name__)
+
+# Канал NOTIFY с идентификаторами измененных кошельков
+WALLET_CHANGES_CHANNEL = 'wallet_changes'
+
+
+def notify_wallets_changed(wallet_ids: list[uuid.UUID]):
+    """
+    Отправляет NOTIFY по каждому кошельку одним запросом.
+
+    Postgres доставляет уведомления только после фиксации текущей транзакции
+    и объединяет одинаковые уведомления одной транзакции.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_notify(%s, wallet_id::text) FROM unnest(%s::uuid[]) AS wallet_id',
+            [WALLET_CHANGES_CHANNEL, [str(wallet_id) for wallet_id in wallet_ids]]
+        )
+
+
+def _get_changes_queryset(wallet_ids: set[uuid.UUID]):
+    return (
+        Wallet.objects
+        .with_total_balance()
+        .filter(id__in=wallet_ids)
+        .values_list('id', TOTAL_BALANCE, 'reserved_balance', 'version')
+    )
+
+
+def get_wallet_changes(wallet_ids: set[uuid.UUID]) -> list[WalletChangeDTO]:
+    """Получает текущие балансы кошельков одним запросом."""
+    return [WalletChangeDTO(*row) for row in _get_changes_queryset(wallet_ids)]
+
+
+async def aget_wallet_changes(wallet_ids: set[uuid.UUID]) -> list[WalletChangeDTO]:
+    """Асинхронно получает текущие балансы кошельков одним запросом."""
+    return [WalletChangeDTO(*row) async for row in _get_changes_queryset(wallet_ids)]
+
+
+@dataclass(eq=False)
+class WalletChangeSubscription:
+    """Подписка на изменения кошельков, получаемые в event loop подписчика."""
+    wallet_ids: frozenset[uuid.UUID]
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+
+    def deliver(self, change: WalletChangeDTO):
+        """Передает изменение в очередь подписки. Вызывается из потока слушателя."""
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, change)
+
+    async def get(self, timeout: float) -> WalletChangeDTO | None:
+        """Ожидает следующее изменение не дольше timeout секунд."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+@dataclass
+class WalletChangeListener:
+    """
+    Слушатель уведомлений об изменении кошельков, один на процесс.
+
+    Фоновый поток держит одно соединение с LISTEN и раздает изменения подписчикам.
+    Балансы запрашиваются одним запросом на пачку уведомлений и только для кошельков,
+    у которых есть подписчики, поэтому ожидающие подписчики не создают нагрузки на БД.
+    После переподключения подписчики получают текущие балансы, чтобы не пропустить
+    изменения, случившиеся без соединения.
+    """
+    channel: str = WALLET_CHANGES_CHANNEL
+    poll_timeout: float = 1.0
+    reconnect_delay: float = 1.0
+    _subscriptions: dict[uuid.UUID, set[WalletChangeSubscription]] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _stopped: threading.Event = field(default_factory=threading.Event, init=False, repr=False)
+    _thread: threading.Thread = field(default=None, init=False, repr=False)
+
+    def subscribe(self, wallet_ids: set[uuid.UUID]) -> WalletChangeSubscription:
+        """Подписывает текущий event loop на изменения кошельков и запускает слушатель."""
+        subscription = WalletChangeSubscription(wallet_ids=frozenset(wallet_ids), loop=asyncio.get_running_loop())
+        with self._lock:
+            for wallet_id in subscription.wallet_ids:
+                self._subscriptions.setdefault(wallet_id, set()).add(subscription)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='wallet-change-listener', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: WalletChangeSubscription):
+        with self._lock:
+            for wallet_id in subscription.wallet_ids:
+                subscribers = self._subscriptions.get(wallet_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[wallet_id]
+
+    def stop(self):
+        """Останавливает поток слушателя и закрывает его соединения."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self._listen()
+                except DatabaseError:
+                    logger.exception('Соединение слушателя канала %s потеряно, переподключение через %s с',
+                                     self.channel, self.reconnect_delay)
+                    self._stopped.wait(self.reconnect_delay)
+        finally:
+            connections.close_all()
+
+    def _listen(self):
+        listen_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+        try:
+            with listen_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {listen_connection.ops.quote_name(self.channel)}')
+            raw_connection = listen_connection.connection
+            logger.info('Слушатель канала %s подключен', self.channel)
+
+            with self._lock:
+                subscribed = set(self._subscriptions)
+            self._publish(subscribed)
+
+            while not self._stopped.is_set():
+                if not select.select([raw_connection], [], [], self.poll_timeout)[0]:
+                    continue
+                raw_connection.poll()
+                wallet_ids = {uuid.UUID(notify.payload) for notify in raw_connection.notifies}
+                raw_connection.notifies.clear()
+                self._publish(wallet_ids)
+        finally:
+            listen_connection.close()
+
+    def _publish(self, wallet_ids: set[uuid.UUID]):
+        """Получает балансы кошельков с подписчиками и передает их подписчикам."""
+        with self._lock:
+            targets = {
+                wallet_id: list(self._subscriptions[wallet_id])
+                for wallet_id in wallet_ids if wallet_id in self._subscriptions
+            }
+        if not targets:
+            return
+
+        started = time.monotonic()
+        changes = get_wallet_changes(set(targets))
+        for change in changes:
+            for subscription in targets[change.wallet_id]:
+                subscription.deliver(change)
+        logger.debug('Изменения %s кошельков разосланы за %.1f мс', len(changes), (time.monotonic() - started) * 1000)
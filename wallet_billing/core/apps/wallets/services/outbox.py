@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import sys
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TextIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from core.apps.wallets.dto.outbox import OutboxEventDTO
+from core.apps.wallets.dto.transaction import TransactionDTO
+from core.apps.wallets.exception.outbox import OutboxPublishException
+from core.apps.wallets.models.outbox import OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_CREATED = 'wallet_transaction.created'
+TRANSACTION_UPDATED = 'wallet_transaction.updated'
+
+
+class BaseOutboxSink(ABC):
+    """Абстрактный получатель событий outbox."""
+
+    @abstractmethod
+    def publish(self, events: list[OutboxEventDTO]):
+        """
+        Публикует пачку событий в порядке их создания.
+
+        Raises:
+            OutboxPublishException: Если пачку не удалось опубликовать
+        """
+        ...
+
+    @staticmethod
+    def serialize(event: OutboxEventDTO) -> dict:
+        return {
+            'id': event.id,
+            'event_type': event.event_type,
+            'wallet_id': event.wallet_id,
+            'created_at': event.created_at,
+            'payload': event.payload,
+        }
+
+    @staticmethod
+    def dumps(value) -> str:
+        return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+@dataclass
+class StreamOutboxSink(BaseOutboxSink):
+    """Пишет события в поток по одному JSON на строку."""
+    stream: TextIO = field(default_factory=lambda: sys.stdout)
+
+    def publish(self, events: list[OutboxEventDTO]):
+        self.stream.write(''.join(f'{self.dumps(self.serialize(event))}\n' for event in events))
+        self.stream.flush()
+
+
+@dataclass
+class FileOutboxSink(BaseOutboxSink):
+    """
+    Дописывает события в файл по одному JSON на строку.
+
+    Файл сбрасывается на диск до удаления событий из outbox, поэтому при сбое
+    событие может быть записано повторно, но не потеряно.
+    """
+    path: str
+
+    def publish(self, events: list[OutboxEventDTO]):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(''.join(f'{self.dumps(self.serialize(event))}\n' for event in events))
+                file.flush()
+                os.fsync(file.fileno())
+        except OSError as exc:
+            raise OutboxPublishException(sink=self.path, reason=str(exc))
+
+
+@dataclass
+class HttpOutboxSink(BaseOutboxSink):
+    """Отправляет пачку событий одним POST-запросом с телом {"events": [...]}."""
+    url: str
+    timeout: float = 5.0
+
+    def publish(self, events: list[OutboxEventDTO]):
+        body = self.dumps({'events': [self.serialize(event) for event in events]}).encode('utf-8')
+        request = urllib.request.Request(
+            self.url,
+            data=body,
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except (urllib.error.URLError, OSError) as exc:
+            raise OutboxPublishException(sink=self.url, reason=str(exc))
+
+
+class OutboxService:
+    """
+    Сервис transactional outbox для событий транзакций кошелька.
+
+    События записываются в ту же транзакцию БД, что и транзакции кошелька, поэтому
+    опубликованы будут только зафиксированные изменения. Публикация выполняется
+    командой relay_outbox с доставкой не менее одного раза.
+    """
+
+    @staticmethod
+    def record_transactions(transactions: list[TransactionDTO], event_type: str = TRANSACTION_CREATED):
+        """
+        Записывает события транзакций одним INSERT. Вызывается в транзакции БД изменения.
+
+        Args:
+            transactions: DTO сохраненных транзакций
+            event_type: Тип события
+        """
+        OutboxEvent.objects.bulk_create([
+            OutboxEvent(
+                event_type=event_type,
+                wallet_id=transaction_dto.wallet_id,
+                payload={
+                    'transaction_id': transaction_dto.id,
+                    'operation_type': transaction_dto.operation_type,
+                    'status': transaction_dto.status,
+                    'amount': transaction_dto.amount,
+                    'balance_after': transaction_dto.balance_after,
+                    'related_transaction_id': transaction_dto.related_transaction_id,
+                    'created_at': transaction_dto.created_at,
+                }
+            )
+            for transaction_dto in transactions
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def relay(sink: BaseOutboxSink, batch_size: int) -> int:
+        """
+        Публикует пачку самых старых событий и удаляет их одним DELETE.
+
+        События блокируются через SELECT ... FOR UPDATE SKIP LOCKED: при ошибке публикации
+        транзакция откатывается и пачка будет опубликована повторно. Порядок событий
+        сохраняется внутри пачки, строгий общий порядок обеспечивает один запущенный relay.
+
+        Args:
+            sink: Получатель событий
+            batch_size: Максимальное количество событий в пачке
+
+        Returns:
+            int: Количество опубликованных событий
+
+        Raises:
+            OutboxPublishException: Если пачку не удалось опубликовать
+        """
+        events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+        if not events:
+            return 0
+
+        sink.publish([event.to_dto() for event in events])
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+
+        logger.info('Опубликовано %s событий, последнее: %s', len(events), events[-1].id)
+        return len(events)
@@ -0,0 +1,223 @@
+import logging
+import uuid
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Subquery, Value
+
+from core.apps.wallets.exception.wallets import WalletNotFoundException
+from core.apps.wallets.models.shards import WalletBalanceShard
+from core.apps.wallets.models.wallets import MAX_WALLET_BALANCE, TOTAL_BALANCE, Wallet
+
+
+logger = logging.getLogger(__name__)
+
+
+class WalletShardService:
+    """
+    Сервис шардированного баланса кошелька.
+
+    Баланс шардированного кошелька хранится в Wallet.balance и в shard_count
+    частях WalletBalanceShard. Пополнения зачисляются на случайную часть и блокируют
+    только ее строку, списания выполняются под блокировкой строки кошелька.
+
+    Строка кошелька блокируется через FOR NO KEY UPDATE: такая блокировка не конфликтует
+    с FOR KEY SHARE, которую берет вставка транзакции пополнения по внешнему ключу,
+    поэтому пополнение, удерживающее часть баланса, не ждет списание и взаимная
+    блокировка при консолидации невозможна.
+    """
+
+    @staticmethod
+    def deposit(wallet_id: uuid.UUID, amount: Decimal) -> bool:
+        """
+        Зачисляет сумму на случайную часть баланса кошелька, если она помещается в лимит части.
+
+        Лимит части - равная доля остатка до максимального баланса:
+        (MAX_WALLET_BALANCE - Wallet.balance) / shard_count. Часть сначала блокируется, и лимит
+        проверяется следующим запросом, который видит Wallet.balance, зафиксированный к этому моменту.
+        Wallet.balance шардированного кошелька растет только после консолидации, которая блокирует
+        и обнуляет все части, а между консолидациями только уменьшается. Поэтому сумма частей
+        не превышает остатка и параллельные пополнения разных частей не поднимают полный баланс
+        выше MAX_WALLET_BALANCE.
+
+        Попытка выполняется в точке сохранения: если сумма не помещается в лимит, откат к ней снимает
+        блокировку части, и пополнение под блокировкой кошелька не ждет консолидацию, которая ждет эту часть.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            amount: Сумма пополнения
+
+        Returns:
+            bool: False, если у кошелька нет частей баланса или сумма не помещается в лимит части
+        """
+        with transaction.atomic():
+            shard_id = (
+                WalletBalanceShard.objects
+                .select_for_update()
+                .filter(wallet_id=wallet_id)
+                .order_by('?')
+                .values_list('id', flat=True)
+                .first()
+            )
+            if shard_id is None:
+                return False
+            shard_limit = Subquery(
+                Wallet.objects
+                .filter(id=wallet_id)
+                .values(limit=ExpressionWrapper(
+                    (Value(MAX_WALLET_BALANCE) - F('balance')) / F('shard_count'),
+                    output_field=DecimalField()
+                ))[:1]
+            )
+            updated = (
+                WalletBalanceShard.objects
+                .filter(id=shard_id, balance__lte=shard_limit - amount)
+                .update(balance=F('balance') + amount)
+            )
+            if not updated:
+                transaction.set_rollback(True)
+        return updated > 0
+
+    @staticmethod
+    def withdraw(wallet_id: uuid.UUID, amount: Decimal) -> bool:
+        """
+        Списывает сумму с одной части баланса, на которой ее достаточно.
+
+        Условие на баланс повторяется во внешнем UPDATE, так как PostgreSQL
+        перепроверяет его после ожидания блокировки строки.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            amount: Сумма списания
+
+        Returns:
+            bool: False, если ни на одной части не хватает средств
+        """
+        shard_id = (
+            WalletBalanceShard.objects
+            .filter(wallet_id=wallet_id, balance__gte=amount)
+            .order_by('-balance')
+            .values('id')[:1]
+        )
+        updated = (
+            WalletBalanceShard.objects
+            .filter(id=Subquery(shard_id), balance__gte=amount)
+            .update(balance=F('balance') - amount)
+        )
+        return updated > 0
+
+    @staticmethod
+    def consolidate(wallet_model: Wallet) -> Decimal:
+        """
+        Переносит балансы всех частей в Wallet.balance.
+
+        Вызывается под блокировкой строки кошелька. Части блокируются в порядке номера
+        и остаются заблокированными до конца транзакции, поэтому после консолидации
+        Wallet.balance равен полному балансу кошелька.
+
+        Args:
+            wallet_model: Заблокированная модель кошелька
+
+        Returns:
+            Decimal: Сумма, перенесенная из частей баланса
+        """
+        shards = list(
+            WalletBalanceShard.objects
+            .select_for_update()
+            .filter(wallet_id=wallet_model.id)
+            .order_by('index')
+        )
+        moved = sum((shard.balance for shard in shards), Decimal('0.00'))
+        if moved:
+            WalletBalanceShard.objects.filter(wallet_id=wallet_model.id).update(balance=Decimal('0.00'))
+            wallet_model.balance += moved
+            wallet_model.version += 1
+            wallet_model.save(update_fields=['balance', 'version', 'updated_at'])
+        return moved
+
+    @staticmethod
+    def get_total_balance(wallet_id: uuid.UUID) -> Decimal:
+        """
+        Получает полный баланс кошелька одним запросом без блокировки.
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        total_balance = (
+            Wallet.objects
+            .with_total_balance()
+            .filter(id=wallet_id)
+            .values_list(TOTAL_BALANCE, flat=True)
+            .first()
+        )
+        if total_balance is None:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        return total_balance
+
+    @transaction.atomic
+    def enable_sharding(self, wallet_id: uuid.UUID, shard_count: int) -> Wallet:
+        """
+        Включает шардированный баланс кошелька или меняет количество его частей.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            shard_count: Количество частей баланса
+
+        Returns:
+            Wallet: Обновленная модель кошелька
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        wallet_model = self._get_wallet_for_update(wallet_id)
+        self._remove_shards(wallet_model)
+        WalletBalanceShard.objects.bulk_create(
+            WalletBalanceShard(wallet=wallet_model, index=index) for index in range(shard_count)
+        )
+        wallet_model.shard_count = shard_count
+        wallet_model.save(update_fields=['shard_count'])
+        logger.info('Для кошелька с id %s включен шардированный баланс из %s частей', wallet_id, shard_count)
+        return wallet_model
+
+    @transaction.atomic
+    def disable_sharding(self, wallet_id: uuid.UUID) -> Wallet:
+        """
+        Выключает шардированный баланс кошелька, перенося его в Wallet.balance.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+
+        Returns:
+            Wallet: Обновленная модель кошелька
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        wallet_model = self._get_wallet_for_update(wallet_id)
+        self._remove_shards(wallet_model)
+        wallet_model.shard_count = 0
+        wallet_model.save(update_fields=['shard_count'])
+        # Пополнения частей баланса не попадали в снимок последних транзакций
+        Wallet.objects.filter(id=wallet_id).rebuild_last_transactions()
+        logger.info('Для кошелька с id %s выключен шардированный баланс', wallet_id)
+        return wallet_model
+
+    def _remove_shards(self, wallet_model: Wallet):
+        """Консолидирует и удаляет части баланса заблокированного кошелька."""
+        self.consolidate(wallet_model)
+        WalletBalanceShard.objects.filter(wallet_id=wallet_model.id).delete()
+
+    @staticmethod
+    def _get_wallet_for_update(wallet_id: uuid.UUID) -> Wallet:
+        """
+        Получает кошелек с блокировкой FOR NO KEY UPDATE.
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        try:
+            return Wallet.objects.select_for_update(no_key=True).get(id=wallet_id)
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
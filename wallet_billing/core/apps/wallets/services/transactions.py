@@ -1,13 +1,37 @@
+import base64
+import binascii
+import datetime
+import json
 import logging
+import uuid
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.db.transaction import atomic
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 
-from core.apps.wallets.dto.transaction import TransactionDTO
-from core.apps.wallets.exception.transaction import TransactionCreationException
-from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.transaction import TransactionDTO, TransactionFiltersDTO, TransactionPageDTO
+from core.apps.wallets.exception.transaction import (
+    IdempotencyKeyConflictException,
+    InvalidCursorException,
+    TransactionBatchCreationException,
+    TransactionCreationException,
+    TransactionNotFoundException,
+)
+from core.apps.wallets.exception.wallets import WalletNotFoundException
+from core.apps.wallets.models.transaction import WalletTransaction, IDEMPOTENCY_KEY_CONSTRAINT
+from core.apps.wallets.models.wallets import LAST_TRANSACTIONS_LIMIT, Wallet
+from core.apps.wallets.services.outbox import OutboxService
+from core.apps.wallets.validators import (
+    validate_transaction,
+    validate_transaction_balances,
+    validate_transaction_data,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -17,20 +41,52 @@ class BaseTransactionService(ABC):
     """Абстрактный базовый сервис для работы с транзакциями."""
 
     @abstractmethod
-    def create_transaction(self, transaction: TransactionDTO) -> TransactionDTO:
+    def create_transaction(self, transaction: TransactionDTO, check_wallet: bool = True) -> TransactionDTO:
         """Создает новую транзакцию."""
         ...
 
+    @abstractmethod
+    def create_transactions(self, transactions: list[TransactionDTO]) -> list[TransactionDTO]:
+        """Создает несколько транзакций одним запросом."""
+        ...
+
+    @abstractmethod
+    def create_transaction_with_balance_update(
+        self,
+        transaction: TransactionDTO,
+        delta: Decimal,
+        condition: str,
+        condition_params: list
+    ) -> TransactionDTO | None:
+        """Изменяет баланс кошелька и создает транзакцию операции одним запросом."""
+        ...
+
+    @abstractmethod
+    def get_by_idempotency_key(self, wallet_id: uuid.UUID, idempotency_key: str) -> TransactionDTO | None:
+        """Получает транзакцию кошелька по ключу идемпотентности."""
+        ...
+
+    @abstractmethod
+    async def aget_by_idempotency_key(self, wallet_id: uuid.UUID, idempotency_key: str) -> TransactionDTO | None:
+        """Асинхронно получает транзакцию кошелька по ключу идемпотентности."""
+        ...
+
 
 class TransactionService(BaseTransactionService):
     """Сервис для создания и управления транзакциями кошелька."""
 
-    def create_transaction(self, transaction: TransactionDTO) -> TransactionDTO:
+    def create_transaction(self, transaction: TransactionDTO, check_wallet: bool = True) -> TransactionDTO:
         """
         Создает новую транзакцию в базе данных с валидацией.
+
+        Данные транзакции проверяются без запросов к БД. Существование кошелька
+        проверяется отдельным запросом только при check_wallet: сервисы кошелька
+        передают False, так как кошелек уже заблокирован или изменен в этой транзакции БД.
+        Событие outbox записывается в той же транзакции БД.
         
         Args:
             transaction: DTO объект транзакции для создания
+            check_wallet: Проверить существование кошелька запросом к БД
             
         Returns:
             TransactionDTO: DTO созданной транзакции
@@ -38,16 +94,433 @@ class TransactionService(BaseTransactionService):
         Raises:
             TransactionCreationException: Если произошла ошибка при создании транзакции
                 (нарушение целостности данных или ошибка валидации)
+            IdempotencyKeyConflictException: Если транзакция с таким ключом идемпотентности
+                уже создана для кошелька
         """
         transaction_model = WalletTransaction.from_dto(transaction)
         try:
-            transaction_model.full_clean()
-            transaction_model.save()
+            # Уникальность ключа идемпотентности проверяет индекс при вставке
+            validate_transaction(transaction)
+            if check_wallet and not Wallet.objects.filter(id=transaction.wallet_id).exists():
+                raise ValidationError({'wallet': f'Кошелек {transaction.wallet_id} не найден'})
+            with atomic(savepoint=False):
+                transaction_model.save()
+                OutboxService.record_transactions([transaction_model.to_dto()])
 
-            logger.info(f'Успешное создания транзакции для кошелька {transaction_model.wallet_id}')
-        except (IntegrityError, ValidationError):
-            logger.error(f'Ошибка создания транзакции для кошелька {transaction_model.wallet_id} не пройдена валидация')
+            logger.info('Успешное создания транзакции для кошелька %s', transaction_model.wallet_id)
+        except IntegrityError as exc:
+            if self._is_idempotency_key_violation(exc):
+                logger.info('Транзакция с ключом идемпотентности %s для кошелька %s уже существует',
+                            transaction_model.idempotency_key, transaction_model.wallet_id)
+                raise IdempotencyKeyConflictException(wallet_id=transaction_model.wallet_id,
+                                                      idempotency_key=transaction_model.idempotency_key)
+            logger.error('Ошибка создания транзакции для кошелька %s не пройдена валидация', transaction_model.wallet_id)
+            raise TransactionCreationException(wallet_id=transaction_model.wallet_id,
+                                               operation_type=transaction_model.operation_type,
+                                               amount=transaction_model.amount)
+        except ValidationError:
+            logger.error('Ошибка создания транзакции для кошелька %s не пройдена валидация', transaction_model.wallet_id)
             raise TransactionCreationException(wallet_id=transaction_model.wallet_id,
                                                operation_type=transaction_model.operation_type,
                                                amount=transaction_model.amount)
-        return transaction_model.to_dto()
\ No newline at end of file
+        return transaction_model.to_dto()
+
+    def create_transactions(self, transactions: list[TransactionDTO]) -> list[TransactionDTO]:
+        """
+        Создает несколько транзакций одним INSERT через bulk_create.
+
+        Данные транзакций проверяются без запросов к БД: вызывающий код отвечает
+        за то, что кошельки существуют и заблокированы, а связанные транзакции
+        создаются в том же пакете. События outbox записываются одним INSERT
+        в той же транзакции БД.
+
+        Args:
+            transactions: Список DTO транзакций для создания
+
+        Returns:
+            list[TransactionDTO]: DTO созданных транзакций в исходном порядке
+
+        Raises:
+            TransactionCreationException: Если одна из транзакций не прошла валидацию
+            TransactionBatchCreationException: Если при вставке пакета нарушена целостность данных
+        """
+        for transaction in transactions:
+            try:
+                validate_transaction(transaction)
+            except ValidationError:
+                logger.error('Ошибка создания транзакции для кошелька %s не пройдена валидация', transaction.wallet_id)
+                raise TransactionCreationException(wallet_id=transaction.wallet_id,
+                                                   operation_type=transaction.operation_type,
+                                                   amount=transaction.amount)
+
+        transaction_models = [WalletTransaction.from_dto(transaction) for transaction in transactions]
+        try:
+            with atomic(savepoint=False):
+                WalletTransaction.objects.bulk_create(transaction_models)
+                OutboxService.record_transactions([transaction_model.to_dto() for transaction_model in transaction_models])
+        except IntegrityError:
+            # bulk_create не сообщает, какая из транзакций нарушила ограничение, поэтому в ошибке - весь пакет
+            wallet_ids = list(dict.fromkeys(transaction.wallet_id for transaction in transactions))
+            logger.error('Ошибка создания %s транзакций для кошельков %s: нарушена целостность данных',
+                         len(transactions), wallet_ids)
+            raise TransactionBatchCreationException(wallet_ids=wallet_ids, count=len(transactions))
+
+        logger.info('Успешное создание %s транзакций', len(transaction_models))
+        return [transaction_model.to_dto() for transaction_model in transaction_models]
+
+    def create_transaction_with_balance_update(
+        self,
+        transaction: TransactionDTO,
+        delta: Decimal,
+        condition: str,
+        condition_params: list
+    ) -> TransactionDTO | None:
+        """
+        Изменяет баланс кошелька на delta, если выполняется условие, и создает транзакцию операции.
+
+        Изменение баланса, добавление транзакции в снимок последних транзакций кошелька
+        и вставка транзакции выполняются одним запросом (UPDATE в CTE и INSERT ... SELECT),
+        поэтому строка кошелька не изменяется повторно, пока на ней удерживается блокировка.
+        Балансы транзакции берутся из обновленной строки кошелька, id и время создания
+        задаются заранее, чтобы запись снимка совпадала с транзакцией. Событие outbox
+        записывается в той же транзакции БД.
+
+        Args:
+            transaction: DTO транзакции без балансов
+            delta: Изменение баланса (отрицательное для списания)
+            condition: SQL-условие на строку кошелька ({balance} - колонка баланса,
+                {reserved_balance} - колонка зарезервированной суммы, {version} - колонка версии)
+            condition_params: Параметры SQL-условия
+
+        Returns:
+            TransactionDTO | None: DTO созданной транзакции или None, если кошелек не обновлен
+
+        Raises:
+            TransactionCreationException: Если транзакция не прошла валидацию
+            IdempotencyKeyConflictException: Если транзакция с таким ключом идемпотентности
+                уже создана для кошелька
+        """
+        now = timezone.now()
+        transaction = replace(transaction, id=uuid.uuid4(), created_at=now, updated_at=now)
+        try:
+            # Балансы известны только после запроса, остальные данные проверяются до записи
+            validate_transaction_data(transaction)
+            with atomic(savepoint=False):
+                with connection.cursor() as cursor:
+                    cursor.execute(*self._build_balance_update_sql(transaction, delta, condition, condition_params))
+                    row = cursor.fetchone()
+                if row is None:
+                    return None
+                transaction.balance_before, transaction.balance_after = row
+                validate_transaction_balances(transaction)
+                OutboxService.record_transactions([transaction])
+
+            logger.info('Успешное создания транзакции для кошелька %s', transaction.wallet_id)
+        except IntegrityError as exc:
+            if self._is_idempotency_key_violation(exc):
+                logger.info('Транзакция с ключом идемпотентности %s для кошелька %s уже существует',
+                            transaction.idempotency_key, transaction.wallet_id)
+                raise IdempotencyKeyConflictException(wallet_id=transaction.wallet_id,
+                                                      idempotency_key=transaction.idempotency_key)
+            logger.error('Ошибка создания транзакции для кошелька %s не пройдена валидация', transaction.wallet_id)
+            raise TransactionCreationException(wallet_id=transaction.wallet_id,
+                                               operation_type=transaction.operation_type,
+                                               amount=transaction.amount)
+        except ValidationError:
+            logger.error('Ошибка создания транзакции для кошелька %s не пройдена валидация', transaction.wallet_id)
+            raise TransactionCreationException(wallet_id=transaction.wallet_id,
+                                               operation_type=transaction.operation_type,
+                                               amount=transaction.amount)
+        return transaction
+
+    def get_by_idempotency_key(self, wallet_id: uuid.UUID, idempotency_key: str) -> TransactionDTO | None:
+        """
+        Получает транзакцию кошелька по ключу идемпотентности.
+
+        Запрос обслуживается уникальным индексом (wallet_id, idempotency_key)
+        и не блокирует строку кошелька.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            idempotency_key: Ключ идемпотентности из запроса клиента
+
+        Returns:
+            TransactionDTO | None: DTO сохраненной транзакции или None
+        """
+        row = WalletTransaction.objects.filter(
+            wallet_id=wallet_id,
+            idempotency_key=idempotency_key
+        ).dto_rows().first()
+        return TransactionDTO.from_row(row) if row else None
+
+    async def aget_by_idempotency_key(self, wallet_id: uuid.UUID, idempotency_key: str) -> TransactionDTO | None:
+        """Асинхронный вариант get_by_idempotency_key через асинхронный ORM."""
+        row = await WalletTransaction.objects.filter(
+            wallet_id=wallet_id,
+            idempotency_key=idempotency_key
+        ).dto_rows().afirst()
+        return TransactionDTO.from_row(row) if row else None
+
+    @staticmethod
+    def prune_idempotency_keys(expired_before: datetime.datetime, batch_size: int) -> int:
+        """
+        Удаляет просроченные ключи идемпотентности пачками.
+
+        Каждая пачка очищается отдельным коротким UPDATE, чтобы не держать
+        блокировки на большом количестве строк.
+
+        Args:
+            expired_before: Ключи транзакций, созданных раньше этой даты, считаются просроченными
+            batch_size: Количество транзакций в одной пачке
+
+        Returns:
+            int: Количество очищенных ключей
+        """
+        expired = WalletTransaction.objects.filter(
+            idempotency_key__isnull=False,
+            created_at__lt=expired_before
+        ).order_by()
+        pruned = 0
+        while True:
+            transaction_ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not transaction_ids:
+                break
+            pruned += WalletTransaction.objects.filter(id__in=transaction_ids).update(idempotency_key=None)
+        logger.info('Очищено %s просроченных ключей идемпотентности', pruned)
+        return pruned
+
+    @staticmethod
+    def _build_balance_update_sql(
+        transaction: TransactionDTO,
+        delta: Decimal,
+        condition: str,
+        condition_params: list
+    ) -> tuple[str, list]:
+        """SQL и параметры запроса create_transaction_with_balance_update."""
+        qn = connection.ops.quote_name
+        wallet_opts, transaction_opts = Wallet._meta, WalletTransaction._meta
+        wallet_columns = {
+            name: qn(wallet_opts.get_field(name).column)
+            for name in ('balance', 'reserved_balance', 'version', 'updated_at', 'last_transactions')
+        }
+        balance, version, last_transactions = (
+            wallet_columns['balance'], wallet_columns['version'], wallet_columns['last_transactions']
+        )
+        # Кошельки без снимка (last_transactions IS NULL) остаются без снимка: операции с NULL дают NULL
+        entry = json.dumps(transaction.to_snapshot())
+        transaction_fields = {
+            'id': transaction.id,
+            'wallet': transaction.wallet_id,
+            'operation_type': OperationType(transaction.operation_type).value,
+            'amount': transaction.amount,
+            'status': TransactionStatus(transaction.status).value,
+            'related_transaction': transaction.related_transaction_id,
+            'idempotency_key': transaction.idempotency_key,
+            'error_message': transaction.error_message,
+            'expires_at': transaction.expires_at,
+            'created_at': transaction.created_at,
+            'updated_at': transaction.updated_at,
+        }
+        transaction_columns = ', '.join(qn(transaction_opts.get_field(name).column)
+                                        for name in [*transaction_fields, 'balance_before', 'balance_after'])
+        sql = (
+            f'WITH wallet AS ('
+            f'UPDATE {qn(wallet_opts.db_table)} SET '
+            f'{balance} = {balance} + %s, {version} = {version} + 1, {wallet_columns["updated_at"]} = %s, '
+            f'{last_transactions} = jsonb_path_query_array('
+            f'jsonb_build_array(%s::jsonb || jsonb_build_object('
+            f"'balance_before', {balance}::text, 'balance_after', ({balance} + %s)::text"
+            f')) || {last_transactions}, %s::jsonpath) '
+            f'WHERE {qn(wallet_opts.pk.column)} = %s AND '
+            f'{condition.format(balance=balance, reserved_balance=wallet_columns["reserved_balance"], version=version)} '
+            f'RETURNING {balance}) '
+            f'INSERT INTO {qn(transaction_opts.db_table)} ({transaction_columns}) '
+            f'SELECT {", ".join(["%s"] * len(transaction_fields))}, wallet.{balance} - %s, wallet.{balance} FROM wallet '
+            f'RETURNING {qn(transaction_opts.get_field("balance_before").column)}, '
+            f'{qn(transaction_opts.get_field("balance_after").column)}'
+        )
+        params = [
+            delta, transaction.updated_at, entry, delta, f'$[0 to {LAST_TRANSACTIONS_LIMIT - 1}]',
+            transaction.wallet_id, *condition_params, *transaction_fields.values(), delta,
+        ]
+        return sql, params
+
+    @staticmethod
+    def _is_idempotency_key_violation(exc: IntegrityError) -> bool:
+        diag = getattr(exc.__cause__, 'diag', None)
+        return getattr(diag, 'constraint_name', None) == IDEMPOTENCY_KEY_CONSTRAINT
+
+
+class BaseTransactionQueryService(ABC):
+    """Абстрактный базовый сервис для получения истории транзакций."""
+
+    @abstractmethod
+    def get_wallet_transactions(
+        self,
+        wallet_id: uuid.UUID,
+        filters: TransactionFiltersDTO,
+        cursor: str | None,
+        limit: int
+    ) -> TransactionPageDTO:
+        """Получает страницу истории транзакций кошелька."""
+        ...
+
+    @abstractmethod
+    async def aget_wallet_transactions(
+        self,
+        wallet_id: uuid.UUID,
+        filters: TransactionFiltersDTO,
+        cursor: str | None,
+        limit: int
+    ) -> TransactionPageDTO:
+        """Асинхронно получает страницу истории транзакций кошелька."""
+        ...
+
+    @abstractmethod
+    def get_wallet_transaction(self, wallet_id: uuid.UUID, transaction_id: uuid.UUID) -> TransactionDTO:
+        """Получает транзакцию кошелька по ее идентификатору."""
+        ...
+
+    @abstractmethod
+    async def aget_wallet_transaction(self, wallet_id: uuid.UUID, transaction_id: uuid.UUID) -> TransactionDTO:
+        """Асинхронно получает транзакцию кошелька по ее идентификатору."""
+        ...
+
+
+class TransactionQueryService(BaseTransactionQueryService):
+    """
+    Сервис истории транзакций с курсорной (keyset) пагинацией.
+
+    Транзакции упорядочены по (created_at DESC, id), что совпадает с индексом
+    wallet_tx_wallet_created_idx, поэтому каждая страница читается по индексу
+    без OFFSET независимо от глубины.
+    """
+
+    def get_wallet_transactions(
+        self,
+        wallet_id: uuid.UUID,
+        filters: TransactionFiltersDTO,
+        cursor: str | None,
+        limit: int
+    ) -> TransactionPageDTO:
+        """
+        Получает страницу истории транзакций кошелька.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            filters: Фильтры по типу операции и статусу
+            cursor: Курсор из предыдущей страницы или None для первой страницы
+            limit: Максимальное количество транзакций на странице
+
+        Returns:
+            TransactionPageDTO: Транзакции страницы и курсор следующей страницы
+
+        Raises:
+            InvalidCursorException: Если курсор некорректен
+            WalletNotFoundException: Если кошелек не найден
+        """
+        rows = list(self._get_page_queryset(wallet_id, filters, cursor, limit))
+        if not rows and cursor is None and not Wallet.objects.filter(id=wallet_id).exists():
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        return self._build_page(rows, limit)
+
+    async def aget_wallet_transactions(
+        self,
+        wallet_id: uuid.UUID,
+        filters: TransactionFiltersDTO,
+        cursor: str | None,
+        limit: int
+    ) -> TransactionPageDTO:
+        """Асинхронный вариант get_wallet_transactions через асинхронный ORM."""
+        rows = [row async for row in self._get_page_queryset(wallet_id, filters, cursor, limit)]
+        if not rows and cursor is None and not await Wallet.objects.filter(id=wallet_id).aexists():
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        return self._build_page(rows, limit)
+
+    def get_wallet_transaction(self, wallet_id: uuid.UUID, transaction_id: uuid.UUID) -> TransactionDTO:
+        """
+        Получает транзакцию кошелька по ее идентификатору, например для опроса статуса
+        операции, принятой в асинхронном режиме.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            transaction_id: Уникальный идентификатор транзакции
+
+        Returns:
+            TransactionDTO: DTO транзакции
+
+        Raises:
+            TransactionNotFoundException: Если у кошелька нет такой транзакции
+        """
+        row = WalletTransaction.objects.filter(wallet_id=wallet_id, id=transaction_id).dto_rows().first()
+        return self._check_transaction_found(wallet_id, transaction_id, row)
+
+    async def aget_wallet_transaction(self, wallet_id: uuid.UUID, transaction_id: uuid.UUID) -> TransactionDTO:
+        """Асинхронный вариант get_wallet_transaction через асинхронный ORM."""
+        row = await WalletTransaction.objects.filter(wallet_id=wallet_id, id=transaction_id).dto_rows().afirst()
+        return self._check_transaction_found(wallet_id, transaction_id, row)
+
+    @staticmethod
+    def _check_transaction_found(
+        wallet_id: uuid.UUID,
+        transaction_id: uuid.UUID,
+        row: tuple | None
+    ) -> TransactionDTO:
+        if row is None:
+            logger.error('Транзакция %s кошелька %s не найдена', transaction_id, wallet_id)
+            raise TransactionNotFoundException(wallet_id=wallet_id, transaction_id=transaction_id)
+        return TransactionDTO.from_row(row)
+
+    def _get_page_queryset(
+        self,
+        wallet_id: uuid.UUID,
+        filters: TransactionFiltersDTO,
+        cursor: str | None,
+        limit: int
+    ) -> QuerySet:
+        """
+        Строит запрос страницы, запрашивая на одну транзакцию больше для определения следующей страницы.
+
+        Возвращает строки для TransactionDTO.from_row: модели транзакций не создаются.
+        """
+        queryset = WalletTransaction.objects.filter(wallet_id=wallet_id)
+        if filters.operation_type is not None:
+            queryset = queryset.filter(operation_type=filters.operation_type)
+        if filters.status is not None:
+            queryset = queryset.filter(status=filters.status)
+        if cursor is not None:
+            created_at, transaction_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__gt=transaction_id)
+            )
+        return queryset.order_by('-created_at', 'id').dto_rows()[:limit + 1]
+
+    def _build_page(self, rows: list[tuple], limit: int) -> TransactionPageDTO:
+        items = [TransactionDTO.from_row(row) for row in rows[:limit]]
+        return TransactionPageDTO(
+            items=items,
+            next_cursor=self.encode_cursor(items[-1]) if len(rows) > limit else None
+        )
+
+    @staticmethod
+    def encode_cursor(transaction: TransactionDTO) -> str:
+        """Кодирует позицию транзакции (created_at, id) в непрозрачный курсор."""
+        payload = json.dumps([transaction.created_at.isoformat(), str(transaction.id)])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+        """
+        Декодирует курсор в позицию (created_at, id).
+
+        Raises:
+            InvalidCursorException: Если курсор некорректен
+        """
+        try:
+            created_at, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.datetime.fromisoformat(created_at), uuid.UUID(transaction_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            logger.error('Некорректный курсор пагинации %s', cursor)
+            raise InvalidCursorException(cursor=cursor)
@@ -1,25 +1,94 @@
+import datetime
 import logging
+import random
+import time
 import uuid
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import defaultdict
+from collections.abc import Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from decimal import Decimal
 
-from django.db import transaction
+from functools import partial, wraps
 
-from core.apps.common.enums import TransactionStatus
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.fields import ArrayField
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, DateTimeField, F, OuterRef, Q, QuerySet, Value, When
+from django.utils import timezone
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.common.exception.base import ServiceException
 from core.apps.wallets.dto.transaction import TransactionDTO
-from core.apps.wallets.dto.wallets import WalletOperationDTO, WalletDTO
-from core.apps.wallets.exception.wallets import WalletNotFoundException, InsufficientFundsException
-from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.dto.wallets import (
+    WalletDTO,
+    WalletHoldDTO,
+    WalletHoldSettlementDTO,
+    WalletOperationDTO,
+    WalletOperationResultDTO,
+    WalletTransferDTO,
+    WalletTransferResultDTO,
+    WalletValidatorsDTO,
+)
+from core.apps.wallets.exception.holds import (
+    HoldAmountExceededException,
+    HoldExpiredException,
+    HoldNotActiveException,
+    HoldNotFoundException,
+)
+from core.apps.wallets.exception.transaction import TransactionCreationException
+from core.apps.wallets.exception.wallets import (
+    BalanceLimitExceededException,
+    InsufficientFundsException,
+    SameWalletTransferException,
+    WalletConcurrentUpdateException,
+    WalletLockTimeoutException,
+    WalletNotFoundException,
+)
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import (
+    LAST_TRANSACTIONS_LIMIT,
+    LAST_TRANSACTIONS_SNAPSHOT,
+    MAX_WALLET_BALANCE,
+    Wallet,
+)
+from core.apps.wallets.services.cache import WalletCacheService
+from core.apps.wallets.services.locks import WalletLockProfiler
+from core.apps.wallets.services.notifications import notify_wallets_changed
+from core.apps.wallets.services.outbox import TRANSACTION_UPDATED, OutboxService
+from core.apps.wallets.services.shards import WalletShardService
 from core.apps.wallets.services.transactions import BaseTransactionService
 
 
 logger = logging.getLogger(__name__)
 
+# SQLSTATE lock_not_available: истек lock_timeout или не получена блокировка NOWAIT
+LOCK_NOT_AVAILABLE = '55P03'
+# Попытки условного UPDATE пополнения в AtomicUpdateWalletCommandService
+DEPOSIT_UPDATE_ATTEMPTS = 2
+
+
+def with_lock_timeout(method):
+    """Выполняет метод сервиса под _lock_timeout. Применяется внутри transaction.atomic."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock_timeout():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 @dataclass
 class BaseWalletCommandService(ABC):
     """Абстрактный базовый сервис для выполнения операций с кошельком."""
     transaction_service: BaseTransactionService
+    wallet_cache: WalletCacheService = None
+    lock_timeout_ms: int = None
+    lock_retry_after: int = 1
+    notify_changes: bool = False
+    lock_profiler: WalletLockProfiler = None
 
     @abstractmethod
     def deposit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
@@ -31,6 +100,205 @@ class BaseWalletCommandService(ABC):
         """Выполняет снятие средств с кошелька."""
         ...
 
+    @abstractmethod
+    def apply_batch(self, operations: list[WalletOperationDTO]) -> list[WalletOperationResultDTO]:
+        """Выполняет пакет операций пополнения и снятия в одной транзакции."""
+        ...
+
+    @abstractmethod
+    def transfer(self, transfer_data: WalletTransferDTO) -> WalletTransferResultDTO:
+        """Выполняет перевод средств между кошельками."""
+        ...
+
+    @abstractmethod
+    def process_pending_operations(self, batch_size: int) -> int:
+        """Выполняет пакет операций, принятых в асинхронном режиме."""
+        ...
+
+    @abstractmethod
+    def hold(self, hold_data: WalletHoldDTO) -> TransactionDTO:
+        """Резервирует средства кошелька."""
+        ...
+
+    @abstractmethod
+    def capture(self, settlement_data: WalletHoldSettlementDTO) -> TransactionDTO:
+        """Списывает зарезервированные средства."""
+        ...
+
+    @abstractmethod
+    def release(self, settlement_data: WalletHoldSettlementDTO) -> TransactionDTO:
+        """Снимает резерв без списания средств."""
+        ...
+
+    @abstractmethod
+    def release_expired_holds(self, chunk_size: int) -> int:
+        """Снимает пачку резервов с истекшим сроком действия."""
+        ...
+
+    def submit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Принимает операцию к асинхронному выполнению без блокировки кошелька.
+
+        Операция сохраняется транзакцией в статусе IN_PROCESSING без балансов
+        и выполняется позже process_pending_operations.
+
+        Args:
+            operation_data: Данные операции пополнения или снятия
+
+        Returns:
+            TransactionDTO: DTO транзакции в статусе IN_PROCESSING
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            IdempotencyKeyConflictException: Если операция с таким ключом идемпотентности уже принята
+        """
+        if not Wallet.objects.filter(id=operation_data.wallet_id).exists():
+            logger.error('Кошелек с id %s не найден', operation_data.wallet_id)
+            raise WalletNotFoundException(wallet_id=operation_data.wallet_id)
+
+        transaction_dto = self.transaction_service.create_transaction(
+            transaction=TransactionDTO(
+                wallet_id=operation_data.wallet_id,
+                operation_type=operation_data.operation_type,
+                amount=operation_data.amount,
+                balance_after=None,
+                balance_before=None,
+                status=TransactionStatus.IN_PROCESSING,
+                idempotency_key=operation_data.idempotency_key
+            ),
+            check_wallet=False
+        )
+        self._on_wallets_changed([operation_data.wallet_id])
+
+        logger.info('Операция %s на сумму %s для кошелька %s принята к асинхронному выполнению',
+                    operation_data.operation_type, operation_data.amount, operation_data.wallet_id)
+        return transaction_dto
+
+    @transaction.atomic
+    def rebuild_last_transactions(self, chunk_size: int, after: uuid.UUID = None,
+                                  missing_only: bool = False) -> list[uuid.UUID]:
+        """
+        Пересобирает снимки последних транзакций следующей пачки кошельков в порядке id.
+
+        Args:
+            chunk_size: Максимальное количество кошельков в пачке
+            after: id последнего кошелька предыдущей пачки
+            missing_only: Только кошельки, для которых снимок не построен
+
+        Returns:
+            list[uuid.UUID]: Идентификаторы обработанных кошельков, пустой список - кошельки закончились
+        """
+        queryset = Wallet.objects.order_by('id')
+        if missing_only:
+            queryset = queryset.filter(last_transactions__isnull=True)
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        wallet_ids = list(queryset.values_list('id', flat=True)[:chunk_size])
+
+        rebuilt = Wallet.objects.filter(id__in=wallet_ids).rebuild_last_transactions()
+        if rebuilt:
+            self._on_wallets_changed(rebuilt)
+        return rebuilt
+
+    # Асинхронный ORM Django не поддерживает транзакции, поэтому операции изменения
+    # выполняются синхронными методами в потоке через sync_to_async.
+
+    async def adeposit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """Асинхронно выполняет пополнение кошелька."""
+        return await sync_to_async(self.deposit)(operation_data)
+
+    async def awithdrawal(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """Асинхронно выполняет снятие средств с кошелька."""
+        return await sync_to_async(self.withdrawal)(operation_data)
+
+    async def aapply_batch(self, operations: list[WalletOperationDTO]) -> list[WalletOperationResultDTO]:
+        """Асинхронно выполняет пакет операций в одной транзакции."""
+        return await sync_to_async(self.apply_batch)(operations)
+
+    async def atransfer(self, transfer_data: WalletTransferDTO) -> WalletTransferResultDTO:
+        """Асинхронно выполняет перевод средств между кошельками."""
+        return await sync_to_async(self.transfer)(transfer_data)
+
+    async def asubmit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """Асинхронно принимает операцию к асинхронному выполнению."""
+        return await sync_to_async(self.submit)(operation_data)
+
+    async def ahold(self, hold_data: WalletHoldDTO) -> TransactionDTO:
+        """Асинхронно резервирует средства кошелька."""
+        return await sync_to_async(self.hold)(hold_data)
+
+    async def acapture(self, settlement_data: WalletHoldSettlementDTO) -> TransactionDTO:
+        """Асинхронно списывает зарезервированные средства."""
+        return await sync_to_async(self.capture)(settlement_data)
+
+    async def arelease(self, settlement_data: WalletHoldSettlementDTO) -> TransactionDTO:
+        """Асинхронно снимает резерв без списания средств."""
+        return await sync_to_async(self.release)(settlement_data)
+
+    def _on_wallets_changed(self, wallet_ids: list[uuid.UUID]):
+        """
+        Планирует действия после фиксации изменений кошельков.
+
+        Кэш сбрасывается в transaction.on_commit, чтобы параллельное чтение
+        не успело положить в кэш данные незафиксированной транзакции. При notify_changes
+        отправляется NOTIFY, который Postgres доставит слушателям только при фиксации.
+        """
+        if self.wallet_cache is not None:
+            transaction.on_commit(partial(self.wallet_cache.invalidate, wallet_ids))
+        if self.notify_changes:
+            notify_wallets_changed(wallet_ids)
+
+    @contextmanager
+    def _lock_timeout(self):
+        """
+        Ограничивает ожидание блокировок до конца текущей транзакции БД значением lock_timeout_ms.
+
+        Вместо ожидания занятого кошелька, пока его не освободят, операция быстро
+        завершается WalletLockTimeoutException, и воркер освобождается для других запросов.
+        Без lock_timeout_ms ожидание не ограничено.
+
+        Raises:
+            WalletLockTimeoutException: Если блокировка не получена за lock_timeout_ms
+        """
+        if not self.lock_timeout_ms:
+            yield
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", [f'{self.lock_timeout_ms}ms'])
+        started = time.monotonic()
+        try:
+            yield
+        except OperationalError as exc:
+            if getattr(exc.__cause__, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+                raise
+            waited_ms = (time.monotonic() - started) * 1000
+            logger.warning('Блокировка кошелька не получена за %.1f мс, lock_timeout: %s мс',
+                           waited_ms, self.lock_timeout_ms)
+            raise WalletLockTimeoutException(waited_ms=waited_ms, retry_after=self.lock_retry_after)
+
+    @contextmanager
+    def _profile_lock(self, wallet_ids: Iterable[uuid.UUID]):
+        """
+        Записывает в lock_profiler ожидание блокировки кошельков внутри блока и время ее удержания.
+
+        Ожидание - время выполнения блокирующего запроса, в том числе завершившегося по lock_timeout.
+        Удержание считается до фиксации транзакции, при откате не учитывается.
+        """
+        if self.lock_profiler is None:
+            yield
+            return
+
+        started = time.monotonic()
+        try:
+            yield
+        except OperationalError:
+            self.lock_profiler.record_wait(wallet_ids, time.monotonic() - started)
+            raise
+        acquired_at = time.monotonic()
+        self.lock_profiler.record_wait(wallet_ids, acquired_at - started)
+        transaction.on_commit(partial(self.lock_profiler.record_hold, wallet_ids, acquired_at))
+
 
 class BaseWalletQueryService(ABC):
     """Абстрактный базовый сервис для получения данных кошелька."""
@@ -40,13 +308,43 @@ class BaseWalletQueryService(ABC):
         """Получает кошелек по его идентификатору."""
         ...
 
+    @abstractmethod
+    async def aget_wallet_by_id(self, wallet_id: uuid.UUID) -> WalletDTO:
+        """Асинхронно получает кошелек по его идентификатору."""
+        ...
+
+    @abstractmethod
+    def get_wallet_validators(self, wallet_id: uuid.UUID) -> WalletValidatorsDTO:
+        """Получает валидаторы условного запроса кошелька без загрузки его данных."""
+        ...
+
+    @abstractmethod
+    async def aget_wallet_validators(self, wallet_id: uuid.UUID) -> WalletValidatorsDTO:
+        """Асинхронно получает валидаторы условного запроса кошелька."""
+        ...
+
+    @abstractmethod
+    def get_wallets(self, wallet_ids: list[uuid.UUID], user_ids: list[int]) -> list[WalletDTO]:
+        """Получает кошельки по идентификаторам кошельков или пользователей."""
+        ...
+
+    @abstractmethod
+    async def aget_wallets(self, wallet_ids: list[uuid.UUID], user_ids: list[int]) -> list[WalletDTO]:
+        """Асинхронно получает кошельки по идентификаторам кошельков или пользователей."""
+        ...
+
 
 class WalletQueryService(BaseWalletQueryService):
     """Сервис для получения данных кошелька из базы данных."""
 
     def get_wallet_by_id(self, wallet_id: uuid.UUID) -> WalletDTO:
         """
-        Получает кошелек по его идентификатору с предзагрузкой транзакций.
+        Получает кошелек по его идентификатору вместе с последними транзакциями.
+
+        Последние транзакции берутся из снимка в строке кошелька, поэтому выполняется
+        одно чтение строки по первичному ключу. Для кошелька без актуального снимка
+        не более LAST_TRANSACTIONS_LIMIT последних транзакций читаются вторым запросом.
+        DTO строятся из строк values_list, модели кошелька и транзакций не создаются.
         
         Args:
             wallet_id: Уникальный идентификатор кошелька
@@ -58,16 +356,255 @@ class WalletQueryService(BaseWalletQueryService):
             WalletNotFoundException: Если кошелек с указанным ID не найден
         """
         try:
-            wallet_model = Wallet.objects.prefetch_related('transactions').get(id=wallet_id)
-            return wallet_model.to_dto()
+            row = Wallet.objects.filter(id=wallet_id).dto_rows().get()
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        if self._has_snapshot(row):
+            return self._to_wallet_dto(row)
+        return self._to_wallet_dto(row, list(map(TransactionDTO.from_row, self._get_last_transaction_rows(wallet_id))))
+
+    async def aget_wallet_by_id(self, wallet_id: uuid.UUID) -> WalletDTO:
+        """
+        Асинхронно получает кошелек по его идентификатору через асинхронный ORM.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+
+        Returns:
+            WalletDTO: DTO объект кошелька
+
+        Raises:
+            WalletNotFoundException: Если кошелек с указанным ID не найден
+        """
+        try:
+            row = await Wallet.objects.filter(id=wallet_id).dto_rows().aget()
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        if self._has_snapshot(row):
+            return self._to_wallet_dto(row)
+        return self._to_wallet_dto(row, [
+            TransactionDTO.from_row(transaction_row) async for transaction_row in self._get_last_transaction_rows(wallet_id)
+        ])
+
+    def get_wallet_validators(self, wallet_id: uuid.UUID) -> WalletValidatorsDTO:
+        """
+        Получает версию и время последнего изменения кошелька одним запросом по индексам.
+
+        Транзакции и баланс частей кошелька не загружаются, поэтому запрос для неизменившегося
+        кошелька дешевле полного. Время изменения последних транзакций берется из снимка,
+        а для кошелька без актуального снимка - из таблицы транзакций. Результат совпадает
+        с WalletValidatorsDTO.from_wallet для данных, возвращаемых get_wallet_by_id.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+
+        Returns:
+            WalletValidatorsDTO: Валидаторы условного запроса
+
+        Raises:
+            WalletNotFoundException: Если кошелек с указанным ID не найден
+        """
+        try:
+            row = self._get_validators_queryset(wallet_id).get()
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        return self._to_validators_dto(wallet_id, *row)
+
+    async def aget_wallet_validators(self, wallet_id: uuid.UUID) -> WalletValidatorsDTO:
+        """Асинхронный вариант get_wallet_validators."""
+        try:
+            row = await self._get_validators_queryset(wallet_id).aget()
         except Wallet.DoesNotExist:
-            logger.error(f'Кошелек с id {wallet_id} не найден')
+            logger.error('Кошелек с id %s не найден', wallet_id)
             raise WalletNotFoundException(wallet_id=wallet_id)
+        return self._to_validators_dto(wallet_id, *row)
+
+    def get_wallets(self, wallet_ids: list[uuid.UUID], user_ids: list[int]) -> list[WalletDTO]:
+        """
+        Получает кошельки по идентификаторам кошельков или пользователей за постоянное число запросов.
+
+        Кошельки читаются одним запросом. Последние транзакции берутся из снимков, а для кошельков
+        без актуального снимка выбираются вторым запросом с оконной функцией, сразу для всех.
+        Несуществующие идентификаторы пропускаются.
+
+        Args:
+            wallet_ids: Идентификаторы кошельков
+            user_ids: Идентификаторы пользователей
+
+        Returns:
+            list[WalletDTO]: DTO найденных кошельков, упорядоченные по id
+        """
+        rows = list(self._get_wallets_queryset(wallet_ids, user_ids))
+        transaction_rows = self._get_missing_last_transactions(rows)
+        return self._to_wallet_dtos(rows, list(transaction_rows))
+
+    async def aget_wallets(self, wallet_ids: list[uuid.UUID], user_ids: list[int]) -> list[WalletDTO]:
+        """Асинхронный вариант get_wallets."""
+        rows = [row async for row in self._get_wallets_queryset(wallet_ids, user_ids)]
+        transaction_rows = self._get_missing_last_transactions(rows)
+        return self._to_wallet_dtos(rows, [transaction_row async for transaction_row in transaction_rows])
+
+    @staticmethod
+    def _get_wallets_queryset(wallet_ids: list[uuid.UUID], user_ids: list[int]) -> QuerySet:
+        return Wallet.objects.filter(Q(id__in=wallet_ids) | Q(user_id__in=user_ids)).order_by('id').dto_rows()
+
+    @staticmethod
+    def _get_last_transaction_rows(wallet_id: uuid.UUID) -> QuerySet:
+        return WalletTransaction.objects.filter(wallet_id=wallet_id).order_by('-created_at').dto_rows()[:LAST_TRANSACTIONS_LIMIT]
+
+    def _get_missing_last_transactions(self, rows: list[tuple]) -> QuerySet:
+        """Последние транзакции кошельков без актуального снимка, без запроса, если таких нет."""
+        wallet_ids = [row.id for row in rows if not self._has_snapshot(row)]
+        if not wallet_ids:
+            return WalletTransaction.objects.none()
+        return WalletTransaction.objects.last_per_wallet(wallet_ids, limit=LAST_TRANSACTIONS_LIMIT).dto_rows()
+
+    def _to_wallet_dtos(self, rows: list[tuple], transaction_rows: list[tuple]) -> list[WalletDTO]:
+        last_transactions = defaultdict(list)
+        for transaction_dto in map(TransactionDTO.from_row, transaction_rows):
+            last_transactions[transaction_dto.wallet_id].append(transaction_dto)
+        return [
+            self._to_wallet_dto(row, None if self._has_snapshot(row) else last_transactions[row.id])
+            for row in rows
+        ]
+
+    @staticmethod
+    def _has_snapshot(row: tuple) -> bool:
+        """Аналог Wallet.has_last_transactions_snapshot для строки WALLET_DTO_FIELDS."""
+        return row.last_transactions is not None and row.shard_count == 0
+
+    @staticmethod
+    def _to_wallet_dto(row: tuple, last_transaction: list[TransactionDTO] = None) -> WalletDTO:
+        """DTO кошелька из строки WALLET_DTO_FIELDS, без переданных транзакций - с транзакциями из снимка."""
+        if last_transaction is None:
+            last_transaction = [TransactionDTO.from_snapshot(row.id, entry) for entry in row.last_transactions]
+        return WalletDTO(
+            id=row.id,
+            balance=row.total_balance,
+            last_transaction=last_transaction,
+            user_id=row.user_id,
+            is_active=row.is_active,
+            reserved_balance=row.reserved_balance,
+            version=row.version,
+            updated_at=row.updated_at
+        )
+
+    @staticmethod
+    def _get_validators_queryset(wallet_id: uuid.UUID) -> QuerySet:
+        last_updates = (
+            WalletTransaction.objects
+            .filter(wallet=OuterRef('pk'))
+            .order_by('-created_at')
+            .values('updated_at')[:LAST_TRANSACTIONS_LIMIT]
+        )
+        return (
+            Wallet.objects
+            .filter(id=wallet_id)
+            .annotate(last_transaction_updates=Case(
+                When(LAST_TRANSACTIONS_SNAPSHOT, then=Value(None)),
+                default=ArraySubquery(last_updates),
+                output_field=ArrayField(DateTimeField())
+            ))
+            .values_list('version', 'updated_at', 'last_transactions', 'last_transaction_updates')
+        )
+
+    @staticmethod
+    def _to_validators_dto(wallet_id: uuid.UUID, version: int, updated_at: datetime.datetime,
+                           last_transactions: list[dict] | None,
+                           last_transaction_updates: list[datetime.datetime] | None) -> WalletValidatorsDTO:
+        if last_transaction_updates is None:
+            last_transaction_updates = [
+                TransactionDTO.from_snapshot(wallet_id, entry).updated_at for entry in last_transactions
+            ]
+        return WalletValidatorsDTO(version=version, last_modified=max([updated_at, *last_transaction_updates]))
+
+@dataclass
+class CachedWalletQueryService(BaseWalletQueryService):
+    """Сервис получения данных кошелька с чтением через кэш."""
+    query_service: BaseWalletQueryService
+    wallet_cache: WalletCacheService
+
+    def get_wallet_by_id(self, wallet_id: uuid.UUID) -> WalletDTO:
+        """
+        Получает кошелек из кэша, при промахе - из базового сервиса с сохранением в кэш.
+
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+
+        Returns:
+            WalletDTO: DTO объект кошелька
+
+        Raises:
+            WalletNotFoundException: Если кошелек с указанным ID не найден
+        """
+        wallet_dto = self.wallet_cache.get(wallet_id)
+        if wallet_dto is None:
+            wallet_dto = self.query_service.get_wallet_by_id(wallet_id)
+            self.wallet_cache.set(wallet_dto)
+        return wallet_dto
+
+    async def aget_wallet_by_id(self, wallet_id: uuid.UUID) -> WalletDTO:
+        """Асинхронный вариант get_wallet_by_id."""
+        wallet_dto = await self.wallet_cache.aget(wallet_id)
+        if wallet_dto is None:
+            wallet_dto = await self.query_service.aget_wallet_by_id(wallet_id)
+            await self.wallet_cache.aset(wallet_dto)
+        return wallet_dto
+
+    def get_wallet_validators(self, wallet_id: uuid.UUID) -> WalletValidatorsDTO:
+        """
+        Вычисляет валидаторы по данным кошелька из кэша, при промахе - получает их из базового сервиса.
+
+        Валидаторы по данным из кэша совпадают с ETag ответа, построенного по этим же данным.
+        """
+        wallet_dto = self.wallet_cache.get(wallet_id)
+        if wallet_dto is None:
+            return self.query_service.get_wallet_validators(wallet_id)
+        return WalletValidatorsDTO.from_wallet(wallet_dto)
+
+    async def aget_wallet_validators(self, wallet_id: uuid.UUID) -> WalletValidatorsDTO:
+        """Асинхронный вариант get_wallet_validators."""
+        wallet_dto = await self.wallet_cache.aget(wallet_id)
+        if wallet_dto is None:
+            return await self.query_service.aget_wallet_validators(wallet_id)
+        return WalletValidatorsDTO.from_wallet(wallet_dto)
+
+    def get_wallets(self, wallet_ids: list[uuid.UUID], user_ids: list[int]) -> list[WalletDTO]:
+        """
+        Получает кошельки по id из кэша одним обращением, остальные - из базового сервиса.
+
+        Кэш хранит кошельки по id, поэтому поиск по пользователям всегда идет в базовый сервис.
+        Полученные из базового сервиса кошельки сохраняются в кэш.
+        """
+        cached = self.wallet_cache.get_many(wallet_ids)
+        missing_ids = [wallet_id for wallet_id in wallet_ids if wallet_id not in cached]
+        loaded = self.query_service.get_wallets(missing_ids, user_ids) if missing_ids or user_ids else []
+        self.wallet_cache.set_many(loaded)
+        return self._merge_wallets([*cached.values(), *loaded])
+
+    async def aget_wallets(self, wallet_ids: list[uuid.UUID], user_ids: list[int]) -> list[WalletDTO]:
+        """Асинхронный вариант get_wallets."""
+        cached = await self.wallet_cache.aget_many(wallet_ids)
+        missing_ids = [wallet_id for wallet_id in wallet_ids if wallet_id not in cached]
+        loaded = await self.query_service.aget_wallets(missing_ids, user_ids) if missing_ids or user_ids else []
+        await self.wallet_cache.aset_many(loaded)
+        return self._merge_wallets([*cached.values(), *loaded])
+
+    @staticmethod
+    def _merge_wallets(wallet_dtos: list[WalletDTO]) -> list[WalletDTO]:
+        """Кошельки без повторов, упорядоченные по id, как в базовом сервисе."""
+        wallets = {wallet_dto.id: wallet_dto for wallet_dto in wallet_dtos}
+        return [wallets[wallet_id] for wallet_id in sorted(wallets)]
+
 
 class WalletCommandService(BaseWalletCommandService):
     """Сервис для выполнения операций изменения состояния кошелька."""
 
     @transaction.atomic
+    @with_lock_timeout
     def deposit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
         """
         Выполняет пополнение кошелька и создает соответствующую транзакцию.
@@ -77,22 +614,25 @@ class WalletCommandService(BaseWalletCommandService):
             
         Returns:
             TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            BalanceLimitExceededException: Если баланс превысит максимально допустимый
         """
         wallet_model = self._get_wallet_for_update(operation_data.wallet_id)
-        balance_before = wallet_model.balance
-
-        wallet_model.deposit(amount=operation_data.amount)
-        wallet_model.save(update_fields=['balance'])
-
-        logger.info(f'Кошелек с id {operation_data.wallet_id} успешно пополнен на сумму: {operation_data.amount}')
-
-        return self._create_transaction(
-            wallet=wallet_model,
+        balance_before = self._apply_operation(wallet_model, operation_data)
+        transaction_dto = self._create_transaction(
             operation_data=operation_data,
-            balance_before=balance_before
+            balance_before=balance_before,
+            balance_after=wallet_model.balance
         )
+        self._save_wallet(wallet_model, update_fields=['balance', 'version'], transactions=[transaction_dto])
+        self._on_wallets_changed([wallet_model.id])
+
+        logger.info('Кошелек с id %s успешно пополнен на сумму: %s', operation_data.wallet_id, operation_data.amount)
+        return transaction_dto
 
     @transaction.atomic
+    @with_lock_timeout
     def withdrawal(self, operation_data: WalletOperationDTO) -> TransactionDTO:
         """
         Выполняет снятие средств с кошелька с проверкой достаточности баланса.
@@ -107,81 +647,1053 @@ class WalletCommandService(BaseWalletCommandService):
             InsufficientFundsException: Если недостаточно средств на балансе
         """
         wallet_model = self._get_wallet_for_update(operation_data.wallet_id)
+        return self._withdraw_locked(wallet_model, operation_data)
+
+    def _withdraw_locked(self, wallet_model: Wallet, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """Списывает средства с заблокированного кошелька и создает транзакцию."""
         balance_before = wallet_model.balance
 
-        self.validate_balance(balance=balance_before, amount=operation_data.amount)
+        self.validate_balance(balance=wallet_model.available_balance, amount=operation_data.amount)
 
         wallet_model.withdrawal(amount=operation_data.amount)
-        wallet_model.save(update_fields=['balance'])
-
-        logger.info(f'С кошелька с id {operation_data.wallet_id} успешно списана сумма: {operation_data.amount}')
-
-        return self._create_transaction(
-            wallet=wallet_model,
+        transaction_dto = self._create_transaction(
             operation_data=operation_data,
-            balance_before=balance_before
+            balance_before=balance_before,
+            balance_after=wallet_model.balance
         )
+        self._save_wallet(wallet_model, update_fields=['balance', 'version'], transactions=[transaction_dto])
+        self._on_wallets_changed([wallet_model.id])
 
-    @staticmethod
-    def _get_wallet_for_update(wallet_id: uuid.UUID) -> Wallet:
+        logger.info('С кошелька с id %s успешно списана сумма: %s', operation_data.wallet_id, operation_data.amount)
+        return transaction_dto
+
+    @transaction.atomic
+    @with_lock_timeout
+    def apply_batch(self, operations: list[WalletOperationDTO]) -> list[WalletOperationResultDTO]:
         """
-        Получает кошелек с блокировкой для обновления.
-        
+        Выполняет пакет операций в одной транзакции БД.
+
+        Все кошельки пакета блокируются одним SELECT ... FOR UPDATE в порядке
+        возрастания id, поэтому параллельные пакеты не могут заблокировать друг друга.
+        Ошибка отдельной операции не отменяет остальные и возвращается в ее результате.
+
         Args:
-            wallet_id: Уникальный идентификатор кошелька
-            
+            operations: Список операций пополнения и снятия
+
         Returns:
-            Wallet: Модель кошелька
-            
-        Raises:
-            WalletNotFoundException: Если кошелек не найден
+            list[WalletOperationResultDTO]: Результаты операций в исходном порядке
         """
-        try:
-            wallet_model = Wallet.objects.select_for_update().get(id=wallet_id)
-            return wallet_model
-        except Wallet.DoesNotExist:
-            logger.error(f'Кошелек с id {wallet_id} не найден')
-            raise WalletNotFoundException(wallet_id=wallet_id)
+        wallets = self._get_wallets_for_update({operation.wallet_id for operation in operations})
+        results = [WalletOperationResultDTO(operation=operation) for operation in operations]
+        changed_wallets = {}
+        transaction_dtos = []
+        applied_results = []
 
-    @staticmethod
-    def validate_balance(balance: Decimal, amount: Decimal):
+        for result in results:
+            operation = result.operation
+            wallet_model = wallets.get(operation.wallet_id)
+            try:
+                if wallet_model is None:
+                    raise WalletNotFoundException(wallet_id=operation.wallet_id)
+                balance_before = self._apply_operation(wallet_model, operation)
+            except ServiceException as exc:
+                logger.error('Операция %s для кошелька %s отклонена: %s',
+                             operation.operation_type, operation.wallet_id, exc.message)
+                result.error = exc
+                continue
+
+            changed_wallets[wallet_model.id] = wallet_model
+            transaction_dtos.append(TransactionDTO(
+                wallet_id=wallet_model.id,
+                operation_type=operation.operation_type,
+                amount=operation.amount,
+                balance_after=wallet_model.balance,
+                balance_before=balance_before,
+                status=TransactionStatus.SUCCESS
+            ))
+            applied_results.append(result)
+
+        if changed_wallets:
+            created = self.transaction_service.create_transactions(transactions=transaction_dtos)
+            for result, transaction_dto in zip(applied_results, created):
+                result.transaction = transaction_dto
+            self._push_last_transactions(changed_wallets, created)
+            self._bulk_update_wallets(list(changed_wallets.values()), update_fields=['balance', 'version'])
+            self._on_wallets_changed(list(changed_wallets))
+
+        logger.info('Пакет из %s операций выполнен, успешно: %s', len(operations), len(applied_results))
+        return results
+
+    @transaction.atomic
+    @with_lock_timeout
+    def transfer(self, transfer_data: WalletTransferDTO) -> WalletTransferResultDTO:
         """
-        Проверяет достаточность баланса для снятия средств.
-        
+        Выполняет перевод средств между кошельками в одной транзакции БД.
+
+        Оба кошелька блокируются одним SELECT ... FOR UPDATE в порядке возрастания id,
+        поэтому встречные переводы не могут заблокировать друг друга. Две связанные транзакции
+        создаются одним bulk_create, а балансы и снимки транзакций обновляются одним bulk_update.
+
         Args:
-            balance: Текущий баланс кошелька
-            amount: Сумма для снятия
-            
+            transfer_data: Данные перевода
+
+        Returns:
+            WalletTransferResultDTO: Транзакции списания и зачисления
+
         Raises:
-            InsufficientFundsException: Если баланс недостаточен
+            SameWalletTransferException: Если кошелек отправителя совпадает с кошельком получателя
+            WalletNotFoundException: Если один из кошельков не найден
+            InsufficientFundsException: Если недостаточно средств на кошельке отправителя
+            BalanceLimitExceededException: Если баланс получателя превысит максимально допустимый
         """
-        if balance < amount:
-            logger.error(f'Ошибка списания с баланса {balance} на сумму: {amount}, не хватает средств')
-            raise InsufficientFundsException(balance=balance, amount=amount)
+        if transfer_data.source_wallet_id == transfer_data.target_wallet_id:
+            logger.error('Перевод на тот же кошелек %s', transfer_data.source_wallet_id)
+            raise SameWalletTransferException(wallet_id=transfer_data.source_wallet_id)
 
-    def _create_transaction(
-        self,
-        wallet: Wallet,
-        operation_data: WalletOperationDTO,
-        balance_before: Decimal
-    ) -> TransactionDTO:
+        wallets = self._get_wallets_for_update({transfer_data.source_wallet_id, transfer_data.target_wallet_id})
+        for wallet_id in (transfer_data.source_wallet_id, transfer_data.target_wallet_id):
+            if wallet_id not in wallets:
+                logger.error('Кошелек с id %s не найден', wallet_id)
+                raise WalletNotFoundException(wallet_id=wallet_id)
+        source_wallet = wallets[transfer_data.source_wallet_id]
+        target_wallet = wallets[transfer_data.target_wallet_id]
+
+        source_operation = WalletOperationDTO(
+            wallet_id=source_wallet.id,
+            operation_type=OperationType.WITHDRAWAL,
+            amount=transfer_data.amount
+        )
+        target_operation = WalletOperationDTO(
+            wallet_id=target_wallet.id,
+            operation_type=OperationType.DEPOSIT,
+            amount=transfer_data.amount
+        )
+        source_balance_before = self._apply_operation(source_wallet, source_operation)
+        target_balance_before = self._apply_operation(target_wallet, target_operation)
+
+        source_transaction_id, target_transaction_id = uuid.uuid4(), uuid.uuid4()
+        source_transaction, target_transaction = self.transaction_service.create_transactions(transactions=[
+            TransactionDTO(
+                id=source_transaction_id,
+                wallet_id=source_wallet.id,
+                operation_type=OperationType.TRANSFER,
+                amount=transfer_data.amount,
+                balance_after=source_wallet.balance,
+                balance_before=source_balance_before,
+                status=TransactionStatus.SUCCESS,
+                related_transaction_id=target_transaction_id
+            ),
+            TransactionDTO(
+                id=target_transaction_id,
+                wallet_id=target_wallet.id,
+                operation_type=OperationType.TRANSFER,
+                amount=transfer_data.amount,
+                balance_after=target_wallet.balance,
+                balance_before=target_balance_before,
+                status=TransactionStatus.SUCCESS,
+                related_transaction_id=source_transaction_id
+            ),
+        ])
+        self._push_last_transactions(wallets, [source_transaction, target_transaction])
+        self._bulk_update_wallets([source_wallet, target_wallet], update_fields=['balance', 'version'])
+        self._on_wallets_changed([source_wallet.id, target_wallet.id])
+
+        logger.info('Переведена сумма %s с кошелька %s на кошелек %s',
+                    transfer_data.amount, source_wallet.id, target_wallet.id)
+        return WalletTransferResultDTO(
+            source_transaction=source_transaction,
+            target_transaction=target_transaction
+        )
+
+    @transaction.atomic
+    def process_pending_operations(self, batch_size: int) -> int:
         """
-        Создает транзакцию для выполненной операции.
-        
+        Выполняет пакет операций в статусе IN_PROCESSING в одной транзакции БД.
+
+        Активные резервы, также находящиеся в статусе IN_PROCESSING, в очередь не входят.
+        Операции выбираются в порядке приема через SELECT ... FOR UPDATE SKIP LOCKED,
+        поэтому несколько обработчиков разбирают очередь параллельно, не ожидая друг друга.
+        Кошельки пакета блокируются одним запросом в порядке возрастания id. Выполненные
+        операции переходят в статус SUCCESS, отклоненные - в FAILED с причиной ошибки.
+
         Args:
-            wallet: Модель кошелька
-            operation_data: Данные операции
-            balance_before: Баланс до операции
-            
+            batch_size: Максимальное количество операций в пакете
+
         Returns:
-            TransactionDTO: DTO созданной транзакции
+            int: Количество обработанных операций
         """
-        transaction_dto = TransactionDTO(
-            wallet_id=wallet.id,
-            operation_type=operation_data.operation_type,
-            amount=operation_data.amount,
-            balance_after=wallet.balance,
+        pending = list(
+            WalletTransaction.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=TransactionStatus.IN_PROCESSING)
+            .exclude(operation_type=OperationType.HOLD)
+            .order_by('created_at')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        wallets = self._get_wallets_for_update({transaction_model.wallet_id for transaction_model in pending})
+        now = timezone.now()
+
+        for transaction_model in pending:
+            operation = WalletOperationDTO(
+                wallet_id=transaction_model.wallet_id,
+                operation_type=OperationType(transaction_model.operation_type),
+                amount=transaction_model.amount
+            )
+            wallet_model = wallets.get(transaction_model.wallet_id)
+            transaction_model.updated_at = now
+            try:
+                if wallet_model is None:
+                    raise WalletNotFoundException(wallet_id=transaction_model.wallet_id)
+                transaction_model.balance_before = self._apply_operation(wallet_model, operation)
+            except ServiceException as exc:
+                logger.error('Операция %s для кошелька %s отклонена: %s',
+                             transaction_model.id, transaction_model.wallet_id, exc.message)
+                transaction_model.status = TransactionStatus.FAILED
+                transaction_model.error_message = exc.message[:255]
+                continue
+
+            transaction_model.balance_after = wallet_model.balance
+            transaction_model.status = TransactionStatus.SUCCESS
+
+        WalletTransaction.objects.bulk_update(
+            pending,
+            fields=['status', 'balance_before', 'balance_after', 'error_message', 'updated_at']
+        )
+        pending_dtos = [transaction_model.to_dto() for transaction_model in pending]
+        OutboxService.record_transactions(pending_dtos, event_type=TRANSACTION_UPDATED)
+        # Снимки обновляются и у кошельков, все операции которых отклонены
+        self._push_last_transactions(wallets, pending_dtos)
+        self._bulk_update_wallets(list(wallets.values()), update_fields=['balance', 'version'])
+        self._on_wallets_changed(list(wallets))
+
+        logger.info('Обработано %s отложенных операций, успешно: %s',
+                    len(pending), sum(1 for transaction_model in pending if transaction_model.status == TransactionStatus.SUCCESS))
+        return len(pending)
+
+    @transaction.atomic
+    @with_lock_timeout
+    def hold(self, hold_data: WalletHoldDTO) -> TransactionDTO:
+        """
+        Резервирует средства кошелька до hold_data.expires_at.
+
+        Зарезервированная сумма остается на балансе, но недоступна для списания.
+        Резерв записывается транзакцией HOLD в статусе IN_PROCESSING до списания
+        или снятия резерва.
+
+        Args:
+            hold_data: Данные резерва
+
+        Returns:
+            TransactionDTO: DTO транзакции резерва
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            InsufficientFundsException: Если недостаточно доступных средств
+        """
+        wallet_model = self._get_wallets_for_update({hold_data.wallet_id}).get(hold_data.wallet_id)
+        if wallet_model is None:
+            logger.error('Кошелек с id %s не найден', hold_data.wallet_id)
+            raise WalletNotFoundException(wallet_id=hold_data.wallet_id)
+
+        self.validate_balance(balance=wallet_model.available_balance, amount=hold_data.amount)
+        wallet_model.reserve(amount=hold_data.amount)
+        transaction_dto = self.transaction_service.create_transaction(
+            transaction=TransactionDTO(
+                wallet_id=wallet_model.id,
+                operation_type=OperationType.HOLD,
+                amount=hold_data.amount,
+                balance_after=wallet_model.balance,
+                balance_before=wallet_model.balance,
+                status=TransactionStatus.IN_PROCESSING,
+                expires_at=hold_data.expires_at
+            ),
+            check_wallet=False
+        )
+        self._save_wallet(wallet_model, update_fields=['reserved_balance', 'version'], transactions=[transaction_dto])
+        self._on_wallets_changed([wallet_model.id])
+
+        logger.info('На кошельке %s зарезервирована сумма %s до %s',
+                    hold_data.wallet_id, hold_data.amount, hold_data.expires_at)
+        return transaction_dto
+
+    @transaction.atomic
+    @with_lock_timeout
+    def capture(self, settlement_data: WalletHoldSettlementDTO) -> TransactionDTO:
+        """
+        Списывает зарезервированные средства: всю сумму резерва или ее часть.
+
+        Остаток резерва освобождается. Резерв переходит в статус SUCCESS,
+        списание записывается транзакцией CAPTURE, связанной с резервом.
+
+        Args:
+            settlement_data: Резерв и сумма списания (по умолчанию - вся сумма резерва)
+
+        Returns:
+            TransactionDTO: DTO транзакции списания
+
+        Raises:
+            HoldNotFoundException: Если резерв не найден
+            HoldNotActiveException: Если резерв уже списан или снят
+            HoldExpiredException: Если срок действия резерва истек
+            HoldAmountExceededException: Если сумма списания больше суммы резерва
+        """
+        hold_model = self._get_active_hold_for_update(settlement_data)
+        if hold_model.expires_at <= timezone.now():
+            logger.error('Срок действия резерва %s истек %s', hold_model.id, hold_model.expires_at)
+            raise HoldExpiredException(hold_id=hold_model.id, expires_at=hold_model.expires_at)
+
+        amount = settlement_data.amount if settlement_data.amount is not None else hold_model.amount
+        if amount > hold_model.amount:
+            logger.error('Сумма списания %s превышает сумму резерва %s: %s', amount, hold_model.id, hold_model.amount)
+            raise HoldAmountExceededException(hold_amount=hold_model.amount, amount=amount)
+
+        wallet_model = self._get_wallets_for_update({hold_model.wallet_id})[hold_model.wallet_id]
+        balance_before = wallet_model.balance
+        wallet_model.capture(amount=amount, reserved_amount=hold_model.amount)
+
+        logger.info('По резерву %s с кошелька %s списана сумма %s', hold_model.id, wallet_model.id, amount)
+        return self._settle_hold(
+            hold_model=hold_model,
+            hold_status=TransactionStatus.SUCCESS,
+            wallet_model=wallet_model,
+            update_fields=['balance', 'reserved_balance', 'version'],
+            settlement=TransactionDTO(
+                wallet_id=wallet_model.id,
+                operation_type=OperationType.CAPTURE,
+                amount=amount,
+                balance_after=wallet_model.balance,
+                balance_before=balance_before,
+                status=TransactionStatus.SUCCESS
+            )
+        )
+
+    @transaction.atomic
+    @with_lock_timeout
+    def release(self, settlement_data: WalletHoldSettlementDTO) -> TransactionDTO:
+        """
+        Снимает резерв без списания средств.
+
+        Резерв переходит в статус CANCELED, снятие записывается транзакцией RELEASE,
+        связанной с резервом. Резерв с истекшим сроком, еще не снятый
+        release_expired_holds, тоже можно снять.
+
+        Args:
+            settlement_data: Резерв
+
+        Returns:
+            TransactionDTO: DTO транзакции снятия резерва
+
+        Raises:
+            HoldNotFoundException: Если резерв не найден
+            HoldNotActiveException: Если резерв уже списан или снят
+        """
+        hold_model = self._get_active_hold_for_update(settlement_data)
+
+        wallet_model = self._get_wallets_for_update({hold_model.wallet_id})[hold_model.wallet_id]
+        wallet_model.release(reserved_amount=hold_model.amount)
+
+        logger.info('Резерв %s на сумму %s кошелька %s снят', hold_model.id, hold_model.amount, wallet_model.id)
+        return self._settle_hold(
+            hold_model=hold_model,
+            hold_status=TransactionStatus.CANCELED,
+            wallet_model=wallet_model,
+            update_fields=['reserved_balance', 'version'],
+            settlement=TransactionDTO(
+                wallet_id=wallet_model.id,
+                operation_type=OperationType.RELEASE,
+                amount=hold_model.amount,
+                balance_after=wallet_model.balance,
+                balance_before=wallet_model.balance,
+                status=TransactionStatus.SUCCESS
+            )
+        )
+
+    @transaction.atomic
+    def release_expired_holds(self, chunk_size: int) -> int:
+        """
+        Снимает пачку резервов с истекшим сроком действия в одной транзакции БД.
+
+        Число запросов не зависит от размера пачки: резервы выбираются одним
+        SELECT ... FOR UPDATE SKIP LOCKED, поэтому резервы, которые в этот момент
+        списываются или снимаются, пропускаются. Кошельки блокируются одним запросом
+        в порядке возрастания id, транзакции RELEASE создаются одним bulk_create, резервы
+        переходят в статус CANCELED одним bulk_update, а зарезервированные суммы и снимки
+        транзакций кошельков обновляются одним bulk_update.
+
+        Args:
+            chunk_size: Максимальное количество резервов в пачке
+
+        Returns:
+            int: Количество снятых резервов
+        """
+        now = timezone.now()
+        holds = list(
+            WalletTransaction.objects
+            .select_for_update(skip_locked=True, no_key=True)
+            .filter(
+                operation_type=OperationType.HOLD,
+                status=TransactionStatus.IN_PROCESSING,
+                expires_at__lte=now
+            )
+            .order_by('expires_at')[:chunk_size]
+        )
+        if not holds:
+            return 0
+
+        released_amounts = defaultdict(Decimal)
+        for hold_model in holds:
+            released_amounts[hold_model.wallet_id] += hold_model.amount
+
+        wallets = {
+            wallet_model.id: wallet_model
+            for wallet_model in (
+                Wallet.objects
+                .select_for_update(no_key=True, of=('self',))
+                .with_total_balance()
+                .filter(id__in=released_amounts)
+                .order_by('id')
+            )
+        }
+
+        settlement_ids = [uuid.uuid4() for _ in holds]
+        settlements = self.transaction_service.create_transactions(transactions=[
+            TransactionDTO(
+                id=settlement_id,
+                wallet_id=hold_model.wallet_id,
+                operation_type=OperationType.RELEASE,
+                amount=hold_model.amount,
+                balance_after=wallets[hold_model.wallet_id].get_total_balance(),
+                balance_before=wallets[hold_model.wallet_id].get_total_balance(),
+                status=TransactionStatus.SUCCESS,
+                related_transaction_id=hold_model.id
+            )
+            for hold_model, settlement_id in zip(holds, settlement_ids)
+        ])
+        for hold_model, settlement_id in zip(holds, settlement_ids):
+            hold_model.status = TransactionStatus.CANCELED
+            hold_model.related_transaction_id = settlement_id
+            hold_model.updated_at = now
+        WalletTransaction.objects.bulk_update(holds, fields=['status', 'related_transaction', 'updated_at'])
+        hold_dtos = [hold_model.to_dto() for hold_model in holds]
+        OutboxService.record_transactions(hold_dtos, event_type=TRANSACTION_UPDATED)
+
+        for wallet_id, amount in released_amounts.items():
+            wallets[wallet_id].release(reserved_amount=amount)
+        self._push_last_transactions(wallets, [*hold_dtos, *settlements])
+        self._bulk_update_wallets(list(wallets.values()), update_fields=['reserved_balance', 'version'])
+        self._on_wallets_changed(list(wallets))
+
+        logger.info('Снято %s резервов с истекшим сроком действия на %s кошельках',
+                    len(holds), len(released_amounts))
+        return len(holds)
+
+    def _settle_hold(
+        self,
+        hold_model: WalletTransaction,
+        hold_status: TransactionStatus,
+        wallet_model: Wallet,
+        update_fields: list[str],
+        settlement: TransactionDTO
+    ) -> TransactionDTO:
+        """
+        Завершает резерв и создает связанную с ним транзакцию списания или снятия резерва.
+
+        Измененный в памяти кошелек сохраняется вместе с резервом и новой транзакцией в снимке.
+        """
+        settlement.id = uuid.uuid4()
+        settlement.related_transaction_id = hold_model.id
+        hold_model.status = hold_status
+        hold_model.related_transaction_id = settlement.id
+        hold_model.save(update_fields=['status', 'related_transaction', 'updated_at'])
+        hold_dto = hold_model.to_dto()
+        OutboxService.record_transactions([hold_dto], event_type=TRANSACTION_UPDATED)
+        settlement_dto = self.transaction_service.create_transaction(transaction=settlement, check_wallet=False)
+        self._save_wallet(wallet_model, update_fields=update_fields, transactions=[hold_dto, settlement_dto])
+        self._on_wallets_changed([wallet_model.id])
+        return settlement_dto
+
+    @staticmethod
+    def _get_active_hold_for_update(settlement_data: WalletHoldSettlementDTO) -> WalletTransaction:
+        """
+        Получает активный резерв с блокировкой для обновления.
+
+        Резерв блокируется раньше кошелька, как и в release_expired_holds,
+        поэтому снятие истекших резервов не может заблокировать списание резерва.
+
+        Raises:
+            HoldNotFoundException: Если резерв не найден
+            HoldNotActiveException: Если резерв уже списан или снят
+        """
+        hold_model = (
+            WalletTransaction.objects
+            .select_for_update(no_key=True)
+            .filter(
+                id=settlement_data.hold_id,
+                wallet_id=settlement_data.wallet_id,
+                operation_type=OperationType.HOLD
+            )
+            .first()
+        )
+        if hold_model is None:
+            logger.error('Резерв %s кошелька %s не найден', settlement_data.hold_id, settlement_data.wallet_id)
+            raise HoldNotFoundException(wallet_id=settlement_data.wallet_id, hold_id=settlement_data.hold_id)
+        if hold_model.status != TransactionStatus.IN_PROCESSING:
+            logger.error('Резерв %s уже завершен, статус: %s', hold_model.id, hold_model.status)
+            raise HoldNotActiveException(hold_id=hold_model.id, status=hold_model.status)
+        return hold_model
+
+    def _apply_operation(self, wallet_model: Wallet, operation: WalletOperationDTO) -> Decimal:
+        """
+        Применяет операцию к заблокированной модели кошелька в памяти.
+
+        Args:
+            wallet_model: Заблокированная модель кошелька
+            operation: Данные операции
+
+        Returns:
+            Decimal: Баланс до операции
+
+        Raises:
+            InsufficientFundsException: Если недостаточно средств на балансе
+            BalanceLimitExceededException: Если баланс превысит максимально допустимый
+            TransactionCreationException: Если баланс после операции не прошел валидацию
+        """
+        balance_before = wallet_model.balance
+        is_withdrawal = operation.operation_type == OperationType.WITHDRAWAL
+        if not is_withdrawal and balance_before + operation.amount > MAX_WALLET_BALANCE:
+            raise BalanceLimitExceededException(balance=balance_before, amount=operation.amount)
+        try:
+            if is_withdrawal:
+                self.validate_balance(balance=wallet_model.available_balance, amount=operation.amount)
+                wallet_model.withdrawal(amount=operation.amount)
+            else:
+                wallet_model.deposit(amount=operation.amount)
+        except ValidationError:
+            wallet_model.balance = balance_before
+            logger.error('Операция %s для кошелька %s отклонена: баланс не прошел валидацию',
+                         operation.operation_type, wallet_model.id)
+            raise TransactionCreationException(wallet_id=wallet_model.id, operation_type=operation.operation_type,
+                                               amount=operation.amount)
+        return balance_before
+
+    @staticmethod
+    def _save_wallet(wallet_model: Wallet, update_fields: list[str], transactions: list[TransactionDTO]):
+        """Сохраняет кошелек вместе со снимком последних транзакций одним UPDATE."""
+        wallet_model.push_last_transactions(transactions)
+        wallet_model.save(update_fields=[*update_fields, 'last_transactions', 'updated_at'])
+
+    @staticmethod
+    def _push_last_transactions(wallets: dict[uuid.UUID, Wallet], transactions: list[TransactionDTO]):
+        """Добавляет транзакции в снимки их кошельков в памяти."""
+        wallet_transactions = defaultdict(list)
+        for transaction_dto in transactions:
+            wallet_transactions[transaction_dto.wallet_id].append(transaction_dto)
+        for wallet_id, transaction_dtos in wallet_transactions.items():
+            wallets[wallet_id].push_last_transactions(transaction_dtos)
+
+    @staticmethod
+    def _bulk_update_wallets(wallet_models: list[Wallet], update_fields: list[str]):
+        """
+        Сохраняет кошельки вместе со снимками последних транзакций одним запросом.
+
+        bulk_update не применяет auto_now, поэтому время изменения кошельков задается явно:
+        по нему отдается Last-Modified кошелька.
+        """
+        now = timezone.now()
+        for wallet_model in wallet_models:
+            wallet_model.updated_at = now
+        Wallet.objects.bulk_update(wallet_models, fields=[*update_fields, 'last_transactions', 'updated_at'])
+
+    def _get_wallets_for_update(self, wallet_ids: set[uuid.UUID]) -> dict[uuid.UUID, Wallet]:
+        """
+        Получает кошельки с блокировкой для обновления в детерминированном порядке.
+
+        Args:
+            wallet_ids: Идентификаторы кошельков
+
+        Returns:
+            dict[uuid.UUID, Wallet]: Найденные модели кошельков по id
+        """
+        started = time.monotonic()
+        with self._profile_lock(wallet_ids):
+            wallet_models = Wallet.objects.select_for_update().filter(id__in=wallet_ids).order_by('id')
+            wallets = {wallet_model.id: wallet_model for wallet_model in wallet_models}
+        logger.debug('Блокировка %s кошельков получена за %.1f мс', len(wallets), (time.monotonic() - started) * 1000)
+        return wallets
+
+    def _get_wallet_for_update(self, wallet_id: uuid.UUID) -> Wallet:
+        """
+        Получает кошелек с блокировкой для обновления.
+        
+        Args:
+            wallet_id: Уникальный идентификатор кошелька
+            
+        Returns:
+            Wallet: Модель кошелька
+            
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        started = time.monotonic()
+        try:
+            with self._profile_lock([wallet_id]):
+                wallet_model = Wallet.objects.select_for_update().get(id=wallet_id)
+            logger.debug('Блокировка кошелька %s получена за %.1f мс', wallet_id, (time.monotonic() - started) * 1000)
+            return wallet_model
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+
+    @staticmethod
+    def validate_balance(balance: Decimal, amount: Decimal):
+        """
+        Проверяет достаточность баланса для снятия средств.
+        
+        Args:
+            balance: Текущий баланс кошелька
+            amount: Сумма для снятия
+            
+        Raises:
+            InsufficientFundsException: Если баланс недостаточен
+        """
+        if balance < amount:
+            logger.error('Ошибка списания с баланса %s на сумму: %s, не хватает средств', balance, amount)
+            raise InsufficientFundsException(balance=balance, amount=amount)
+
+    def _create_transaction(
+        self,
+        operation_data: WalletOperationDTO,
+        balance_before: Decimal,
+        balance_after: Decimal
+    ) -> TransactionDTO:
+        """
+        Создает транзакцию для выполненной операции.
+        
+        Args:
+            operation_data: Данные операции
+            balance_before: Баланс до операции
+            balance_after: Баланс после операции
+            
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+        """
+        transaction_dto = self._make_transaction(operation_data, balance_before, balance_after)
+        # Кошелек заблокирован или изменен в этой транзакции БД, повторная проверка не нужна
+        return self.transaction_service.create_transaction(transaction=transaction_dto, check_wallet=False)
+
+    @staticmethod
+    def _make_transaction(
+        operation_data: WalletOperationDTO,
+        balance_before: Decimal = None,
+        balance_after: Decimal = None
+    ) -> TransactionDTO:
+        """DTO успешной транзакции операции, без балансов - для create_transaction_with_balance_update."""
+        return TransactionDTO(
+            wallet_id=operation_data.wallet_id,
+            operation_type=operation_data.operation_type,
+            amount=operation_data.amount,
+            balance_after=balance_after,
             balance_before=balance_before,
-            status=TransactionStatus.SUCCESS
+            status=TransactionStatus.SUCCESS,
+            idempotency_key=operation_data.idempotency_key
         )
-        return self.transaction_service.create_transaction(transaction=transaction_dto)
\ No newline at end of file
+
+
+class AtomicUpdateWalletCommandService(WalletCommandService):
+    """
+    Сервис операций с кошельком на основе одного условного UPDATE.
+
+    Вместо чтения кошелька под select_for_update() баланс изменяется условным
+    UPDATE, который тем же запросом добавляет транзакцию в снимок последних транзакций
+    и вставляет ее в таблицу транзакций (TransactionService.create_transaction_with_balance_update).
+    Пока удерживается блокировка строки, выполняется только запись события outbox.
+    """
+
+    @transaction.atomic
+    @with_lock_timeout
+    def deposit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Выполняет пополнение кошелька одним условным UPDATE.
+
+        Args:
+            operation_data: Данные операции пополнения
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            BalanceLimitExceededException: Если баланс превысит максимально допустимый
+            WalletConcurrentUpdateException: Если UPDATE дважды не прошел по условию,
+                хотя прочитанный после него баланс допускает пополнение
+        """
+        # UPDATE проверяет условие по последней версии строки, а следующее чтение может увидеть
+        # уже другой баланс (например, после зафиксированного списания), поэтому UPDATE повторяется один раз
+        for attempt in range(1, DEPOSIT_UPDATE_ATTEMPTS + 1):
+            transaction_dto = self._update_balance(
+                operation_data=operation_data,
+                delta=operation_data.amount,
+                condition='{balance} + %s <= %s',
+                condition_params=[operation_data.amount, MAX_WALLET_BALANCE]
+            )
+            if transaction_dto is not None:
+                break
+            balance = self._get_current_balance(operation_data.wallet_id)
+            if balance + operation_data.amount > MAX_WALLET_BALANCE:
+                logger.error('Пополнение кошелька %s на сумму %s превышает максимальный баланс, баланс: %s',
+                             operation_data.wallet_id, operation_data.amount, balance)
+                raise BalanceLimitExceededException(balance=balance, amount=operation_data.amount)
+        else:
+            logger.error('Не удалось пополнить кошелек %s за %s попыток', operation_data.wallet_id,
+                         DEPOSIT_UPDATE_ATTEMPTS)
+            raise WalletConcurrentUpdateException(wallet_id=operation_data.wallet_id,
+                                                  attempts=DEPOSIT_UPDATE_ATTEMPTS)
+        self._on_wallets_changed([operation_data.wallet_id])
+
+        logger.info('Кошелек с id %s успешно пополнен на сумму: %s', operation_data.wallet_id, operation_data.amount)
+        return transaction_dto
+
+    @transaction.atomic
+    @with_lock_timeout
+    def withdrawal(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Выполняет снятие средств одним условным UPDATE.
+
+        Args:
+            operation_data: Данные операции снятия
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            InsufficientFundsException: Если недостаточно средств на балансе
+        """
+        transaction_dto = self._update_balance(
+            operation_data=operation_data,
+            delta=-operation_data.amount,
+            condition='{balance} - {reserved_balance} >= %s',
+            condition_params=[operation_data.amount]
+        )
+        if transaction_dto is None:
+            # Кошелек существует, значит UPDATE не прошел по условию на доступный баланс
+            balance = self._get_current_balance(operation_data.wallet_id, available=True)
+            logger.error('Ошибка списания с баланса %s на сумму: %s, не хватает средств', balance, operation_data.amount)
+            raise InsufficientFundsException(balance=balance, amount=operation_data.amount)
+        self._on_wallets_changed([operation_data.wallet_id])
+
+        logger.info('С кошелька с id %s успешно списана сумма: %s', operation_data.wallet_id, operation_data.amount)
+        return transaction_dto
+
+    def _update_balance(
+        self,
+        operation_data: WalletOperationDTO,
+        delta: Decimal,
+        condition: str,
+        condition_params: list
+    ) -> TransactionDTO | None:
+        """
+        Изменяет баланс кошелька на delta, если выполняется условие, и создает транзакцию операции.
+
+        Args:
+            operation_data: Данные операции
+            delta: Изменение баланса (отрицательное для списания)
+            condition: SQL-условие на текущий баланс ({balance} - колонка баланса,
+                {reserved_balance} - колонка зарезервированной суммы)
+            condition_params: Параметры SQL-условия
+
+        Returns:
+            TransactionDTO | None: DTO созданной транзакции или None, если ни одна строка не обновлена
+        """
+        started = time.monotonic()
+        transaction_dto = self.transaction_service.create_transaction_with_balance_update(
+            transaction=self._make_transaction(operation_data),
+            delta=delta,
+            condition=condition,
+            condition_params=condition_params
+        )
+        logger.debug('Баланс кошелька %s обновлен за %.1f мс', operation_data.wallet_id,
+                     (time.monotonic() - started) * 1000)
+        return transaction_dto
+
+    @staticmethod
+    def _get_current_balance(wallet_id: uuid.UUID, available: bool = False) -> Decimal:
+        """
+        Получает текущий баланс кошелька без блокировки, при available - без зарезервированной суммы.
+
+        Вызывается только после неудачного UPDATE, чтобы определить причину отказа.
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        balance_expression = F('balance') - F('reserved_balance') if available else F('balance')
+        balance = Wallet.objects.filter(id=wallet_id).values_list(balance_expression, flat=True).first()
+        if balance is None:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+        return balance
+
+
+@dataclass
+class OptimisticWalletCommandService(WalletCommandService):
+    """
+    Сервис операций с кошельком на основе оптимистичной блокировки.
+
+    Кошелек читается без блокировки, а новый баланс записывается условным
+    UPDATE ... WHERE version = <прочитанная версия>. Если кошелек успел измениться,
+    операция повторяется с экспоненциальной задержкой со случайным разбросом,
+    не более max_attempts раз. Баланс, снимок последних транзакций и транзакция
+    записываются одним запросом, как в AtomicUpdateWalletCommandService, поэтому
+    блокировка строки удерживается только на время этого запроса и записи события
+    outbox. Пакетные операции и переводы выполняются как в WalletCommandService.
+    """
+    max_attempts: int = 5
+    backoff_base: float = 0.005
+    backoff_max: float = 0.1
+
+    def deposit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Выполняет пополнение кошелька с оптимистичной блокировкой.
+
+        Args:
+            operation_data: Данные операции пополнения
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            BalanceLimitExceededException: Если баланс превысит максимально допустимый
+            WalletConcurrentUpdateException: Если все попытки завершились конфликтом
+        """
+        return self._run_optimistic(operation_data)
+
+    def withdrawal(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Выполняет снятие средств с кошелька с оптимистичной блокировкой.
+
+        Args:
+            operation_data: Данные операции снятия
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            InsufficientFundsException: Если недостаточно средств на балансе
+            WalletConcurrentUpdateException: Если все попытки завершились конфликтом
+        """
+        return self._run_optimistic(operation_data)
+
+    def _run_optimistic(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """Применяет операцию к прочитанному кошельку и повторяет ее при конфликте версий."""
+        for attempt in range(1, self.max_attempts + 1):
+            wallet_model = self._get_wallet(operation_data.wallet_id)
+            expected_version = wallet_model.version
+            self._apply_operation(wallet_model, operation_data)
+
+            with transaction.atomic(), self._lock_timeout():
+                transaction_dto = self._compare_and_swap(operation_data, expected_version)
+                if transaction_dto is not None:
+                    self._on_wallets_changed([wallet_model.id])
+                    logger.info('Операция %s на сумму %s для кошелька %s выполнена с попытки %s',
+                                operation_data.operation_type, operation_data.amount, operation_data.wallet_id, attempt)
+                    return transaction_dto
+
+            logger.info('Конфликт версий кошелька %s, попытка %s из %s',
+                        operation_data.wallet_id, attempt, self.max_attempts)
+            if attempt < self.max_attempts:
+                time.sleep(self._get_backoff(attempt))
+
+        logger.error('Не удалось изменить кошелек %s за %s попыток', operation_data.wallet_id, self.max_attempts)
+        raise WalletConcurrentUpdateException(wallet_id=operation_data.wallet_id, attempts=self.max_attempts)
+
+    def _get_backoff(self, attempt: int) -> float:
+        """Задержка перед следующей попыткой: случайная в пределах экспоненциально растущего окна."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _compare_and_swap(self, operation_data: WalletOperationDTO, expected_version: int) -> TransactionDTO | None:
+        """
+        Применяет операцию к кошельку и создает ее транзакцию одним запросом,
+        если версия кошелька не изменилась после чтения.
+
+        Returns:
+            TransactionDTO | None: None, если кошелек изменен другой операцией
+        """
+        amount = operation_data.amount
+        return self.transaction_service.create_transaction_with_balance_update(
+            transaction=self._make_transaction(operation_data),
+            delta=-amount if operation_data.operation_type == OperationType.WITHDRAWAL else amount,
+            condition='{version} = %s',
+            condition_params=[expected_version]
+        )
+
+    @staticmethod
+    def _get_wallet(wallet_id: uuid.UUID) -> Wallet:
+        """
+        Получает кошелек без блокировки.
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        try:
+            return Wallet.objects.get(id=wallet_id)
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
+
+
+@dataclass
+class ShardedWalletCommandService(WalletCommandService):
+    """
+    Сервис операций с кошельком, поддерживающий шардированный баланс.
+
+    Пополнение шардированного кошелька зачисляется на случайную часть баланса
+    без блокировки строки кошелька, поэтому параллельные пополнения горячего
+    кошелька не выстраиваются в очередь. Списание блокирует строку кошелька
+    и берет средства из Wallet.balance, затем из одной части баланса, а если ни
+    на одной из них не хватает средств - консолидирует все части в Wallet.balance.
+    Резервы хранятся в строке кошелька, поэтому резервирование и списание резерва
+    предварительно консолидируют части баланса. Снимок последних транзакций
+    шардированного кошелька не ведется и пересобирается при выключении шардирования.
+    Остальные кошельки обрабатываются как в WalletCommandService.
+    """
+    shard_service: WalletShardService = field(default_factory=WalletShardService)
+
+    @transaction.atomic
+    @with_lock_timeout
+    def deposit(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Выполняет пополнение кошелька, для шардированного кошелька - одной из частей баланса.
+
+        Максимальный баланс соблюдается лимитом части (WalletShardService.deposit). Пополнение,
+        которое не помещается в лимит части, выполняется под блокировкой кошелька после консолидации
+        и проверяется по полному балансу.
+
+        Пополнения частей выполняются параллельно, поэтому balance_before и balance_after их транзакций -
+        полный баланс, видимый операции, без незафиксированных пополнений других частей: у параллельных
+        пополнений balance_before может совпадать, и цепочка балансов транзакций не обязана быть непрерывной.
+        Сумма amount транзакций при этом всегда равна изменению полного баланса.
+
+        Args:
+            operation_data: Данные операции пополнения
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            BalanceLimitExceededException: Если баланс превысит максимально допустимый
+        """
+        if not self.shard_service.deposit(wallet_id=operation_data.wallet_id, amount=operation_data.amount):
+            return self._deposit_locked(operation_data)
+
+        balance_after = self.shard_service.get_total_balance(operation_data.wallet_id)
+        self._on_wallets_changed([operation_data.wallet_id])
+
+        logger.info('Кошелек с id %s успешно пополнен на сумму: %s', operation_data.wallet_id, operation_data.amount)
+
+        return self._create_transaction(
+            operation_data=operation_data,
+            balance_before=balance_after - operation_data.amount,
+            balance_after=balance_after
+        )
+
+    def _deposit_locked(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """Пополняет Wallet.balance под блокировкой кошелька, шардированный кошелек предварительно консолидируется."""
+        wallet_model = self._get_wallets_for_update({operation_data.wallet_id}).get(operation_data.wallet_id)
+        if wallet_model is None:
+            logger.error('Кошелек с id %s не найден', operation_data.wallet_id)
+            raise WalletNotFoundException(wallet_id=operation_data.wallet_id)
+
+        balance_before = self._apply_operation(wallet_model, operation_data)
+        transaction_dto = self._create_transaction(
+            operation_data=operation_data,
+            balance_before=balance_before,
+            balance_after=wallet_model.balance
+        )
+        self._save_wallet(wallet_model, update_fields=['balance', 'version'], transactions=[transaction_dto])
+        self._on_wallets_changed([wallet_model.id])
+
+        logger.info('Кошелек с id %s успешно пополнен на сумму: %s', operation_data.wallet_id, operation_data.amount)
+        return transaction_dto
+
+    @transaction.atomic
+    @with_lock_timeout
+    def withdrawal(self, operation_data: WalletOperationDTO) -> TransactionDTO:
+        """
+        Выполняет снятие средств с кошелька, для шардированного кошелька - с одной
+        из частей баланса или после их консолидации.
+
+        Строка кошелька заблокирована при любом способе списания, и версия кошелька
+        увеличивается, в том числе при списании только с части баланса.
+
+        Args:
+            operation_data: Данные операции снятия
+
+        Returns:
+            TransactionDTO: DTO созданной транзакции
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+            InsufficientFundsException: Если недостаточно средств на полном балансе
+        """
+        wallet_model = self._get_wallet_for_update(operation_data.wallet_id)
+        if not wallet_model.is_sharded:
+            return self._withdraw_locked(wallet_model, operation_data)
+        amount = operation_data.amount
+
+        if wallet_model.available_balance >= amount:
+            wallet_model.withdrawal(amount=amount)
+        elif self.shard_service.withdraw(wallet_id=wallet_model.id, amount=amount):
+            wallet_model.version += 1
+        else:
+            self.shard_service.consolidate(wallet_model)
+            self.validate_balance(balance=wallet_model.available_balance, amount=amount)
+            wallet_model.withdrawal(amount=amount)
+        wallet_model.save(update_fields=['balance', 'version', 'updated_at'])
+        self._on_wallets_changed([wallet_model.id])
+
+        balance_after = self.shard_service.get_total_balance(wallet_model.id)
+
+        logger.info('С кошелька с id %s успешно списана сумма: %s', operation_data.wallet_id, amount)
+
+        return self._create_transaction(
+            operation_data=operation_data,
+            balance_before=balance_after + amount,
+            balance_after=balance_after
+        )
+
+    def _get_wallets_for_update(self, wallet_ids: set[uuid.UUID]) -> dict[uuid.UUID, Wallet]:
+        """
+        Получает кошельки с блокировкой для обновления и консолидирует шардированные.
+
+        После консолидации Wallet.balance шардированного кошелька равен его полному балансу,
+        поэтому пакетные операции и переводы применяются к нему как к обычному кошельку.
+        """
+        with self._profile_lock(wallet_ids):
+            wallet_models = Wallet.objects.select_for_update(no_key=True).filter(id__in=wallet_ids).order_by('id')
+            wallets = {wallet_model.id: wallet_model for wallet_model in wallet_models}
+        for wallet_model in wallets.values():
+            if wallet_model.is_sharded:
+                self.shard_service.consolidate(wallet_model)
+        return wallets
+
+    def _get_wallet_for_update(self, wallet_id: uuid.UUID) -> Wallet:
+        """
+        Получает кошелек с блокировкой FOR NO KEY UPDATE.
+
+        Raises:
+            WalletNotFoundException: Если кошелек не найден
+        """
+        started = time.monotonic()
+        try:
+            with self._profile_lock([wallet_id]):
+                wallet_model = Wallet.objects.select_for_update(no_key=True).get(id=wallet_id)
+            logger.debug('Блокировка кошелька %s получена за %.1f мс', wallet_id, (time.monotonic() - started) * 1000)
+            return wallet_model
+        except Wallet.DoesNotExist:
+            logger.error('Кошелек с id %s не найден', wallet_id)
+            raise WalletNotFoundException(wallet_id=wallet_id)
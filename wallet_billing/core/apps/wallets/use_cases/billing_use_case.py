@@ -1,28 +1,235 @@
 import logging
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 
 from core.apps.common.enums import OperationType
+from core.apps.common.metrics import observe_billing_operation
 from core.apps.wallets.dto.transaction import TransactionDTO
-from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.dto.wallets import (
+    WalletHoldDTO,
+    WalletHoldSettlementDTO,
+    WalletOperationDTO,
+    WalletOperationResultDTO,
+    WalletTransferDTO,
+    WalletTransferResultDTO,
+)
 from core.apps.wallets.exception.billings import UnsupportedOperationException
+from core.apps.wallets.exception.transaction import IdempotencyKeyConflictException, IdempotencyKeyMismatchException
+from core.apps.wallets.services.coalescing import WalletOperationCoalescer
 from core.apps.wallets.services.wallets import BaseWalletCommandService
 
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_OPERATION_TYPES = (OperationType.DEPOSIT, OperationType.WITHDRAWAL)
+
+
+def _operation_type_label(operation_type: OperationType | str) -> str:
+    """Метка типа операции для метрик: произвольные типы клиента не создают новых рядов метрики."""
+    return operation_type if operation_type in SUPPORTED_OPERATION_TYPES else 'unsupported'
+
+
 @dataclass
 class BillingUseCase:
     wallet_service: BaseWalletCommandService
+    operation_coalescer: WalletOperationCoalescer = None
 
     def process_operation(self, operation: WalletOperationDTO) -> TransactionDTO:
+        with observe_billing_operation(_operation_type_label(operation.operation_type)):
+            return self._run_idempotent(operation, self._dispatch_operation)
+
+    async def aprocess_operation(self, operation: WalletOperationDTO) -> TransactionDTO:
+        with observe_billing_operation(_operation_type_label(operation.operation_type)):
+            return await self._arun_idempotent(operation, self._adispatch_operation)
+
+    def submit_operation(self, operation: WalletOperationDTO) -> TransactionDTO:
+        return self._run_idempotent(operation, self._dispatch_submission)
+
+    async def asubmit_operation(self, operation: WalletOperationDTO) -> TransactionDTO:
+        return await self._arun_idempotent(operation, self._adispatch_submission)
+
+    def _run_idempotent(self, operation: WalletOperationDTO,
+                        dispatch: Callable[[WalletOperationDTO], TransactionDTO]) -> TransactionDTO:
+        if operation.idempotency_key is None:
+            return dispatch(operation)
+
+        replayed_transaction = self._get_replayed_transaction(operation)
+        if replayed_transaction is not None:
+            return replayed_transaction
+        try:
+            return dispatch(operation)
+        except IdempotencyKeyConflictException:
+            # Параллельный запрос с тем же ключом успел зафиксировать транзакцию первым
+            replayed_transaction = self._get_replayed_transaction(operation)
+            if replayed_transaction is None:
+                raise
+            return replayed_transaction
+
+    async def _arun_idempotent(self, operation: WalletOperationDTO,
+                               dispatch: Callable[[WalletOperationDTO], Awaitable[TransactionDTO]]) -> TransactionDTO:
+        if operation.idempotency_key is None:
+            return await dispatch(operation)
+
+        replayed_transaction = await self._aget_replayed_transaction(operation)
+        if replayed_transaction is not None:
+            return replayed_transaction
+        try:
+            return await dispatch(operation)
+        except IdempotencyKeyConflictException:
+            replayed_transaction = await self._aget_replayed_transaction(operation)
+            if replayed_transaction is None:
+                raise
+            return replayed_transaction
+
+    def _dispatch_submission(self, operation: WalletOperationDTO) -> TransactionDTO:
+        self._check_supported(operation)
+        logger.info('Вызвана функция асинхронной операции для кошелька %s', operation.wallet_id)
+
+        return self.wallet_service.submit(operation)
+
+    async def _adispatch_submission(self, operation: WalletOperationDTO) -> TransactionDTO:
+        self._check_supported(operation)
+        logger.info('Вызвана функция асинхронной операции для кошелька %s', operation.wallet_id)
+
+        return await self.wallet_service.asubmit(operation)
+
+    @staticmethod
+    def _check_supported(operation: WalletOperationDTO):
+        if operation.operation_type not in SUPPORTED_OPERATION_TYPES:
+            logger.info('Неверный тип операции %s', operation.operation_type)
+            raise UnsupportedOperationException(operation_type=operation.operation_type)
+
+    def _dispatch_operation(self, operation: WalletOperationDTO) -> TransactionDTO:
         if operation.operation_type == OperationType.DEPOSIT:
-            logger.info(f'Вызвана функция пополнения баланса для кошелька {operation.wallet_id}')
+            logger.info('Вызвана функция пополнения баланса для кошелька %s', operation.wallet_id)
 
             return self.wallet_service.deposit(operation)
         elif operation.operation_type == OperationType.WITHDRAWAL:
-            logger.info(f'Вызвана функция списания баланса для кошелька {operation.wallet_id}')
+            logger.info('Вызвана функция списания баланса для кошелька %s', operation.wallet_id)
 
             return self.wallet_service.withdrawal(operation)
         else:
-            logger.info(f'Неверный тип операции {operation.operation_type}')
-            raise UnsupportedOperationException(operation_type=operation.operation_type)
\ No newline at end of file
+            logger.info('Неверный тип операции %s', operation.operation_type)
+            raise UnsupportedOperationException(operation_type=operation.operation_type)
+
+    async def _adispatch_operation(self, operation: WalletOperationDTO) -> TransactionDTO:
+        # Операции с ключом идемпотентности выполняются по отдельности: конфликт ключа
+        # при вставке пакета отменил бы весь пакет
+        if (self.operation_coalescer is not None and operation.idempotency_key is None
+                and operation.operation_type in SUPPORTED_OPERATION_TYPES):
+            logger.info('Операция %s для кошелька %s передана на объединение в пакет',
+                        operation.operation_type, operation.wallet_id)
+
+            return await self.operation_coalescer.submit(operation)
+        elif operation.operation_type == OperationType.DEPOSIT:
+            logger.info('Вызвана функция пополнения баланса для кошелька %s', operation.wallet_id)
+
+            return await self.wallet_service.adeposit(operation)
+        elif operation.operation_type == OperationType.WITHDRAWAL:
+            logger.info('Вызвана функция списания баланса для кошелька %s', operation.wallet_id)
+
+            return await self.wallet_service.awithdrawal(operation)
+        else:
+            logger.info('Неверный тип операции %s', operation.operation_type)
+            raise UnsupportedOperationException(operation_type=operation.operation_type)
+
+    def _get_replayed_transaction(self, operation: WalletOperationDTO) -> TransactionDTO | None:
+        transaction_dto = self.wallet_service.transaction_service.get_by_idempotency_key(
+            wallet_id=operation.wallet_id,
+            idempotency_key=operation.idempotency_key
+        )
+        return self._check_replayed_transaction(operation, transaction_dto)
+
+    async def _aget_replayed_transaction(self, operation: WalletOperationDTO) -> TransactionDTO | None:
+        transaction_dto = await self.wallet_service.transaction_service.aget_by_idempotency_key(
+            wallet_id=operation.wallet_id,
+            idempotency_key=operation.idempotency_key
+        )
+        return self._check_replayed_transaction(operation, transaction_dto)
+
+    @staticmethod
+    def _check_replayed_transaction(operation: WalletOperationDTO,
+                                    transaction_dto: TransactionDTO | None) -> TransactionDTO | None:
+        if transaction_dto is None:
+            return None
+        if transaction_dto.operation_type != operation.operation_type or transaction_dto.amount != operation.amount:
+            logger.info('Ключ идемпотентности %s повторно использован с другими параметрами', operation.idempotency_key)
+            raise IdempotencyKeyMismatchException(wallet_id=operation.wallet_id,
+                                                  idempotency_key=operation.idempotency_key)
+
+        logger.info('Повторный запрос с ключом идемпотентности %s для кошелька %s',
+                    operation.idempotency_key, operation.wallet_id)
+        return transaction_dto
+
+    def process_transfer(self, transfer: WalletTransferDTO) -> WalletTransferResultDTO:
+        logger.info('Вызвана функция перевода с кошелька %s на кошелек %s',
+                    transfer.source_wallet_id, transfer.target_wallet_id)
+
+        return self.wallet_service.transfer(transfer)
+
+    async def aprocess_transfer(self, transfer: WalletTransferDTO) -> WalletTransferResultDTO:
+        logger.info('Вызвана функция перевода с кошелька %s на кошелек %s',
+                    transfer.source_wallet_id, transfer.target_wallet_id)
+
+        return await self.wallet_service.atransfer(transfer)
+
+    def process_hold(self, hold: WalletHoldDTO) -> TransactionDTO:
+        logger.info('Вызвана функция резервирования средств кошелька %s', hold.wallet_id)
+
+        return self.wallet_service.hold(hold)
+
+    async def aprocess_hold(self, hold: WalletHoldDTO) -> TransactionDTO:
+        logger.info('Вызвана функция резервирования средств кошелька %s', hold.wallet_id)
+
+        return await self.wallet_service.ahold(hold)
+
+    def process_capture(self, settlement: WalletHoldSettlementDTO) -> TransactionDTO:
+        logger.info('Вызвана функция списания резерва %s кошелька %s', settlement.hold_id, settlement.wallet_id)
+
+        return self.wallet_service.capture(settlement)
+
+    async def aprocess_capture(self, settlement: WalletHoldSettlementDTO) -> TransactionDTO:
+        logger.info('Вызвана функция списания резерва %s кошелька %s', settlement.hold_id, settlement.wallet_id)
+
+        return await self.wallet_service.acapture(settlement)
+
+    def process_release(self, settlement: WalletHoldSettlementDTO) -> TransactionDTO:
+        logger.info('Вызвана функция снятия резерва %s кошелька %s', settlement.hold_id, settlement.wallet_id)
+
+        return self.wallet_service.release(settlement)
+
+    async def aprocess_release(self, settlement: WalletHoldSettlementDTO) -> TransactionDTO:
+        logger.info('Вызвана функция снятия резерва %s кошелька %s', settlement.hold_id, settlement.wallet_id)
+
+        return await self.wallet_service.arelease(settlement)
+
+    def process_batch(self, operations: list[WalletOperationDTO]) -> list[WalletOperationResultDTO]:
+        results, supported_operations = self._split_batch(operations)
+        applied_results = iter(self.wallet_service.apply_batch(supported_operations) if supported_operations else [])
+        return [result or next(applied_results) for result in results]
+
+    async def aprocess_batch(self, operations: list[WalletOperationDTO]) -> list[WalletOperationResultDTO]:
+        results, supported_operations = self._split_batch(operations)
+        applied_results = iter(await self.wallet_service.aapply_batch(supported_operations) if supported_operations else [])
+        return [result or next(applied_results) for result in results]
+
+    @staticmethod
+    def _split_batch(
+        operations: list[WalletOperationDTO]
+    ) -> tuple[list[WalletOperationResultDTO | None], list[WalletOperationDTO]]:
+        """Отделяет неподдерживаемые операции пакета, оставляя None на месте поддерживаемых."""
+        results: list[WalletOperationResultDTO | None] = []
+        supported_operations = []
+        for operation in operations:
+            if operation.operation_type in SUPPORTED_OPERATION_TYPES:
+                supported_operations.append(operation)
+                results.append(None)
+            else:
+                logger.info('Неверный тип операции %s', operation.operation_type)
+                results.append(WalletOperationResultDTO(
+                    operation=operation,
+                    error=UnsupportedOperationException(operation_type=operation.operation_type)
+                ))
+
+        logger.info('Вызвана функция пакетной обработки %s операций', len(supported_operations))
+        return results, supported_operations
@@ -0,0 +1,106 @@
+"""
+Проверки денежных инвариантов и статусов без обращений к БД.
+
+Используются на пути записи вместо full_clean(), который дополнительно проверяет
+внешние ключи и уникальность запросами к БД. Те же инварианты закреплены в БД
+ограничениями CheckConstraint моделей.
+"""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.transaction import TransactionDTO
+
+
+MONEY_MAX_DIGITS = 15
+MONEY_DECIMAL_PLACES = 2
+MIN_TRANSACTION_AMOUNT = Decimal('0.01')
+MAX_WALLET_BALANCE = Decimal('999999999')
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+OPERATION_TYPE_VALUES = frozenset(operation_type.value for operation_type in OperationType)
+TRANSACTION_STATUS_VALUES = frozenset(status.value for status in TransactionStatus)
+
+_MONEY_LIMIT = Decimal(10) ** (MONEY_MAX_DIGITS - MONEY_DECIMAL_PLACES)
+
+
+def validate_money(value: Decimal, field_name: str, min_value: Decimal = Decimal('0.00')):
+    """
+    Проверяет денежное значение: конечное число не меньше min_value,
+    не более MONEY_DECIMAL_PLACES знаков после запятой и MONEY_MAX_DIGITS цифр.
+
+    Raises:
+        ValidationError: Если значение не проходит проверку
+    """
+    if not isinstance(value, Decimal) or not value.is_finite():
+        raise ValidationError({field_name: f'Некорректное значение {value!r}'})
+    if value < min_value:
+        raise ValidationError({field_name: f'Значение {value} меньше {min_value}'})
+    if value.as_tuple().exponent < -MONEY_DECIMAL_PLACES or abs(value) >= _MONEY_LIMIT:
+        raise ValidationError({field_name: f'Значение {value} не помещается в '
+                                           f'{MONEY_MAX_DIGITS} цифр с {MONEY_DECIMAL_PLACES} знаками после запятой'})
+
+
+def validate_wallet_balance(balance: Decimal, reserved_balance: Decimal = Decimal('0.00')):
+    """
+    Проверяет баланс кошелька: от нуля до MAX_WALLET_BALANCE, зарезервированная
+    сумма - от нуля до баланса.
+
+    Raises:
+        ValidationError: Если баланс или зарезервированная сумма вне допустимого диапазона
+    """
+    validate_money(balance, 'balance')
+    if balance > MAX_WALLET_BALANCE:
+        raise ValidationError({'balance': f'Баланс {balance} превышает максимально допустимый {MAX_WALLET_BALANCE}'})
+    validate_money(reserved_balance, 'reserved_balance')
+    if reserved_balance > balance:
+        raise ValidationError({'reserved_balance': f'Зарезервированная сумма {reserved_balance} '
+                                                   f'превышает баланс {balance}'})
+
+
+def validate_transaction(transaction: TransactionDTO):
+    """
+    Проверяет данные транзакции перед записью.
+
+    Raises:
+        ValidationError: Если данные транзакции некорректны
+    """
+    validate_transaction_data(transaction)
+    validate_transaction_balances(transaction)
+
+
+def validate_transaction_data(transaction: TransactionDTO):
+    """
+    Проверяет данные транзакции, кроме балансов: их можно проверить до записи,
+    даже если балансы вычисляются тем же запросом, что и вставка транзакции.
+
+    Raises:
+        ValidationError: Если данные транзакции некорректны
+    """
+    if transaction.wallet_id is None:
+        raise ValidationError({'wallet': 'Не указан кошелек'})
+    if transaction.operation_type not in OPERATION_TYPE_VALUES:
+        raise ValidationError({'operation_type': f'Неизвестный тип операции {transaction.operation_type}'})
+    if transaction.status not in TRANSACTION_STATUS_VALUES:
+        raise ValidationError({'status': f'Неизвестный статус {transaction.status}'})
+    validate_money(transaction.amount, 'amount', min_value=MIN_TRANSACTION_AMOUNT)
+    if transaction.operation_type == OperationType.HOLD and transaction.expires_at is None:
+        raise ValidationError({'expires_at': 'Не указан срок действия резерва'})
+    if transaction.idempotency_key is not None and len(transaction.idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValidationError({'idempotency_key': f'Ключ идемпотентности длиннее {IDEMPOTENCY_KEY_MAX_LENGTH} символов'})
+
+
+def validate_transaction_balances(transaction: TransactionDTO):
+    """
+    Проверяет балансы транзакции до и после операции.
+
+    Raises:
+        ValidationError: Если баланс некорректен или не заполнен у успешной транзакции
+    """
+    for field_name in ('balance_before', 'balance_after'):
+        balance = getattr(transaction, field_name)
+        if balance is not None:
+            validate_money(balance, field_name)
+        elif transaction.status == TransactionStatus.SUCCESS:
+            raise ValidationError({field_name: 'Баланс успешной транзакции должен быть заполнен'})
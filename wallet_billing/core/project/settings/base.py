@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.apps.common.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,6 +86,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Кэш кошельков по умолчанию локальный для процесса: сброс после операции виден только
+# в воркере, который ее выполнил, остальные воркеры отдают старые данные не дольше TTL.
+# Для общего кэша между воркерами укажите WALLET_CACHE_BACKEND и WALLET_CACHE_LOCATION.
+WALLET_CACHE_BACKEND = env.str("WALLET_CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "wallets": {
+        "BACKEND": WALLET_CACHE_BACKEND,
+        "LOCATION": env.str("WALLET_CACHE_LOCATION", default="wallets"),
+        "TIMEOUT": env.int("WALLET_CACHE_TTL", default=5),
+        "OPTIONS": {
+            "MAX_ENTRIES": env.int("WALLET_CACHE_MAX_ENTRIES", default=10000),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -127,8 +151,70 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# WALLETS
+
+# Реализация WalletCommandService: pessimistic (select_for_update), atomic_update (один условный UPDATE),
+# optimistic (UPDATE с проверкой версии кошелька и повтором при конфликте)
+# или sharded (pessimistic с поддержкой шардированного баланса, обязателен при использовании shard_wallet)
+WALLET_COMMAND_MODE = env.str("WALLET_COMMAND_MODE", default="pessimistic")
+
+# Максимальное ожидание блокировки кошелька в операции (0 - без ограничения). При превышении
+# запрос завершается ответом 429 с заголовком Retry-After: WALLET_LOCK_RETRY_AFTER секунд
+WALLET_LOCK_TIMEOUT_MS = env.int("WALLET_LOCK_TIMEOUT_MS", default=2000)
+WALLET_LOCK_RETRY_AFTER = env.int("WALLET_LOCK_RETRY_AFTER", default=1)
+
+# Чтение кошелька через кэш "wallets". Кэш сбрасывается только в процессе, изменившем кошелек,
+# поэтому с LocMemCache (у каждого воркера свой) другие воркеры отдают старый баланс до WALLET_CACHE_TTL.
+# По умолчанию кэш включен только с общим для воркеров WALLET_CACHE_BACKEND (Redis, Memcached).
+# После сброса кошелек не сохраняется в кэш WALLET_CACHE_INVALIDATION_TTL секунд: чтение, начатое до фиксации
+# изменения, не вернет в кэш старые данные
+WALLET_CACHE_ENABLED = env.bool(
+    "WALLET_CACHE_ENABLED",
+    default=WALLET_CACHE_BACKEND != "django.core.cache.backends.locmem.LocMemCache"
+)
+WALLET_CACHE_INVALIDATION_TTL = env.float("WALLET_CACHE_INVALIDATION_TTL", default=2)
+
+# Режим сервера (см. entrypoint.sh): wsgi - синхронные воркеры gunicorn, asgi - воркеры uvicorn
+SERVER_MODE = env.str("SERVER_MODE", default="wsgi")
+
+# Объединение параллельных операций одного кошелька в пакеты: пакет выполняется через
+# WALLET_COALESCING_WINDOW_MS или при достижении WALLET_COALESCING_MAX_BATCH_SIZE операций.
+# Работает только при SERVER_MODE=asgi: синхронный воркер wsgi обрабатывает один запрос за раз,
+# параллельных операций в процессе нет, поэтому при SERVER_MODE=wsgi настройка ничего не делает
+WALLET_COALESCING_ENABLED = env.bool("WALLET_COALESCING_ENABLED", default=False)
+WALLET_COALESCING_WINDOW_MS = env.float("WALLET_COALESCING_WINDOW_MS", default=2)
+WALLET_COALESCING_MAX_BATCH_SIZE = env.int("WALLET_COALESCING_MAX_BATCH_SIZE", default=100)
+
+# Поток изменений балансов GET /api/v1/wallets/stream (только в режиме SERVER_MODE=asgi):
+# операции отправляют NOTIFY, один слушатель на процесс раздает изменения подписчикам
+WALLET_CHANGE_STREAM_ENABLED = env.bool("WALLET_CHANGE_STREAM_ENABLED", default=False)
+WALLET_CHANGE_STREAM_HEARTBEAT_SECONDS = env.int("WALLET_CHANGE_STREAM_HEARTBEAT_SECONDS", default=15)
+
+# Срок действия резерва средств по умолчанию и максимальный, после истечения резерв снимает release_expired_holds
+WALLET_HOLD_TTL_SECONDS = env.int("WALLET_HOLD_TTL_SECONDS", default=900)
+WALLET_HOLD_MAX_TTL_SECONDS = env.int("WALLET_HOLD_MAX_TTL_SECONDS", default=7 * 24 * 3600)
+
+# Профиль блокировок кошельков: ожидание и удержание select_for_update() самых часто блокируемых кошельков.
+# Каждый процесс хранит до WALLET_LOCK_PROFILE_CAPACITY кошельков и раз в WALLET_LOCK_PROFILE_DUMP_INTERVAL
+# секунд записывает их в WALLET_LOCK_PROFILE_DIR, отчет (wallet_lock_report, /api/v1/wallets/locks) объединяет процессы
+WALLET_LOCK_PROFILING_ENABLED = env.bool("WALLET_LOCK_PROFILING_ENABLED", default=False)
+WALLET_LOCK_PROFILE_CAPACITY = env.int("WALLET_LOCK_PROFILE_CAPACITY", default=1000)
+WALLET_LOCK_PROFILE_DIR = env.str("WALLET_LOCK_PROFILE_DIR", default="/tmp/wallet-lock-profile")
+WALLET_LOCK_PROFILE_DUMP_INTERVAL = env.float("WALLET_LOCK_PROFILE_DUMP_INTERVAL", default=10)
+
+# Время хранения ключей идемпотентности, после которого их очищает prune_idempotency_keys
+IDEMPOTENCY_KEY_TTL_HOURS = env.int("IDEMPOTENCY_KEY_TTL_HOURS", default=24)
+
+
 # LOGGER
 
+# Записи логов передаются в очередь и выводятся фоновым потоком, запросы не ждут записи в поток.
+# При заполнении очереди (LOG_QUEUE_SIZE) записи отбрасываются. LOG_FORMAT: text или json.
+# LOG_SUCCESS_SAMPLE_RATE - доля записей INFO приложения, попадающих в лог (предупреждения и ошибки - все)
+LOG_FORMAT = env.str("LOG_FORMAT", default="text")
+LOG_QUEUE_SIZE = env.int("LOG_QUEUE_SIZE", default=10_000)
+LOG_SUCCESS_SAMPLE_RATE = env.float("LOG_SUCCESS_SAMPLE_RATE", default=1.0)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -139,13 +225,26 @@ LOGGING = {
             'style': '{',
             'datefmt': '%H:%M:%S',
         },
+        'json': {
+            '()': 'core.apps.common.logs.JSONFormatter',
+        },
+    },
+
+    'filters': {
+        'success_sampling': {
+            '()': 'core.apps.common.logs.SuccessSamplingFilter',
+            'rate': LOG_SUCCESS_SAMPLE_RATE,
+            'loggers': ('core.apps',),
+        },
     },
 
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': 'core.apps.common.logs.QueueLogHandler',
+            'queue_size': LOG_QUEUE_SIZE,
             'level': 'INFO',
-            'formatter': 'simple',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'simple',
+            'filters': ['success_sampling'],
         },
     },
 
@@ -5,11 +5,29 @@ python manage.py migrate
 # Загрузка фикстур в определенном порядке
 python manage.py loaddata users.json wallets.json
 
+# Снимки последних транзакций кошельков, которые еще не построены
+python manage.py rebuild_last_transactions --missing-only
+
+# Режим запуска: wsgi (синхронные воркеры) или asgi (асинхронные uvicorn-воркеры)
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  APP_ARGS="--worker-class uvicorn_worker.UvicornWorker core.project.asgi:application"
+else
+  APP_ARGS="core.project.wsgi:application"
+fi
+
+# Общий каталог метрик воркеров gunicorn, очищается при каждом запуске
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+# Профили блокировок кошельков процессов предыдущего запуска
+rm -rf "${WALLET_LOCK_PROFILE_DIR:-/tmp/wallet-lock-profile}"
+
 gunicorn \
+  --config gunicorn.conf.py \
   --access-logfile - \
   --error-logfile - \
   --log-level info \
   --capture-output \
-  --workers 4 \
+  --workers ${GUNICORN_WORKERS:-4} \
   --bind 0.0.0.0:8000 \
-  core.project.wsgi:application
\ No newline at end of file
+  ${APP_ARGS}
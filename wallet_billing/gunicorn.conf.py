@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Помечает воркер завершившимся: его счетчики остаются в сумме метрик, а значения live-gauge удаляются."""
+    multiprocess.mark_process_dead(worker.pid)
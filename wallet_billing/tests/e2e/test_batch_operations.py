@@ -0,0 +1,43 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from core.apps.wallets.models.wallets import Wallet
+from tests.factories.wallets import WalletFactory
+
+
+URL = "/api/v1/wallets/operations/batch"
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBatchOperations:
+
+    def test_batch_operations(self, client):
+        """
+        Тестирует пакетное выполнение операций.
+        Проверяет результаты по каждой операции и итоговые балансы кошельков.
+        """
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        payload = {
+            "operations": [
+                {"wallet_id": str(wallet.id), "operation_type": "deposit", "amount": "50"},
+                {"wallet_id": str(wallet.id), "operation_type": "withdrawal", "amount": "1000"},
+                {"wallet_id": str(uuid.uuid4()), "operation_type": "deposit", "amount": "50"},
+                {"wallet_id": str(wallet.id), "operation_type": "invalid", "amount": "50"},
+            ]
+        }
+        response = client.post(URL, payload, content_type="application/json")
+        results = response.json()["data"]
+
+        assert response.status_code == 200
+        assert [result["success"] for result in results] == [True, False, False, False]
+        assert [result["error_code"] for result in results] == [None, 400, 404, 400]
+        assert results[0]["transaction"]["balance"] == "150.00"
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('150.00')
+
+    def test_batch_operations_empty(self, client):
+        """Пустой пакет отклоняется валидацией."""
+        response = client.post(URL, {"operations": []}, content_type="application/json")
+
+        assert response.status_code == 422
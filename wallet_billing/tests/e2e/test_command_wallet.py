@@ -1,10 +1,14 @@
+import io
 import uuid
 
 import pytest
+from django.core.management import call_command
 
 from core.apps.common.enums import OperationType
+from core.apps.wallets import factories
 from core.apps.wallets.models.wallets import Wallet
 from tests.factories.wallets import WalletFactory
+from tests.services.test_wallet_lock_timeout import WalletLockHolder
 
 
 @pytest.fixture
@@ -97,4 +101,174 @@ class TestCommandWallet:
         }
         response = client.post(get_url(wallet_id), operation_data, content_type="application/json")
 
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+    def test_wallet_operation_replay_with_idempotency_key(self, client):
+        """
+        Тестирует повтор операции с тем же заголовком Idempotency-Key.
+        Проверяет, что возвращается та же транзакция, а баланс изменяется один раз.
+        """
+        wallet = WalletFactory()
+        operation_data = {
+            "operation_type": "deposit",
+            "amount": "1000"
+        }
+        first = client.post(get_url(wallet.id), operation_data, content_type="application/json",
+                            headers={"Idempotency-Key": "retry-key"})
+        second = client.post(get_url(wallet.id), operation_data, content_type="application/json",
+                             headers={"Idempotency-Key": "retry-key"})
+
+        assert first.status_code == second.status_code == 201
+        assert first.json()["data"]["transaction_id"] == second.json()["data"]["transaction_id"]
+        assert Wallet.objects.get(id=wallet.id).balance == wallet.balance + 1000
+
+    def test_wallet_operation_with_reused_idempotency_key(self, client):
+        """
+        Тестирует повтор ключа Idempotency-Key с другой суммой.
+        Проверяет, что API возвращает ошибку 422.
+        """
+        wallet = WalletFactory()
+        client.post(get_url(wallet.id), {"operation_type": "deposit", "amount": "1000"},
+                    content_type="application/json", headers={"Idempotency-Key": "retry-key"})
+        response = client.post(get_url(wallet.id), {"operation_type": "deposit", "amount": "10"},
+                               content_type="application/json", headers={"Idempotency-Key": "retry-key"})
+
+        assert response.status_code == 422
+
+    def test_wallet_transfer(self, client):
+        """
+        Тестирует перевод средств между кошельками.
+        Проверяет корректность ответа API и балансы обоих кошельков.
+        """
+        source = WalletFactory()
+        target = WalletFactory()
+        response = client.post(f"/api/v1/wallets/{source.id}/transfer",
+                               {"target_wallet_id": str(target.id), "amount": "0.01"},
+                               content_type="application/json")
+        response_data = response.json()
+
+        assert response.status_code == 201
+        assert response_data["data"]["source_transaction"]["operation_type"] == "Перевод"
+        assert response_data["data"]["source_transaction"]["balance"] == str(Wallet.objects.get(id=source.id).balance)
+        assert response_data["data"]["target_transaction"]["balance"] == str(Wallet.objects.get(id=target.id).balance)
+
+    def test_async_wallet_operation(self, client):
+        """
+        Тестирует асинхронный режим операции.
+        Проверяет ответ 202, неизменный баланс до обработки очереди и статус операции после нее.
+        """
+        wallet = WalletFactory()
+        balance_before = wallet.balance
+        response = client.post(f"{get_url(wallet.id)}?mode=async", {"operation_type": "deposit", "amount": "10"},
+                               content_type="application/json")
+        response_data = response.json()
+        transaction_id = response_data["data"]["transaction_id"]
+
+        assert response.status_code == 202
+        assert response_data["data"]["status"] == "В обработке"
+        assert response_data["data"]["balance"] is None
+        assert Wallet.objects.get(id=wallet.id).balance == balance_before
+
+        call_command("process_pending_operations", "--once", stdout=io.StringIO())
+        status_response = client.get(f"/api/v1/wallets/{wallet.id}/operations/{transaction_id}")
+
+        assert status_response.status_code == 200
+        assert status_response.json()["data"]["status"] == "Успешно"
+        assert status_response.json()["data"]["error"] is None
+        assert Wallet.objects.get(id=wallet.id).balance == balance_before + 10
+
+    def test_wallet_hold_and_capture(self, client):
+        """
+        Тестирует резервирование и списание резерва.
+        Проверяет доступную сумму кошелька после резерва и баланс после списания.
+        """
+        wallet = WalletFactory(balance="100.00")
+        hold_response = client.post(f"/api/v1/wallets/{wallet.id}/holds", {"amount": "30", "ttl_seconds": 60},
+                                    content_type="application/json")
+        hold_id = hold_response.json()["data"]["transaction_id"]
+        wallet_data = client.get(f"/api/v1/wallets/{wallet.id}").json()["data"]
+
+        assert hold_response.status_code == 201
+        assert hold_response.json()["data"]["status"] == "В обработке"
+        assert wallet_data["balance"] == "100.00"
+        assert wallet_data["available_balance"] == "70.00"
+
+        capture_response = client.post(f"/api/v1/wallets/{wallet.id}/holds/{hold_id}/capture", {"amount": "20"},
+                                       content_type="application/json")
+        repeated_response = client.post(f"/api/v1/wallets/{wallet.id}/holds/{hold_id}/release")
+
+        assert capture_response.status_code == 201
+        assert capture_response.json()["data"]["operation_type"] == "Списание резерва"
+        assert capture_response.json()["data"]["balance"] == "80.00"
+        assert repeated_response.status_code == 409
+        assert Wallet.objects.get(id=wallet.id).reserved_balance == 0
+
+    def test_get_unknown_wallet_operation(self, client):
+        """Тестирует запрос статуса несуществующей операции."""
+        wallet = WalletFactory()
+
+        response = client.get(f"/api/v1/wallets/{wallet.id}/operations/{uuid.uuid4()}")
+
+        assert response.status_code == 404
+
+
+@pytest.fixture
+def wallet_lock_timeout(settings):
+    """Короткое ожидание блокировки кошелька для сервисов из фабрик."""
+    settings.WALLET_LOCK_TIMEOUT_MS = 100
+    settings.WALLET_LOCK_RETRY_AFTER = 2
+    factories.get_wallet_command_service.cache_clear()
+    factories.get_billing_use_case.cache_clear()
+    yield
+    factories.get_wallet_command_service.cache_clear()
+    factories.get_billing_use_case.cache_clear()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_wallet_operation_on_locked_wallet_returns_retry_after(client, wallet_lock_timeout):
+    """Операция с занятым кошельком возвращает 429 с заголовком Retry-After."""
+    wallet = WalletFactory()
+
+    with WalletLockHolder(wallet.id):
+        response = client.post(get_url(wallet.id), {"operation_type": "deposit", "amount": "10"},
+                               content_type="application/json")
+
+    assert response.status_code == 429
+    assert response["Retry-After"] == "2"
+
+
+@pytest.fixture
+def wallet_lock_profiling(settings, tmp_path):
+    """Профиль блокировок кошельков для сервисов из фабрик."""
+    settings.WALLET_LOCK_PROFILING_ENABLED = True
+    settings.WALLET_LOCK_PROFILE_DIR = str(tmp_path)
+    cached_factories = (factories.get_wallet_lock_profiler, factories.get_wallet_command_service,
+                        factories.get_billing_use_case)
+    for factory in cached_factories:
+        factory.cache_clear()
+    yield
+    for factory in cached_factories:
+        factory.cache_clear()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_wallet_locks_report(client, wallet_lock_profiling):
+    """Отчет о блокировках содержит кошельки, заблокированные операциями."""
+    wallet = WalletFactory()
+    for _ in range(2):
+        client.post(get_url(wallet.id), {"operation_type": "deposit", "amount": "10"}, content_type="application/json")
+
+    response = client.get("/api/v1/wallets/locks?limit=5")
+
+    assert response.status_code == 200
+    wallet_stats, = response.json()["data"]
+    assert wallet_stats["wallet_id"] == str(wallet.id)
+    assert wallet_stats["lock_count"] == 2
+    assert wallet_stats["hold_max_ms"] >= wallet_stats["hold_avg_ms"] > 0
+
+
+def test_wallet_locks_report_disabled(client):
+    """Без WALLET_LOCK_PROFILING_ENABLED отчет о блокировках недоступен."""
+    response = client.get("/api/v1/wallets/locks")
+
+    assert response.status_code == 503
@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+
+from tests.factories.wallets import WalletFactory
+
+
+WALLET_ROUTE = 'api/v1/wallets/<wallet_id>'
+
+
+def get_sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_metrics(self, client):
+        """
+        Тестирует метрики запроса.
+        Проверяет, что запросы учитываются по шаблону маршрута вместе с количеством запросов к БД.
+        """
+        wallet = WalletFactory()
+        labels = {'method': 'GET', 'route': WALLET_ROUTE}
+        requests_before = get_sample('wallet_http_requests_total', status='200', **labels)
+        queries_before = get_sample('wallet_http_request_db_queries_sum', **labels)
+
+        client.get(f'/api/v1/wallets/{wallet.id}')
+        client.get(f'/api/v1/wallets/{wallet.id}')
+
+        assert get_sample('wallet_http_requests_total', status='200', **labels) == requests_before + 2
+        assert get_sample('wallet_http_request_duration_seconds_count', **labels) >= 2
+        assert get_sample('wallet_http_request_db_queries_sum', **labels) >= queries_before + 2
+
+    def test_operation_and_service_exception_metrics(self, client):
+        """
+        Тестирует счетчики операций и ошибок сервисов.
+        Проверяет, что успешная операция и операция с ошибкой учитываются по типу и результату.
+        """
+        wallet = WalletFactory()
+        deposits_before = get_sample('wallet_billing_operations_total', operation_type='deposit', outcome='success')
+        rejections_before = get_sample('wallet_billing_operations_total', operation_type='withdrawal',
+                                       outcome='InsufficientFundsException')
+        exceptions_before = get_sample('wallet_service_exceptions_total',
+                                       exception='InsufficientFundsException', status='400')
+
+        client.post(f'/api/v1/wallets/{wallet.id}/operation',
+                    {'operation_type': 'deposit', 'amount': '10'}, content_type='application/json')
+        response = client.post(f'/api/v1/wallets/{wallet.id}/operation',
+                               {'operation_type': 'withdrawal', 'amount': '1000000'}, content_type='application/json')
+
+        assert response.status_code == 400
+        assert get_sample('wallet_billing_operations_total',
+                          operation_type='deposit', outcome='success') == deposits_before + 1
+        assert get_sample('wallet_billing_operations_total', operation_type='withdrawal',
+                          outcome='InsufficientFundsException') == rejections_before + 1
+        assert get_sample('wallet_service_exceptions_total',
+                          exception='InsufficientFundsException', status='400') == exceptions_before + 1
+
+    def test_unsupported_operation_type_metric(self, client):
+        """
+        Тестирует метку неподдерживаемого типа операции.
+        Проверяет, что произвольный тип из запроса учитывается под меткой unsupported, а не создает новый ряд.
+        """
+        wallet = WalletFactory()
+        operation_type = f'invented-{uuid.uuid4()}'
+        unsupported_before = get_sample('wallet_billing_operations_total', operation_type='unsupported',
+                                        outcome='UnsupportedOperationException')
+
+        response = client.post(f'/api/v1/wallets/{wallet.id}/operation',
+                               {'operation_type': operation_type, 'amount': '10'}, content_type='application/json')
+
+        assert response.status_code == 400
+        assert get_sample('wallet_billing_operations_total', operation_type='unsupported',
+                          outcome='UnsupportedOperationException') == unsupported_before + 1
+        assert REGISTRY.get_sample_value('wallet_billing_operations_total', {
+            'operation_type': operation_type, 'outcome': 'UnsupportedOperationException'
+        }) is None
+
+    def test_metrics_endpoint(self, client):
+        """
+        Тестирует эндпоинт метрик.
+        Проверяет, что метрики отдаются в текстовом формате Prometheus.
+        """
+        client.get(f'/api/v1/wallets/{uuid.uuid4()}')
+
+        response = client.get('/api/metrics')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        content = response.content.decode()
+        assert 'wallet_http_request_duration_seconds_bucket' in content
+        assert f'route="{WALLET_ROUTE}"' in content
@@ -1,7 +1,14 @@
+import inspect
+import json
 import uuid
+from decimal import Decimal
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
 
+from core.api.v1.wallets import handlers
+from core.apps.wallets import factories
 from tests.factories.wallets import WalletFactory, WalletTransactionFactory
 
 
@@ -32,9 +39,164 @@ class TestQueryWallet:
         assert response_data["data"]["last_transaction_list"][0]["transaction_id"] == str(tr2.id)
 
 
+    def test_get_wallet_not_modified(self, client, django_capture_on_commit_callbacks):
+        """
+        Тестирует условный запрос кошелька.
+        Проверяет 304 для неизменившегося кошелька и новый ETag после операции.
+        """
+        wallet = WalletFactory()
+        WalletTransactionFactory(wallet=wallet)
+        response = client.get(get_url(wallet.id))
+        etag = response["ETag"]
+
+        not_modified = client.get(get_url(wallet.id), headers={"If-None-Match": etag})
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(f"{get_url(wallet.id)}/operation",
+                        {"operation_type": "deposit", "amount": "10.00"}, content_type="application/json")
+        modified = client.get(get_url(wallet.id), headers={"If-None-Match": etag})
+
+        assert not_modified.status_code == 304
+        assert not_modified["ETag"] == etag
+        assert not_modified.content == b""
+        assert modified.status_code == 200
+        assert modified["ETag"] != etag
+        assert modified.json()["data"]["balance"] == str(wallet.balance + Decimal("10.00"))
+
+    def test_get_wallet_without_conditional_headers_reads_wallet_once(self, client, django_assert_num_queries):
+        """
+        Тестирует запрос кошелька без If-None-Match и If-Modified-Since.
+        Проверяет, что валидаторы берутся из загруженного кошелька без отдельного запроса.
+        """
+        wallet = WalletFactory()
+        etag = client.get(get_url(wallet.id))["ETag"]
+
+        with django_assert_num_queries(1):
+            response = client.get(get_url(wallet.id))
+
+        assert response.status_code == 200
+        assert response["ETag"] == etag
+
     def test_get_wallet_with_wallet_id_not_found(self, client):
         wallet_id = uuid.uuid4()
 
         response = client.get(get_url(wallet_id), content_type="application/json")
 
-        assert response.status_code == 404
\ No newline at end of file
+        assert response.status_code == 404
+
+
+    def test_get_wallet_transactions_pagination(self, client):
+        """
+        Тестирует получение истории транзакций по страницам.
+        Проверяет, что курсор из meta ведет на следующую страницу.
+        """
+        wallet = WalletFactory()
+        tr1 = WalletTransactionFactory(wallet=wallet)
+        tr2 = WalletTransactionFactory(wallet=wallet)
+
+        first_page = client.get(f"{get_url(wallet.id)}/transactions", {"limit": 1}).json()
+        second_page = client.get(f"{get_url(wallet.id)}/transactions",
+                                 {"limit": 1, "cursor": first_page["meta"]["next_cursor"]}).json()
+
+        assert [tr["transaction_id"] for tr in first_page["data"]] == [str(tr2.id)]
+        assert [tr["transaction_id"] for tr in second_page["data"]] == [str(tr1.id)]
+        assert second_page["meta"]["next_cursor"] is None
+
+    def test_lookup_wallets(self, client):
+        """
+        Тестирует получение нескольких кошельков одним запросом.
+        Проверяет данные кошельков и списки ненайденных идентификаторов.
+        """
+        wallet, user_wallet = WalletFactory.create_batch(2)
+        transaction = WalletTransactionFactory(wallet=wallet)
+        missing_wallet_id = str(uuid.uuid4())
+        payload = {"wallet_ids": [str(wallet.id), missing_wallet_id], "user_ids": [user_wallet.user_id, 0]}
+
+        response = client.post("/api/v1/wallets/lookup", payload, content_type="application/json")
+        response_data = response.json()
+        wallets = {item["wallet_id"]: item for item in response_data["data"]}
+
+        assert response.status_code == 200
+        assert set(wallets) == {str(wallet.id), str(user_wallet.id)}
+        assert wallets[str(user_wallet.id)]["user_id"] == user_wallet.user_id
+        assert wallets[str(wallet.id)]["last_transaction_list"][0]["transaction_id"] == str(transaction.id)
+        assert response_data["meta"] == {"missing_wallet_ids": [missing_wallet_id], "missing_user_ids": [0]}
+
+    def test_lookup_wallets_empty(self, client):
+        """Запрос без идентификаторов отклоняется валидацией."""
+        response = client.post("/api/v1/wallets/lookup", {}, content_type="application/json")
+
+        assert response.status_code == 422
+
+
+@pytest.fixture
+def wallet_change_stream(settings):
+    """Включенный поток изменений балансов с остановкой слушателя после теста."""
+    settings.WALLET_CHANGE_STREAM_ENABLED = True
+    settings.SERVER_MODE = "asgi"
+    factories.get_wallet_change_listener.cache_clear()
+    yield
+    factories.get_wallet_change_listener().stop()
+    factories.get_wallet_change_listener.cache_clear()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_wallet_change_stream_sends_current_balance(async_client, wallet_change_stream):
+    """
+    Тестирует поток изменений балансов.
+    Проверяет формат SSE и событие с текущим балансом сразу после подключения.
+    """
+    wallet = WalletFactory(balance="100.00")
+
+    async def read_first_event():
+        response = await async_client.get(f"/api/v1/wallets/stream?wallet_id={wallet.id}")
+        events = aiter(response.streaming_content)
+        first_event = await anext(events)
+        await events.aclose()
+        return response, first_event
+
+    response, first_event = async_to_sync(read_first_event)()
+    event_name, data = first_event.decode().strip().split("\n")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/event-stream"
+    assert event_name == "event: balance"
+    assert json.loads(data.removeprefix("data: "))["available_balance"] == "100.00"
+
+
+@pytest.mark.django_db
+def test_wallet_change_stream_disabled(client):
+    """Тестирует ответ потока изменений, если он отключен."""
+    response = client.get(f"/api/v1/wallets/stream?wallet_id={uuid.uuid4()}")
+
+    assert response.status_code == 503
+
+
+@pytest.mark.django_db
+def test_wallet_change_stream_requires_asgi(client, settings):
+    """Тестирует ответ потока изменений в режиме wsgi: поток не открывается и воркер не занимается."""
+    settings.WALLET_CHANGE_STREAM_ENABLED = True
+    settings.SERVER_MODE = "wsgi"
+
+    response = client.get(f"/api/v1/wallets/stream?wallet_id={uuid.uuid4()}")
+
+    assert response.status_code == 503
+    assert not response.streaming
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_handler_variant_matches_sync_handler(client, rf, settings):
+    """
+    В режиме wsgi зарегистрирован синхронный обработчик,
+    асинхронный вариант того же обработчика для режима asgi возвращает те же данные.
+    """
+    wallet = WalletFactory()
+    WalletTransactionFactory(wallet=wallet)
+
+    response = client.get(get_url(wallet.id))
+    settings.SERVER_MODE = "asgi"
+    aget_wallet = handlers.service_handler(handlers.get_wallet.__wrapped__)
+    async_result = async_to_sync(aget_wallet)(rf.get(get_url(wallet.id)), HttpResponse(), uuid.UUID(str(wallet.id)))
+
+    assert not inspect.iscoroutinefunction(handlers.get_wallet)
+    assert inspect.iscoroutinefunction(aget_wallet)
+    assert json.loads(async_result.model_dump_json()) == response.json()
@@ -0,0 +1,60 @@
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from ninja.renderers import JSONRenderer
+
+from core.api.renderers import ORJSONRenderer
+from core.api.v1.schemas import ApiResponse
+from core.api.v1.wallets.schemas import WalletDataOutSchema
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.services.wallets import WalletQueryService
+from tests.factories.wallets import WalletFactory, WalletTransactionFactory
+
+
+def render(renderer, data) -> dict:
+    return json.loads(renderer.render(None, data, response_status=200))
+
+
+class TestORJSONRenderer:
+
+    @pytest.mark.django_db
+    def test_wallet_response_matches_json_renderer(self):
+        """
+        Тестирует рендеринг ответа кошелька.
+        Проверяет, что ответ совпадает с ответом стандартного JSONRenderer.
+        """
+        wallet = WalletFactory()
+        WalletTransactionFactory.create_batch(3, wallet=wallet)
+        wallet_dto = WalletQueryService().get_wallet_by_id(wallet.id)
+        data = ApiResponse(data=WalletDataOutSchema.from_dto(wallet_dto)).model_dump()
+
+        rendered = render(ORJSONRenderer(), data)
+
+        assert rendered == render(JSONRenderer(), data)
+        assert rendered["data"]["balance"] == str(wallet_dto.balance)
+        assert rendered["data"]["last_transaction_list"][0]["created_at"] == (
+            wallet_dto.last_transaction[0].created_at.strftime("%d.%m.%Y %H:%M:%S")
+        )
+
+    def test_values_without_native_orjson_support(self):
+        """Суммы, даты, UUID и перечисления записываются так же, как стандартным JSONRenderer."""
+        data = {
+            "amount": Decimal("150.00"),
+            "created_at": datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            "id": uuid.uuid4(),
+            "status": TransactionStatus.SUCCESS,
+            "name": OperationType.DEPOSIT.display_name,
+        }
+
+        assert render(ORJSONRenderer(), data) == render(JSONRenderer(), data)
+
+    def test_compact_utf8_output(self):
+        """Ответ записывается без пробелов-разделителей и без экранирования не-ASCII символов."""
+        data = {"name": OperationType.DEPOSIT.display_name, "amount": Decimal("150.00")}
+
+        rendered = ORJSONRenderer().render(None, data, response_status=200)
+
+        assert rendered == f'{{"name":"{OperationType.DEPOSIT.display_name}","amount":"150.00"}}'.encode()
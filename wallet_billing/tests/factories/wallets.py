@@ -35,3 +35,10 @@ class WalletTransactionFactory(factory.django.DjangoModelFactory):
     amount = factory.Faker("pydecimal", left_digits=4, right_digits=2, positive=True)
     wallet = factory.SubFactory(WalletFactory)
     status = factory.Faker("random_element", elements=["success",])
+
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        transaction_model = super()._create(model_class, *args, **kwargs)
+        # Транзакция создана в обход сервисов, поэтому снимок последних транзакций кошелька пересобирается
+        Wallet.objects.filter(id=transaction_model.wallet_id).rebuild_last_transactions()
+        return transaction_model
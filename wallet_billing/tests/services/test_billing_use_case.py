@@ -6,8 +6,9 @@ import pytest
 
 from core.apps.common.enums import OperationType, TransactionStatus
 from core.apps.wallets.dto.transaction import TransactionDTO
-from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.dto.wallets import WalletOperationDTO, WalletOperationResultDTO
 from core.apps.wallets.exception.billings import UnsupportedOperationException
+from core.apps.wallets.exception.transaction import IdempotencyKeyConflictException
 
 from core.apps.wallets.use_cases.billing_use_case import BillingUseCase
 
@@ -81,4 +82,88 @@ class TestBillingUseCase:
         with pytest.raises(UnsupportedOperationException):
             billing_use_case.process_operation(operation=operation_dto)
             wallet_service.deposit.assert_not_called()
-            wallet_service.withdrawal.assert_not_called()
\ No newline at end of file
+            wallet_service.withdrawal.assert_not_called()
+
+    def test_billing_batch_rejects_unsupported_operations(self, billing_use_case, sample_transaction_dto):
+        """
+        Тестирует пакетную обработку с неподдерживаемым типом операции.
+        Проверяет, что такая операция не передается в сервис кошелька, а порядок результатов сохраняется.
+        """
+        billing_use_case, wallet_service = billing_use_case
+        deposit = WalletOperationDTO(
+            wallet_id=sample_transaction_dto.wallet_id,
+            operation_type=OperationType.DEPOSIT,
+            amount=sample_transaction_dto.amount
+        )
+        invalid = WalletOperationDTO(
+            wallet_id=sample_transaction_dto.wallet_id,
+            operation_type="invalid",
+            amount=sample_transaction_dto.amount
+        )
+        wallet_service.apply_batch.return_value = [
+            WalletOperationResultDTO(operation=deposit, transaction=sample_transaction_dto)
+        ]
+
+        results = billing_use_case.process_batch(operations=[invalid, deposit])
+
+        wallet_service.apply_batch.assert_called_once_with([deposit])
+        assert isinstance(results[0].error, UnsupportedOperationException)
+        assert results[1].transaction == sample_transaction_dto
+
+    def test_billing_replay_by_idempotency_key(self, billing_use_case, sample_transaction_dto):
+        """
+        Тестирует повторный запрос с тем же ключом идемпотентности.
+        Проверяет, что сохраненная транзакция возвращается без вызова сервиса кошелька.
+        """
+        billing_use_case, wallet_service = billing_use_case
+        wallet_service.transaction_service.get_by_idempotency_key.return_value = sample_transaction_dto
+        operation_dto = WalletOperationDTO(
+            wallet_id=sample_transaction_dto.wallet_id,
+            operation_type=OperationType.DEPOSIT,
+            amount=sample_transaction_dto.amount,
+            idempotency_key="key"
+        )
+
+        transaction_dto = billing_use_case.process_operation(operation=operation_dto)
+
+        assert transaction_dto == sample_transaction_dto
+        wallet_service.deposit.assert_not_called()
+
+    def test_billing_idempotency_key_conflict_returns_stored_transaction(self, billing_use_case, sample_transaction_dto):
+        """
+        Тестирует гонку двух запросов с одним ключом идемпотентности.
+        Проверяет, что проигравший запрос возвращает транзакцию, сохраненную победителем.
+        """
+        billing_use_case, wallet_service = billing_use_case
+        wallet_service.transaction_service.get_by_idempotency_key.side_effect = [None, sample_transaction_dto]
+        wallet_service.deposit.side_effect = IdempotencyKeyConflictException()
+        operation_dto = WalletOperationDTO(
+            wallet_id=sample_transaction_dto.wallet_id,
+            operation_type=OperationType.DEPOSIT,
+            amount=sample_transaction_dto.amount,
+            idempotency_key="key"
+        )
+
+        transaction_dto = billing_use_case.process_operation(operation=operation_dto)
+
+        assert transaction_dto == sample_transaction_dto
+
+    def test_billing_submit_operation(self, billing_use_case, sample_transaction_dto):
+        """
+        Тестирует прием операции в асинхронном режиме.
+        Проверяет, что операция передается в submit, а не выполняется сразу.
+        """
+        billing_use_case, wallet_service = billing_use_case
+        sample_transaction_dto.status = TransactionStatus.IN_PROCESSING
+        wallet_service.submit.return_value = sample_transaction_dto
+        operation_dto = WalletOperationDTO(
+            wallet_id=sample_transaction_dto.wallet_id,
+            operation_type=OperationType.DEPOSIT,
+            amount=sample_transaction_dto.amount
+        )
+
+        transaction_dto = billing_use_case.submit_operation(operation=operation_dto)
+
+        assert transaction_dto == sample_transaction_dto
+        wallet_service.submit.assert_called_once_with(operation_dto)
+        wallet_service.deposit.assert_not_called()
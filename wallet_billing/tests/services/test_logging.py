@@ -0,0 +1,75 @@
+import io
+import logging
+import threading
+import uuid
+from decimal import Decimal
+
+import orjson
+from prometheus_client import REGISTRY
+
+from core.apps.common.enums import OperationType
+from core.apps.common.logs import JSONFormatter, QueueLogHandler, SuccessSamplingFilter
+
+
+def make_record(name='core.apps.wallets.services.wallets', level=logging.INFO, msg='Пополнение кошелька %s на %s',
+                args=(uuid.UUID(int=1), Decimal('10.00')), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class BlockingStream(io.StringIO):
+    """Поток, запись в который ждет события release."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait()
+        return super().write(text)
+
+
+class TestLogging:
+    """Тесты для конвейера логов: очередь, JSON-формат и выборка записей."""
+
+    def test_json_formatter_outputs_template_args_and_extra(self):
+        """JSON-запись содержит сообщение, шаблон с аргументами и поля extra."""
+        record = make_record(operation_type=OperationType.DEPOSIT)
+
+        entry = orjson.loads(JSONFormatter().format(record))
+
+        assert entry['level'] == 'INFO'
+        assert entry['logger'] == 'core.apps.wallets.services.wallets'
+        assert entry['message'] == f'Пополнение кошелька {uuid.UUID(int=1)} на 10.00'
+        assert entry['template'] == 'Пополнение кошелька %s на %s'
+        assert entry['args'] == [str(uuid.UUID(int=1)), '10.00']
+        assert entry['operation_type'] == 'deposit'
+
+    def test_sampling_drops_only_success_records(self):
+        """При rate=0 отбрасываются записи INFO приложения, предупреждения и записи Django проходят."""
+        sampling_filter = SuccessSamplingFilter(rate=0.0)
+
+        assert not sampling_filter.filter(make_record())
+        assert sampling_filter.filter(make_record(level=logging.WARNING))
+        assert sampling_filter.filter(make_record(name='django.request'))
+        assert SuccessSamplingFilter(rate=1.0).filter(make_record())
+
+    def test_queue_handler_does_not_block_on_stream(self):
+        """Запись лога не ждет вывода в поток, записи сверх размера очереди отбрасываются и учитываются метрикой."""
+        stream = BlockingStream()
+        handler = QueueLogHandler(queue_size=2, stream=stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        dropped_before = REGISTRY.get_sample_value('wallet_logs_dropped_total') or 0
+
+        for _ in range(5):
+            handler.handle(make_record())
+
+        # Одна запись ждет в потоке QueueListener, две - в очереди, остальные отброшены
+        assert 2 <= handler.dropped <= 3
+        assert REGISTRY.get_sample_value('wallet_logs_dropped_total') == dropped_before + handler.dropped
+        stream.release.set()
+        handler.close()
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 5 - handler.dropped
+        assert lines[0] == f'Пополнение кошелька {uuid.UUID(int=1)} на 10.00'
@@ -0,0 +1,163 @@
+import io
+import json
+import threading
+import uuid
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.outbox import OutboxPublishException
+from core.apps.wallets.models.outbox import OutboxEvent
+from core.apps.wallets.services.outbox import (
+    TRANSACTION_CREATED,
+    TRANSACTION_UPDATED,
+    BaseOutboxSink,
+    HttpOutboxSink,
+    OutboxService,
+    StreamOutboxSink,
+)
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture
+def wallet_service():
+    """Фикстура для создания экземпляра WalletCommandService."""
+    return WalletCommandService(transaction_service=TransactionService())
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+class FailingOutboxSink(BaseOutboxSink):
+    def publish(self, events):
+        raise OutboxPublishException(sink='failing', reason='недоступен')
+
+
+class EventsHandler(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.received.append(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def events_server():
+    """Локальный HTTP-сервер, принимающий пачки событий."""
+    EventsHandler.received = []
+    server = HTTPServer(('127.0.0.1', 0), EventsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/events', EventsHandler.received
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOutbox:
+    """Тесты для transactional outbox."""
+
+    def test_operation_records_event_with_transaction(self, wallet_service):
+        """Операция записывает событие с данными созданной транзакции."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        transaction_dto = wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+
+        event = OutboxEvent.objects.get()
+        assert event.event_type == TRANSACTION_CREATED
+        assert event.wallet_id == transaction_dto.wallet_id
+        assert event.payload['transaction_id'] == str(transaction_dto.id)
+        assert event.payload['operation_type'] == 'deposit'
+        assert event.payload['balance_after'] == '110.00'
+
+    def test_rolled_back_operation_leaves_no_event(self, wallet_service):
+        """Событие не остается в outbox, если транзакция БД операции откатилась."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+                raise RuntimeError
+
+        assert not OutboxEvent.objects.exists()
+
+    def test_pending_operation_records_update_event(self, wallet_service):
+        """Выполнение асинхронной операции записывает событие с ее итоговым статусом."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service.submit(make_operation(wallet.id, OperationType.WITHDRAWAL, '10.00'))
+
+        wallet_service.process_pending_operations(batch_size=10)
+
+        event = OutboxEvent.objects.order_by('-id').first()
+        assert event.event_type == TRANSACTION_UPDATED
+        assert event.payload['status'] == 'success'
+        assert event.payload['balance_after'] == '90.00'
+
+    def test_relay_publishes_batches_in_order_and_deletes_them(self, wallet_service):
+        """Relay публикует события пачками в порядке создания и удаляет опубликованные."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        for _ in range(3):
+            wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '1.00'))
+        event_ids = list(OutboxEvent.objects.order_by('id').values_list('id', flat=True))
+        stream = io.StringIO()
+        sink = StreamOutboxSink(stream=stream)
+
+        assert OutboxService.relay(sink=sink, batch_size=2) == 2
+        assert OutboxService.relay(sink=sink, batch_size=2) == 1
+        assert OutboxService.relay(sink=sink, batch_size=2) == 0
+
+        published = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [event['id'] for event in published] == event_ids
+        assert not OutboxEvent.objects.exists()
+
+    def test_failed_publish_keeps_events(self, wallet_service):
+        """При ошибке публикации события остаются в outbox для повторной отправки."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '1.00'))
+
+        with pytest.raises(OutboxPublishException):
+            OutboxService.relay(sink=FailingOutboxSink(), batch_size=10)
+
+        assert OutboxEvent.objects.count() == 1
+
+    def test_http_sink_posts_batch(self, wallet_service, events_server):
+        """HTTP-получатель отправляет пачку событий одним запросом."""
+        url, received = events_server
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        for _ in range(2):
+            wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '1.00'))
+
+        assert OutboxService.relay(sink=HttpOutboxSink(url=url), batch_size=10) == 2
+
+        assert len(received) == 1
+        assert len(received[0]['events']) == 2
+
+    def test_command_writes_events_to_file(self, wallet_service, tmp_path):
+        """Команда relay_outbox дописывает события в файл по одному JSON на строку."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        for _ in range(3):
+            wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '1.00'))
+        path = tmp_path / 'events.jsonl'
+
+        call_command('relay_outbox', '--sink', 'file', '--path', str(path), '--batch-size', '2', '--once',
+                     stderr=io.StringIO())
+
+        assert len(path.read_text().splitlines()) == 3
+        assert not OutboxEvent.objects.exists()
@@ -0,0 +1,101 @@
+import threading
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.wallets import WalletNotFoundException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture
+def wallet_service():
+    """Фикстура для создания экземпляра WalletCommandService."""
+    return WalletCommandService(transaction_service=TransactionService())
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPendingOperations:
+    """Тесты для асинхронного режима операций."""
+
+    def test_submit_records_operation_without_changing_balance(self, wallet_service):
+        """Принятая операция сохраняется в статусе IN_PROCESSING без изменения баланса."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        transaction_dto = wallet_service.submit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+
+        assert transaction_dto.status == TransactionStatus.IN_PROCESSING
+        assert transaction_dto.balance_after is None
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('100.00')
+
+    def test_submit_to_nonexistent_wallet_raises_exception(self, wallet_service):
+        """Операция для несуществующего кошелька не принимается."""
+        with pytest.raises(WalletNotFoundException):
+            wallet_service.submit(make_operation(uuid.uuid4(), OperationType.DEPOSIT, '10.00'))
+
+    def test_pending_operations_are_applied_in_submission_order(self, wallet_service):
+        """Обработчик выполняет операции в порядке приема, отклоненные переводит в FAILED."""
+        wallet = WalletFactory(balance=Decimal('10.00'))
+        submitted = [
+            wallet_service.submit(make_operation(wallet.id, OperationType.WITHDRAWAL, '50.00')),
+            wallet_service.submit(make_operation(wallet.id, OperationType.DEPOSIT, '100.00')),
+            wallet_service.submit(make_operation(wallet.id, OperationType.WITHDRAWAL, '50.00')),
+        ]
+
+        processed = wallet_service.process_pending_operations(batch_size=10)
+
+        failed, deposit, withdrawal = [WalletTransaction.objects.get(id=dto.id) for dto in submitted]
+        assert processed == 3
+        assert failed.status == TransactionStatus.FAILED
+        assert failed.error_message
+        assert failed.balance_after is None
+        assert deposit.status == TransactionStatus.SUCCESS
+        assert deposit.balance_after == Decimal('110.00')
+        assert withdrawal.balance_before == Decimal('110.00')
+        assert withdrawal.balance_after == Decimal('60.00')
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('60.00')
+        assert wallet_service.process_pending_operations(batch_size=10) == 0
+
+    def test_locked_pending_operation_is_skipped(self, wallet_service):
+        """Операция, заблокированная другим обработчиком, пропускается без ожидания."""
+        wallet = WalletFactory(balance=Decimal('10.00'))
+        locked = wallet_service.submit(make_operation(wallet.id, OperationType.DEPOSIT, '1.00'))
+        other = wallet_service.submit(make_operation(wallet.id, OperationType.DEPOSIT, '2.00'))
+        row_locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    WalletTransaction.objects.select_for_update().get(id=locked.id)
+                    row_locked.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        row_locked.wait(timeout=10)
+        try:
+            processed = wallet_service.process_pending_operations(batch_size=10)
+        finally:
+            release.set()
+            holder.join()
+
+        assert processed == 1
+        assert WalletTransaction.objects.get(id=other.id).status == TransactionStatus.SUCCESS
+        assert WalletTransaction.objects.get(id=locked.id).status == TransactionStatus.IN_PROCESSING
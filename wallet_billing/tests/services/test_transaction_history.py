@@ -0,0 +1,76 @@
+import datetime
+import uuid
+
+import pytest
+from django.utils import timezone
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.transaction import TransactionFiltersDTO
+from core.apps.wallets.exception.transaction import InvalidCursorException
+from core.apps.wallets.exception.wallets import WalletNotFoundException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.services.transactions import TransactionQueryService
+from tests.factories.wallets import WalletFactory, WalletTransactionFactory
+
+
+@pytest.fixture
+def transaction_query_service():
+    """Фикстура для создания экземпляра TransactionQueryService."""
+    return TransactionQueryService()
+
+
+@pytest.mark.django_db
+class TestTransactionQueryService:
+    """Тесты для курсорной пагинации истории транзакций."""
+
+    def test_pages_cover_history_without_gaps(self, transaction_query_service):
+        """Страницы по курсору возвращают всю историю без пропусков и повторов, в том числе при равном created_at."""
+        wallet = WalletFactory()
+        transactions = WalletTransactionFactory.create_batch(5, wallet=wallet)
+        same_time = timezone.now() - datetime.timedelta(minutes=1)
+        WalletTransaction.objects.filter(id__in=[tr.id for tr in transactions[:3]]).update(created_at=same_time)
+
+        pages = []
+        cursor = None
+        while True:
+            page = transaction_query_service.get_wallet_transactions(
+                wallet_id=wallet.id, filters=TransactionFiltersDTO(), cursor=cursor, limit=2
+            )
+            pages.append([str(transaction.id) for transaction in page.items])
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        expected = [tr.id for tr in reversed(transactions[3:])] + sorted(tr.id for tr in transactions[:3])
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert sum(pages, []) == expected
+
+    def test_filter_by_operation_type(self, transaction_query_service):
+        """Фильтр по типу операции возвращает только транзакции этого типа."""
+        wallet = WalletFactory()
+        WalletTransactionFactory.create_batch(2, wallet=wallet, operation_type=OperationType.DEPOSIT)
+        withdrawal = WalletTransactionFactory(wallet=wallet, operation_type=OperationType.WITHDRAWAL)
+
+        page = transaction_query_service.get_wallet_transactions(
+            wallet_id=wallet.id,
+            filters=TransactionFiltersDTO(operation_type=OperationType.WITHDRAWAL),
+            cursor=None,
+            limit=10
+        )
+
+        assert [str(transaction.id) for transaction in page.items] == [withdrawal.id]
+        assert page.next_cursor is None
+
+    def test_invalid_cursor(self, transaction_query_service):
+        """Некорректный курсор вызывает исключение."""
+        with pytest.raises(InvalidCursorException):
+            transaction_query_service.get_wallet_transactions(
+                wallet_id=uuid.uuid4(), filters=TransactionFiltersDTO(), cursor="invalid", limit=10
+            )
+
+    def test_wallet_not_found(self, transaction_query_service):
+        """История несуществующего кошелька вызывает исключение."""
+        with pytest.raises(WalletNotFoundException):
+            transaction_query_service.get_wallet_transactions(
+                wallet_id=uuid.uuid4(), filters=TransactionFiltersDTO(), cursor=None, limit=10
+            )
@@ -0,0 +1,71 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.wallets import InsufficientFundsException, WalletNotFoundException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture
+def wallet_service():
+    """Фикстура для создания экземпляра WalletCommandService."""
+    return WalletCommandService(transaction_service=TransactionService())
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletServiceBatch:
+    """Тесты для пакетного выполнения операций."""
+
+    def test_batch_applies_operations_in_order(self, wallet_service):
+        """Операции пакета применяются последовательно, баланс учитывает предыдущие операции."""
+        first_wallet = WalletFactory(balance=Decimal('100.00'))
+        second_wallet = WalletFactory(balance=Decimal('50.00'))
+        operations = [
+            make_operation(first_wallet.id, OperationType.DEPOSIT, '25.00'),
+            make_operation(second_wallet.id, OperationType.WITHDRAWAL, '50.00'),
+            make_operation(first_wallet.id, OperationType.WITHDRAWAL, '125.00'),
+        ]
+
+        results = wallet_service.apply_batch(operations)
+
+        assert [result.error for result in results] == [None, None, None]
+        assert results[0].transaction.balance_after == Decimal('125.00')
+        assert results[2].transaction.balance_before == Decimal('125.00')
+        assert results[2].transaction.balance_after == Decimal('0.00')
+        assert all(result.transaction.status == TransactionStatus.SUCCESS for result in results)
+        assert Wallet.objects.get(id=first_wallet.id).balance == Decimal('0.00')
+        assert Wallet.objects.get(id=second_wallet.id).balance == Decimal('0.00')
+        assert WalletTransaction.objects.count() == 3
+
+    def test_failed_operation_does_not_affect_others(self, wallet_service):
+        """Ошибка одной операции возвращается в ее результате, остальные выполняются."""
+        wallet = WalletFactory(balance=Decimal('10.00'))
+        operations = [
+            make_operation(wallet.id, OperationType.WITHDRAWAL, '20.00'),
+            make_operation(uuid.uuid4(), OperationType.DEPOSIT, '5.00'),
+            make_operation(wallet.id, OperationType.DEPOSIT, '5.00'),
+        ]
+
+        results = wallet_service.apply_batch(operations)
+
+        assert isinstance(results[0].error, InsufficientFundsException)
+        assert isinstance(results[1].error, WalletNotFoundException)
+        assert results[2].error is None
+        assert results[2].transaction.balance_after == Decimal('15.00')
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('15.00')
+        assert WalletTransaction.objects.count() == 1
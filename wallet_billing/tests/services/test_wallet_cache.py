@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+import pytest
+from prometheus_client import REGISTRY
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.services.cache import WalletCacheService
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import CachedWalletQueryService, WalletCommandService, WalletQueryService
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture
+def wallet_cache():
+    """Фикстура для создания кэша кошельков с очисткой между тестами."""
+    wallet_cache = WalletCacheService()
+    wallet_cache.cache.clear()
+    yield wallet_cache
+    wallet_cache.cache.clear()
+
+
+@pytest.fixture
+def cached_query_service(wallet_cache):
+    """Фикстура для создания экземпляра CachedWalletQueryService."""
+    return CachedWalletQueryService(query_service=WalletQueryService(), wallet_cache=wallet_cache)
+
+
+class TestCachedWalletQueryService:
+    """Тесты для чтения кошелька через кэш."""
+
+    @pytest.mark.django_db
+    def test_second_read_is_served_from_cache(self, cached_query_service, wallet_cache, django_assert_num_queries):
+        """Повторное чтение кошелька не обращается к базе данных."""
+        wallet = WalletFactory()
+        first = cached_query_service.get_wallet_by_id(wallet.id)
+
+        with django_assert_num_queries(0):
+            second = cached_query_service.get_wallet_by_id(wallet.id)
+
+        assert first == second
+        assert (wallet_cache.stats.hits, wallet_cache.stats.misses) == (1, 1)
+
+    @pytest.mark.django_db
+    def test_hits_and_misses_are_exported(self, cached_query_service):
+        """Попадания и промахи кэша учитываются в метрике wallet_cache_requests_total."""
+        wallet = WalletFactory()
+        hits_before, misses_before = (
+            REGISTRY.get_sample_value('wallet_cache_requests_total', {'result': result}) or 0
+            for result in ('hit', 'miss')
+        )
+
+        cached_query_service.get_wallet_by_id(wallet.id)
+        cached_query_service.get_wallet_by_id(wallet.id)
+
+        assert REGISTRY.get_sample_value('wallet_cache_requests_total', {'result': 'hit'}) == hits_before + 1
+        assert REGISTRY.get_sample_value('wallet_cache_requests_total', {'result': 'miss'}) == misses_before + 1
+
+    @pytest.mark.django_db
+    def test_wallet_loaded_before_invalidation_is_not_cached(self, wallet_cache):
+        """Кошелек, загруженный до сброса кэша и сохраняемый после него, не остается в кэше."""
+        stale_wallet, other_wallet = (WalletQueryService().get_wallet_by_id(wallet.id)
+                                      for wallet in WalletFactory.create_batch(2))
+
+        wallet_cache.invalidate([stale_wallet.id])
+        wallet_cache.set(stale_wallet)
+        wallet_cache.set_many([stale_wallet, other_wallet])
+
+        assert wallet_cache.get(stale_wallet.id) is None
+        assert wallet_cache.get(other_wallet.id) == other_wallet
+
+    @pytest.mark.django_db(transaction=True)
+    def test_operation_invalidates_cache_on_commit(self, cached_query_service, wallet_cache):
+        """После фиксации операции кэш кошелька сбрасывается и чтение возвращает новый баланс."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service = WalletCommandService(transaction_service=TransactionService(), wallet_cache=wallet_cache)
+        cached_query_service.get_wallet_by_id(wallet.id)
+
+        wallet_service.deposit(WalletOperationDTO(
+            wallet_id=wallet.id,
+            operation_type=OperationType.DEPOSIT,
+            amount=Decimal('50.00')
+        ))
+
+        assert wallet_cache.get(wallet.id) is None
+        assert cached_query_service.get_wallet_by_id(wallet.id).balance == Decimal('150.00')
+
+    @pytest.mark.django_db
+    def test_get_wallets_reads_only_missing_from_database(self, cached_query_service, wallet_cache,
+                                                          django_assert_num_queries):
+        """Кошельки из кэша не запрашиваются повторно, промахи загружаются одним запросом и кэшируются."""
+        cached_wallet, missing_wallet = WalletFactory.create_batch(2)
+        cached_query_service.get_wallet_by_id(cached_wallet.id)
+
+        wallet_ids = [cached_wallet.id, missing_wallet.id]
+        with django_assert_num_queries(1):
+            first = cached_query_service.get_wallets(wallet_ids=wallet_ids, user_ids=[])
+        with django_assert_num_queries(0):
+            second = cached_query_service.get_wallets(wallet_ids=wallet_ids, user_ids=[])
+
+        assert first == second == WalletQueryService().get_wallets(wallet_ids=wallet_ids, user_ids=[])
@@ -0,0 +1,98 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.wallets import InsufficientFundsException
+from core.apps.wallets.services.notifications import WalletChangeListener
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture
+def wallet_service():
+    """Фикстура для создания WalletCommandService с уведомлениями об изменениях."""
+    return WalletCommandService(transaction_service=TransactionService(), notify_changes=True)
+
+
+@pytest.fixture
+def listener():
+    """Слушатель уведомлений, останавливаемый после теста."""
+    wallet_change_listener = WalletChangeListener(poll_timeout=0.05)
+    yield wallet_change_listener
+    wallet_change_listener.stop()
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+async def wait_for_listener(subscription, timeout=5.0):
+    """Ожидает начальные балансы, которые слушатель рассылает после подключения."""
+    return await subscription.get(timeout=timeout)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletChangeStream:
+    """Тесты для уведомлений об изменении балансов."""
+
+    def test_subscriber_receives_committed_change(self, wallet_service, listener):
+        """Подписчик получает новый баланс кошелька после фиксации операции."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_id = uuid.UUID(str(wallet.id))
+
+        async def scenario():
+            subscription = listener.subscribe({wallet_id})
+            initial = await wait_for_listener(subscription)
+            await sync_to_async(wallet_service.deposit)(make_operation(wallet_id, OperationType.DEPOSIT, '10.00'))
+            change = await subscription.get(timeout=5.0)
+            listener.unsubscribe(subscription)
+            return initial, change
+
+        initial, change = async_to_sync(scenario)()
+
+        assert initial.balance == Decimal('100.00')
+        assert change.wallet_id == wallet_id
+        assert change.balance == Decimal('110.00')
+        assert change.version == initial.version + 1
+
+    def test_rolled_back_operation_is_not_delivered(self, wallet_service, listener):
+        """Отклоненная операция не доставляется подписчикам."""
+        wallet = WalletFactory(balance=Decimal('10.00'))
+        wallet_id = uuid.UUID(str(wallet.id))
+
+        async def scenario():
+            subscription = listener.subscribe({wallet_id})
+            await wait_for_listener(subscription)
+            with pytest.raises(InsufficientFundsException):
+                await sync_to_async(wallet_service.withdrawal)(
+                    make_operation(wallet_id, OperationType.WITHDRAWAL, '50.00')
+                )
+            change = await subscription.get(timeout=0.5)
+            listener.unsubscribe(subscription)
+            return change
+
+        assert async_to_sync(scenario)() is None
+
+    def test_other_wallets_are_not_delivered(self, wallet_service, listener):
+        """Подписчик не получает изменения кошельков, на которые не подписан."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        other_wallet = WalletFactory(balance=Decimal('100.00'))
+
+        async def scenario():
+            subscription = listener.subscribe({uuid.UUID(str(wallet.id))})
+            await wait_for_listener(subscription)
+            await sync_to_async(wallet_service.deposit)(make_operation(other_wallet.id, OperationType.DEPOSIT, '1.00'))
+            change = await subscription.get(timeout=0.5)
+            listener.unsubscribe(subscription)
+            return change
+
+        assert async_to_sync(scenario)() is None
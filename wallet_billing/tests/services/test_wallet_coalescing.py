@@ -0,0 +1,135 @@
+import asyncio
+import uuid
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets import factories
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.wallets import InsufficientFundsException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.coalescing import WalletOperationCoalescer
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService
+from core.apps.wallets.use_cases.billing_use_case import BillingUseCase
+from tests.factories.wallets import WalletFactory
+
+
+class CountingWalletCommandService(WalletCommandService):
+    """WalletCommandService, запоминающий размеры выполненных пакетов."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_sizes = []
+
+    def apply_batch(self, operations):
+        self.batch_sizes.append(len(operations))
+        return super().apply_batch(operations)
+
+
+@pytest.fixture
+def wallet_service():
+    return CountingWalletCommandService(transaction_service=TransactionService())
+
+
+def make_operation(wallet_id, operation_type, amount, idempotency_key=None):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount),
+        idempotency_key=idempotency_key
+    )
+
+
+async def submit_all(billing_use_case, operations):
+    return await asyncio.gather(
+        *(billing_use_case.aprocess_operation(operation) for operation in operations),
+        return_exceptions=True
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletOperationCoalescer:
+    """Тесты для объединения параллельных операций кошелька в пакеты."""
+
+    def test_concurrent_operations_are_applied_in_one_batch(self, wallet_service):
+        """Параллельные операции одного кошелька выполняются одним пакетом, каждый получает свою транзакцию."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        billing_use_case = BillingUseCase(
+            wallet_service=wallet_service,
+            operation_coalescer=WalletOperationCoalescer(wallet_service=wallet_service, window=0.05)
+        )
+        operations = [make_operation(wallet.id, OperationType.DEPOSIT, '10.00') for _ in range(5)]
+
+        transactions = async_to_sync(submit_all)(billing_use_case, operations)
+
+        assert wallet_service.batch_sizes == [5]
+        assert [transaction.balance_after for transaction in transactions] == [
+            Decimal('110.00'), Decimal('120.00'), Decimal('130.00'), Decimal('140.00'), Decimal('150.00')
+        ]
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('150.00')
+
+    def test_failed_withdrawal_does_not_fail_other_operations(self, wallet_service):
+        """Отклоненное списание возвращает ошибку только своему вызывающему."""
+        wallet = WalletFactory(balance=Decimal('10.00'))
+        billing_use_case = BillingUseCase(
+            wallet_service=wallet_service,
+            operation_coalescer=WalletOperationCoalescer(wallet_service=wallet_service, window=0.05)
+        )
+        operations = [
+            make_operation(wallet.id, OperationType.DEPOSIT, '20.00'),
+            make_operation(wallet.id, OperationType.WITHDRAWAL, '500.00'),
+            make_operation(wallet.id, OperationType.WITHDRAWAL, '5.00'),
+        ]
+
+        deposit, failed_withdrawal, withdrawal = async_to_sync(submit_all)(billing_use_case, operations)
+
+        assert isinstance(failed_withdrawal, InsufficientFundsException)
+        assert deposit.balance_after == Decimal('30.00')
+        assert withdrawal.balance_after == Decimal('25.00')
+        assert WalletTransaction.objects.filter(wallet_id=wallet.id).count() == 2
+
+    def test_batch_is_flushed_when_max_batch_size_reached(self, wallet_service):
+        """Пакет выполняется при достижении max_batch_size, остальные операции попадают в следующий."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        billing_use_case = BillingUseCase(
+            wallet_service=wallet_service,
+            operation_coalescer=WalletOperationCoalescer(wallet_service=wallet_service, window=0.05,
+                                                         max_batch_size=3)
+        )
+        operations = [make_operation(wallet.id, OperationType.DEPOSIT, '1.00') for _ in range(5)]
+
+        async_to_sync(submit_all)(billing_use_case, operations)
+
+        assert sorted(wallet_service.batch_sizes) == [2, 3]
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('105.00')
+
+    def test_operation_with_idempotency_key_is_not_coalesced(self, wallet_service):
+        """Операция с ключом идемпотентности выполняется отдельно от пакетов."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        billing_use_case = BillingUseCase(
+            wallet_service=wallet_service,
+            operation_coalescer=WalletOperationCoalescer(wallet_service=wallet_service)
+        )
+
+        transaction = async_to_sync(billing_use_case.aprocess_operation)(
+            make_operation(wallet.id, OperationType.DEPOSIT, '10.00', idempotency_key='key-1')
+        )
+
+        assert wallet_service.batch_sizes == []
+        assert transaction.idempotency_key == 'key-1'
+
+
+@pytest.mark.parametrize('server_mode, enabled', [('wsgi', False), ('asgi', True)])
+def test_coalescer_is_created_only_in_asgi_mode(settings, server_mode, enabled):
+    """В режиме wsgi объединение операций не включается даже при WALLET_COALESCING_ENABLED=True."""
+    settings.WALLET_COALESCING_ENABLED = True
+    settings.SERVER_MODE = server_mode
+    factories.get_wallet_operation_coalescer.cache_clear()
+    try:
+        assert (factories.get_wallet_operation_coalescer() is not None) is enabled
+    finally:
+        factories.get_wallet_operation_coalescer.cache_clear()
@@ -0,0 +1,247 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.utils import timezone
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.wallets import WalletHoldDTO, WalletHoldSettlementDTO, WalletOperationDTO
+from core.apps.wallets.exception.holds import (
+    HoldAmountExceededException,
+    HoldExpiredException,
+    HoldNotActiveException,
+    HoldNotFoundException,
+)
+from core.apps.wallets.exception.wallets import InsufficientFundsException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.shards import WalletShardService
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import (
+    AtomicUpdateWalletCommandService,
+    OptimisticWalletCommandService,
+    ShardedWalletCommandService,
+    WalletCommandService,
+)
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture(params=[
+    WalletCommandService,
+    AtomicUpdateWalletCommandService,
+    OptimisticWalletCommandService,
+    ShardedWalletCommandService,
+])
+def wallet_service(request):
+    """Фикстура для создания экземпляров всех реализаций сервиса."""
+    return request.param(transaction_service=TransactionService())
+
+
+def make_hold(wallet_id, amount, ttl_seconds=60):
+    return WalletHoldDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        amount=Decimal(amount),
+        expires_at=timezone.now() + datetime.timedelta(seconds=ttl_seconds)
+    )
+
+
+def make_settlement(hold, amount=None):
+    return WalletHoldSettlementDTO(wallet_id=hold.wallet_id, hold_id=hold.id,
+                                   amount=Decimal(amount) if amount is not None else None)
+
+
+def expire(hold):
+    WalletTransaction.objects.filter(id=hold.id).update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletHolds:
+    """Тесты для резервирования средств кошелька."""
+
+    def test_hold_reserves_funds_without_changing_balance(self, wallet_service):
+        """Резерв не меняет баланс, но уменьшает доступную для списания сумму."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        hold = wallet_service.hold(make_hold(wallet.id, '70.00'))
+
+        wallet.refresh_from_db()
+        assert hold.operation_type == OperationType.HOLD
+        assert hold.status == TransactionStatus.IN_PROCESSING
+        assert wallet.balance == Decimal('100.00')
+        assert wallet.reserved_balance == Decimal('70.00')
+        with pytest.raises(InsufficientFundsException):
+            wallet_service.withdrawal(WalletOperationDTO(
+                wallet_id=hold.wallet_id,
+                operation_type=OperationType.WITHDRAWAL,
+                amount=Decimal('40.00')
+            ))
+
+    def test_hold_exceeding_available_balance_raises_exception(self, wallet_service):
+        """Резерв больше доступной суммы отклоняется."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service.hold(make_hold(wallet.id, '60.00'))
+
+        with pytest.raises(InsufficientFundsException):
+            wallet_service.hold(make_hold(wallet.id, '50.00'))
+
+        assert Wallet.objects.get(id=wallet.id).reserved_balance == Decimal('60.00')
+
+    def test_partial_capture_releases_remainder(self, wallet_service):
+        """Списание части резерва уменьшает баланс на списанную сумму и освобождает остаток."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(make_hold(wallet.id, '70.00'))
+
+        capture = wallet_service.capture(make_settlement(hold, '50.00'))
+
+        wallet.refresh_from_db()
+        hold_model = WalletTransaction.objects.get(id=hold.id)
+        assert wallet.balance == Decimal('50.00')
+        assert wallet.reserved_balance == Decimal('0.00')
+        assert capture.operation_type == OperationType.CAPTURE
+        assert capture.balance_after == Decimal('50.00')
+        assert capture.related_transaction_id == hold.id
+        assert hold_model.status == TransactionStatus.SUCCESS
+        assert hold_model.related_transaction_id == capture.id
+
+    def test_capture_more_than_hold_raises_exception(self, wallet_service):
+        """Списание больше суммы резерва отклоняется."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(make_hold(wallet.id, '10.00'))
+
+        with pytest.raises(HoldAmountExceededException):
+            wallet_service.capture(make_settlement(hold, '10.01'))
+
+    def test_release_frees_reserved_funds(self, wallet_service):
+        """Снятие резерва освобождает сумму без изменения баланса, повторное снятие отклоняется."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(make_hold(wallet.id, '70.00'))
+
+        release = wallet_service.release(make_settlement(hold))
+
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal('100.00')
+        assert wallet.reserved_balance == Decimal('0.00')
+        assert release.operation_type == OperationType.RELEASE
+        assert WalletTransaction.objects.get(id=hold.id).status == TransactionStatus.CANCELED
+        with pytest.raises(HoldNotActiveException):
+            wallet_service.capture(make_settlement(hold))
+
+    def test_expired_hold_cannot_be_captured(self, wallet_service):
+        """Резерв с истекшим сроком действия не списывается."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(make_hold(wallet.id, '70.00'))
+        expire(hold)
+
+        with pytest.raises(HoldExpiredException):
+            wallet_service.capture(make_settlement(hold))
+
+    def test_unknown_hold_raises_exception(self, wallet_service):
+        """Резерв другого кошелька или транзакция другого типа не находятся."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(make_hold(wallet.id, '10.00'))
+        other_wallet = WalletFactory(balance=Decimal('100.00'))
+
+        with pytest.raises(HoldNotFoundException):
+            wallet_service.release(WalletHoldSettlementDTO(wallet_id=uuid.UUID(str(other_wallet.id)), hold_id=hold.id))
+
+    def test_release_expired_holds_in_chunks(self, wallet_service):
+        """Истекшие резервы снимаются пачками, активные не затрагиваются."""
+        first_wallet = WalletFactory(balance=Decimal('100.00'))
+        second_wallet = WalletFactory(balance=Decimal('100.00'))
+        expired_holds = [
+            wallet_service.hold(make_hold(first_wallet.id, '10.00')),
+            wallet_service.hold(make_hold(first_wallet.id, '20.00')),
+            wallet_service.hold(make_hold(second_wallet.id, '30.00')),
+        ]
+        active_hold = wallet_service.hold(make_hold(second_wallet.id, '5.00'))
+        for hold in expired_holds:
+            expire(hold)
+
+        assert wallet_service.release_expired_holds(chunk_size=2) == 2
+        assert wallet_service.release_expired_holds(chunk_size=2) == 1
+        assert wallet_service.release_expired_holds(chunk_size=2) == 0
+
+        assert Wallet.objects.get(id=first_wallet.id).reserved_balance == Decimal('0.00')
+        assert Wallet.objects.get(id=second_wallet.id).reserved_balance == Decimal('5.00')
+        for hold in expired_holds:
+            hold_model = WalletTransaction.objects.get(id=hold.id)
+            release = WalletTransaction.objects.get(id=hold_model.related_transaction_id)
+            assert hold_model.status == TransactionStatus.CANCELED
+            assert release.operation_type == OperationType.RELEASE
+            assert release.related_transaction_id == hold.id
+            assert release.balance_after == Decimal('100.00')
+        assert WalletTransaction.objects.get(id=active_hold.id).status == TransactionStatus.IN_PROCESSING
+
+    def test_holds_are_not_processed_as_pending_operations(self, wallet_service):
+        """Активный резерв не выполняется обработчиком асинхронных операций."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(make_hold(wallet.id, '10.00'))
+
+        assert wallet_service.process_pending_operations(batch_size=10) == 0
+        assert WalletTransaction.objects.get(id=hold.id).status == TransactionStatus.IN_PROCESSING
+
+    def test_reserved_balance_above_balance_is_rejected_by_database(self):
+        """Ограничение БД не допускает резерв больше баланса."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        with pytest.raises(IntegrityError):
+            Wallet.objects.filter(id=wallet.id).update(reserved_balance=Decimal('100.01'))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReleaseExpiredHoldsCommand:
+    """Тесты для команды снятия истекших резервов."""
+
+    def test_release_expired_holds_queries_do_not_depend_on_chunk_size(self, django_assert_num_queries):
+        """Пачка снимается фиксированным числом запросов независимо от количества резервов."""
+        wallet_service = WalletCommandService(transaction_service=TransactionService())
+        wallets = [WalletFactory(balance=Decimal('100.00')) for _ in range(3)]
+        for wallet in wallets:
+            for _ in range(5):
+                expire(wallet_service.hold(make_hold(wallet.id, '1.00')))
+
+        # BEGIN, выборка резервов, блокировка кошельков, UPDATE кошельков, вставка транзакций RELEASE
+        # и их событий outbox, обновление резервов и вставка их событий outbox, COMMIT
+        with django_assert_num_queries(9):
+            assert wallet_service.release_expired_holds(chunk_size=100) == 15
+
+    def test_command_releases_all_expired_holds(self):
+        """Команда снимает истекшие резервы всех пачек."""
+        wallet_service = WalletCommandService(transaction_service=TransactionService())
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        for _ in range(5):
+            expire(wallet_service.hold(make_hold(wallet.id, '1.00')))
+
+        call_command('release_expired_holds', chunk_size=2)
+
+        assert Wallet.objects.get(id=wallet.id).reserved_balance == Decimal('0.00')
+        assert not WalletTransaction.objects.filter(
+            operation_type=OperationType.HOLD,
+            status=TransactionStatus.IN_PROCESSING
+        ).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestShardedWalletHolds:
+    """Тесты для резервов шардированного кошелька."""
+
+    def test_hold_uses_funds_from_shards(self):
+        """Резерв шардированного кошелька учитывает средства в частях баланса."""
+        wallet_service = ShardedWalletCommandService(transaction_service=TransactionService())
+        wallet = WalletFactory(balance=Decimal('10.00'))
+        WalletShardService().enable_sharding(wallet_id=wallet.id, shard_count=4)
+        for _ in range(4):
+            wallet_service.deposit(WalletOperationDTO(
+                wallet_id=uuid.UUID(str(wallet.id)),
+                operation_type=OperationType.DEPOSIT,
+                amount=Decimal('25.00')
+            ))
+
+        hold = wallet_service.hold(make_hold(wallet.id, '100.00'))
+        capture = wallet_service.capture(make_settlement(hold))
+
+        assert capture.balance_after == Decimal('10.00')
+        assert WalletShardService.get_total_balance(wallet.id) == Decimal('10.00')
@@ -0,0 +1,173 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.apps.common.enums import OperationType, TransactionStatus
+from core.apps.wallets.dto.wallets import WalletHoldDTO, WalletHoldSettlementDTO, WalletOperationDTO, WalletTransferDTO
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import LAST_TRANSACTIONS_LIMIT, Wallet
+from core.apps.wallets.services.shards import WalletShardService
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import (
+    AtomicUpdateWalletCommandService,
+    OptimisticWalletCommandService,
+    ShardedWalletCommandService,
+    WalletCommandService,
+    WalletQueryService,
+)
+from tests.factories.wallets import WalletFactory, WalletTransactionFactory
+
+
+@pytest.fixture(params=[
+    WalletCommandService,
+    AtomicUpdateWalletCommandService,
+    OptimisticWalletCommandService,
+    ShardedWalletCommandService,
+])
+def wallet_service(request):
+    """Фикстура для создания экземпляров всех реализаций сервиса."""
+    return request.param(transaction_service=TransactionService())
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+def get_snapshot(wallet_id):
+    """Снимок последних транзакций из строки кошелька."""
+    return Wallet.objects.get(id=wallet_id).get_snapshot_transactions()
+
+
+def get_table_last_transactions(wallet_id):
+    """Последние транзакции кошелька из таблицы транзакций."""
+    return [
+        transaction_model.to_dto()
+        for transaction_model in WalletTransaction.objects.filter(wallet_id=wallet_id)
+        .order_by('-created_at')[:LAST_TRANSACTIONS_LIMIT]
+    ]
+
+
+@pytest.mark.django_db
+class TestWalletLastTransactions:
+    """Тесты для снимка последних транзакций кошелька."""
+
+    def test_operations_keep_snapshot_in_sync(self, wallet_service):
+        """Снимок после операций совпадает с последними транзакциями из таблицы и ограничен лимитом."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        for _ in range(LAST_TRANSACTIONS_LIMIT + 2):
+            wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+        wallet_service.withdrawal(make_operation(wallet.id, OperationType.WITHDRAWAL, '5.00'))
+
+        snapshot = get_snapshot(wallet.id)
+        assert snapshot == get_table_last_transactions(wallet.id)
+        assert len(snapshot) == LAST_TRANSACTIONS_LIMIT
+        assert snapshot[0].operation_type == OperationType.WITHDRAWAL
+        assert snapshot[0].balance_after == Decimal('165.00')
+
+    def test_transfer_batch_and_holds_update_snapshots(self):
+        """Переводы, пакеты и резервы обновляют снимки всех затронутых кошельков."""
+        wallet_service = WalletCommandService(transaction_service=TransactionService())
+        source = WalletFactory(balance=Decimal('100.00'))
+        target = WalletFactory(balance=Decimal('100.00'))
+
+        wallet_service.transfer(WalletTransferDTO(
+            source_wallet_id=uuid.UUID(str(source.id)),
+            target_wallet_id=uuid.UUID(str(target.id)),
+            amount=Decimal('10.00')
+        ))
+        wallet_service.apply_batch([
+            make_operation(source.id, OperationType.DEPOSIT, '1.00'),
+            make_operation(target.id, OperationType.WITHDRAWAL, '1000.00'),
+        ])
+        hold = wallet_service.hold(WalletHoldDTO(
+            wallet_id=uuid.UUID(str(target.id)),
+            amount=Decimal('20.00'),
+            expires_at=timezone.now() + datetime.timedelta(seconds=60)
+        ))
+        wallet_service.capture(WalletHoldSettlementDTO(wallet_id=hold.wallet_id, hold_id=hold.id))
+
+        for wallet in (source, target):
+            assert get_snapshot(wallet.id) == get_table_last_transactions(wallet.id)
+        assert [transaction.operation_type for transaction in get_snapshot(target.id)] == [
+            OperationType.CAPTURE, OperationType.HOLD, OperationType.TRANSFER
+        ]
+        assert get_snapshot(target.id)[1].status == TransactionStatus.SUCCESS
+
+    def test_expired_holds_update_snapshots(self):
+        """Снятие истекших резервов обновляет статус резерва в снимке и добавляет снятие."""
+        wallet_service = WalletCommandService(transaction_service=TransactionService())
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        hold = wallet_service.hold(WalletHoldDTO(
+            wallet_id=uuid.UUID(str(wallet.id)),
+            amount=Decimal('20.00'),
+            expires_at=timezone.now() + datetime.timedelta(seconds=60)
+        ))
+        WalletTransaction.objects.filter(id=hold.id).update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+
+        wallet_service.release_expired_holds(chunk_size=10)
+
+        snapshot = get_snapshot(wallet.id)
+        assert snapshot == get_table_last_transactions(wallet.id)
+        assert [(transaction.operation_type, transaction.status) for transaction in snapshot] == [
+            (OperationType.RELEASE, TransactionStatus.SUCCESS),
+            (OperationType.HOLD, TransactionStatus.CANCELED),
+        ]
+
+    def test_pending_operation_enters_snapshot_when_processed(self):
+        """Принятая асинхронная операция попадает в снимок после выполнения обработчиком."""
+        wallet_service = WalletCommandService(transaction_service=TransactionService())
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        submitted = wallet_service.submit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+        rejected = wallet_service.submit(make_operation(wallet.id, OperationType.WITHDRAWAL, '1000.00'))
+        assert get_snapshot(wallet.id) == []
+
+        wallet_service.process_pending_operations(batch_size=10)
+
+        snapshot = get_snapshot(wallet.id)
+        assert snapshot == get_table_last_transactions(wallet.id)
+        assert [(transaction.id, transaction.status) for transaction in snapshot] == [
+            (rejected.id, TransactionStatus.FAILED),
+            (submitted.id, TransactionStatus.SUCCESS),
+        ]
+
+    def test_sharded_wallet_reads_transactions_table(self):
+        """Пополнения частей баланса читаются из таблицы транзакций и попадают в снимок при выключении шардирования."""
+        wallet_service = ShardedWalletCommandService(transaction_service=TransactionService())
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        WalletShardService().enable_sharding(wallet_id=wallet.id, shard_count=2)
+
+        transaction_dto = wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+
+        wallet_data = WalletQueryService().get_wallet_by_id(wallet.id)
+        assert [transaction.id for transaction in wallet_data.last_transaction] == [transaction_dto.id]
+        assert get_snapshot(wallet.id) == []
+
+        WalletShardService().disable_sharding(wallet_id=wallet.id)
+        assert [transaction.id for transaction in get_snapshot(wallet.id)] == [transaction_dto.id]
+
+    def test_rebuild_command_fills_missing_snapshots(self, django_assert_num_queries):
+        """Кошелек без снимка читается из таблицы транзакций, команда строит снимок."""
+        wallet = WalletFactory()
+        transactions = WalletTransactionFactory.create_batch(3, wallet=wallet)
+        Wallet.objects.filter(id=wallet.id).update(last_transactions=None)
+        untouched = WalletFactory()
+
+        with django_assert_num_queries(2):
+            wallet_data = WalletQueryService().get_wallet_by_id(wallet.id)
+        call_command('rebuild_last_transactions', '--missing-only', '--chunk-size', '1')
+
+        assert [str(transaction.id) for transaction in get_snapshot(wallet.id)] == [
+            transaction.id for transaction in reversed(transactions)
+        ]
+        assert get_snapshot(wallet.id) == wallet_data.last_transaction
+        assert Wallet.objects.get(id=untouched.id).last_transactions == []
@@ -0,0 +1,125 @@
+import io
+import shutil
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO, WalletTransferDTO
+from core.apps.wallets.exception.wallets import WalletLockTimeoutException
+from core.apps.wallets.services.locks import WalletLockProfiler, load_lock_profiles
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import ShardedWalletCommandService, WalletCommandService
+from tests.factories.wallets import WalletFactory
+from tests.services.test_wallet_lock_timeout import WalletLockHolder
+
+
+def make_operation(wallet_id, operation_type=OperationType.DEPOSIT, amount='10.00'):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+class TestWalletLockProfiler:
+    """Тесты для профиля блокировок кошельков."""
+
+    def test_profile_keeps_hottest_wallets(self):
+        """При заполнении профиля новый кошелек вытесняет наименее блокируемый и наследует его счетчик."""
+        hot_wallet_id, cold_wallet_id, new_wallet_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        lock_profiler = WalletLockProfiler(capacity=2)
+        for seconds in (0.001, 0.002, 0.100):
+            lock_profiler.record_wait([hot_wallet_id], seconds)
+        lock_profiler.record_wait([cold_wallet_id], 0.001)
+
+        lock_profiler.record_wait([new_wallet_id], 0.001)
+
+        report = lock_profiler.report(limit=10)
+        assert [stats.wallet_id for stats in report] == [hot_wallet_id, new_wallet_id]
+        assert (report[0].lock_count, report[0].lock_count_error) == (3, 0)
+        assert (report[1].lock_count, report[1].lock_count_error) == (2, 1)
+        assert report[0].wait_p50_ms == pytest.approx(2)
+        assert report[0].wait_p99_ms == pytest.approx(100)
+
+    def test_evicts_least_locked_wallet_after_counts_change(self):
+        """Вытесняется кошелек с наименьшим текущим счетчиком, а не с наименьшим на момент добавления."""
+        first_id, second_id, third_id, fourth_id = (uuid.uuid4() for _ in range(4))
+        lock_profiler = WalletLockProfiler(capacity=3)
+        for wallet_id in (first_id, first_id, first_id, second_id, second_id, third_id):
+            lock_profiler.record_wait([wallet_id], 0.001)
+
+        lock_profiler.record_wait([fourth_id], 0.001)
+        lock_profiler.record_wait([fourth_id], 0.001)
+        lock_profiler.record_wait([fourth_id], 0.001)
+        lock_profiler.record_wait([third_id], 0.001)
+
+        assert {wallet_id: entry.count for wallet_id, entry in lock_profiler.entries.items()} == {
+            first_id: 3, fourth_id: 4, third_id: 3
+        }
+
+    def test_profiles_of_processes_are_merged(self, tmp_path):
+        """Отчет объединяет профили, записанные разными процессами."""
+        wallet_id = uuid.uuid4()
+        lock_profiler = WalletLockProfiler(dump_dir=str(tmp_path / 'profiles'))
+        lock_profiler.record_wait([wallet_id], 0.010)
+        lock_profiler.dump()
+        profile_path, = (tmp_path / 'profiles').glob('*.json')
+        shutil.copy(profile_path, tmp_path / 'profiles' / '0.json')
+
+        entries = load_lock_profiles(str(tmp_path / 'profiles'))
+
+        assert entries[wallet_id].count == 2
+        assert list(entries[wallet_id].wait_samples) == [0.010, 0.010]
+
+        stdout = io.StringIO()
+        call_command('wallet_lock_report', '--dir', str(tmp_path / 'profiles'), stdout=stdout)
+        assert str(wallet_id) in stdout.getvalue()
+
+
+@pytest.mark.django_db
+class TestWalletLockProfiling:
+    """Тесты для записи блокировок кошельков сервисом операций."""
+
+    @pytest.mark.parametrize('service_class', [WalletCommandService, ShardedWalletCommandService])
+    def test_operations_record_wait_and_hold(self, service_class, django_capture_on_commit_callbacks):
+        """Операция и перевод записывают ожидание блокировки, удержание - после фиксации транзакции."""
+        lock_profiler = WalletLockProfiler()
+        wallet_service = service_class(transaction_service=TransactionService(), lock_profiler=lock_profiler)
+        source = WalletFactory(balance=Decimal('100.00'))
+        target = WalletFactory(balance=Decimal('100.00'))
+        source_id, target_id = uuid.UUID(str(source.id)), uuid.UUID(str(target.id))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            wallet_service.deposit(make_operation(source.id))
+        with django_capture_on_commit_callbacks(execute=True):
+            wallet_service.transfer(WalletTransferDTO(
+                source_wallet_id=source_id,
+                target_wallet_id=target_id,
+                amount=Decimal('10.00')
+            ))
+
+        assert lock_profiler.entries[source_id].count == 2
+        assert lock_profiler.entries[source_id].hold_count == 2
+        assert lock_profiler.entries[target_id].count == 1
+        assert [stats.wallet_id for stats in lock_profiler.report(limit=1)] == [source_id]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_lock_timeout_records_wait():
+    """Блокировка, не полученная за lock_timeout_ms, записывается как ожидание без удержания."""
+    lock_profiler = WalletLockProfiler()
+    wallet_service = WalletCommandService(transaction_service=TransactionService(), lock_timeout_ms=100,
+                                          lock_profiler=lock_profiler)
+    wallet = WalletFactory(balance=Decimal('100.00'))
+    wallet_id = uuid.UUID(str(wallet.id))
+
+    with WalletLockHolder(wallet.id), pytest.raises(WalletLockTimeoutException):
+        wallet_service.withdrawal(make_operation(wallet.id, OperationType.WITHDRAWAL))
+
+    entry = lock_profiler.entries[wallet_id]
+    assert entry.count == 1
+    assert entry.wait_max >= 0.1
+    assert entry.hold_count == 0
@@ -0,0 +1,83 @@
+import threading
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.db import connection, transaction
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.wallets import WalletLockTimeoutException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import AtomicUpdateWalletCommandService, WalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+class WalletLockHolder:
+    """Удерживает блокировку строки кошелька в отдельном соединении до вызова release."""
+
+    def __init__(self, wallet_id):
+        self.wallet_id = wallet_id
+        self.locked = threading.Event()
+        self.released = threading.Event()
+        self.thread = threading.Thread(target=self._hold)
+
+    def _hold(self):
+        try:
+            with transaction.atomic():
+                Wallet.objects.select_for_update().get(id=self.wallet_id)
+                self.locked.set()
+                self.released.wait(timeout=10)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.thread.start()
+        self.locked.wait(timeout=10)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.released.set()
+        self.thread.join()
+
+
+@pytest.fixture(params=[WalletCommandService, AtomicUpdateWalletCommandService])
+def wallet_service(request):
+    """Фикстура сервиса с ограничением ожидания блокировки в каждой из реализаций."""
+    return request.param(transaction_service=TransactionService(), lock_timeout_ms=100, lock_retry_after=3)
+
+
+def make_operation(wallet_id, operation_type=OperationType.DEPOSIT, amount='10.00'):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletLockTimeout:
+    """Тесты для ограничения ожидания блокировки кошелька."""
+
+    def test_busy_wallet_fails_fast(self, wallet_service):
+        """Операция с занятым кошельком завершается ошибкой 429 после lock_timeout_ms."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        with WalletLockHolder(wallet.id), pytest.raises(WalletLockTimeoutException) as exc_info:
+            wallet_service.withdrawal(make_operation(wallet.id, OperationType.WITHDRAWAL))
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers == {'Retry-After': '3'}
+        assert exc_info.value.waited_ms >= 100
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('100.00')
+        assert not WalletTransaction.objects.filter(wallet_id=wallet.id).exists()
+
+    def test_free_wallet_is_not_affected(self, wallet_service):
+        """Операция со свободным кошельком выполняется как обычно."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+
+        transaction_dto = wallet_service.deposit(make_operation(wallet.id))
+
+        assert transaction_dto.balance_after == Decimal('110.00')
@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.shards import WalletShardService
+from core.apps.wallets.services.wallets import WalletQueryService
+from tests.factories.wallets import WalletFactory, WalletTransactionFactory
+
+
+@pytest.fixture
+def wallet_query_service():
+    """Фикстура для создания экземпляра WalletQueryService."""
+    return WalletQueryService()
+
+
+@pytest.mark.django_db
+class TestWalletLookup:
+    """Тесты для получения нескольких кошельков одним запросом."""
+
+    def test_get_wallets_matches_single_reads(self, wallet_query_service):
+        """Кошельки по id и по пользователям совпадают с чтением по одному и упорядочены по id."""
+        wallets = WalletFactory.create_batch(3)
+        for wallet in wallets:
+            WalletTransactionFactory.create_batch(2, wallet=wallet)
+
+        wallet_dtos = wallet_query_service.get_wallets(
+            wallet_ids=[wallets[0].id, uuid.uuid4()],
+            user_ids=[wallets[0].user_id, wallets[1].user_id, 0]
+        )
+
+        assert wallet_dtos == sorted(
+            [wallet_query_service.get_wallet_by_id(wallet.id) for wallet in wallets[:2]],
+            key=lambda wallet_dto: wallet_dto.id
+        )
+        assert wallet_dtos == async_to_sync(wallet_query_service.aget_wallets)(
+            wallet_ids=[wallets[0].id, uuid.uuid4()],
+            user_ids=[wallets[0].user_id, wallets[1].user_id, 0]
+        )
+
+    def test_get_wallets_uses_constant_number_of_queries(self, wallet_query_service, django_assert_num_queries):
+        """Кошельки со снимками читаются одним запросом, остальные транзакции - одним оконным запросом."""
+        wallets = WalletFactory.create_batch(4)
+        for wallet in wallets:
+            WalletTransactionFactory.create_batch(7, wallet=wallet)
+        wallet_ids = [wallet.id for wallet in wallets]
+
+        with django_assert_num_queries(1):
+            with_snapshots = wallet_query_service.get_wallets(wallet_ids=wallet_ids, user_ids=[])
+
+        Wallet.objects.filter(id__in=wallet_ids[:2]).update(last_transactions=None)
+        WalletShardService().enable_sharding(wallet_id=wallet_ids[2], shard_count=2)
+        with django_assert_num_queries(2):
+            without_snapshots = wallet_query_service.get_wallets(wallet_ids=wallet_ids, user_ids=[])
+
+        assert [len(wallet_dto.last_transaction) for wallet_dto in without_snapshots] == [5, 5, 5, 5]
+        assert [wallet_dto.last_transaction for wallet_dto in without_snapshots] == [
+            wallet_dto.last_transaction for wallet_dto in with_snapshots
+        ]
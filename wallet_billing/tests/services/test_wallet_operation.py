@@ -2,15 +2,25 @@ import uuid
 from decimal import Decimal
 
 import pytest
-from django.core.exceptions import ValidationError
+from asgiref.sync import async_to_sync
 
 from core.apps.common.enums import OperationType, TransactionStatus
 from core.apps.wallets.dto.transaction import TransactionDTO
 from core.apps.wallets.dto.wallets import WalletOperationDTO
-from core.apps.wallets.exception.wallets import WalletNotFoundException, InsufficientFundsException
+from core.apps.wallets.exception.transaction import TransactionCreationException
+from core.apps.wallets.exception.wallets import (
+    BalanceLimitExceededException,
+    InsufficientFundsException,
+    WalletConcurrentUpdateException,
+    WalletNotFoundException,
+)
 from core.apps.wallets.models.wallets import Wallet
 from core.apps.wallets.services.transactions import TransactionService
-from core.apps.wallets.services.wallets import WalletCommandService
+from core.apps.wallets.services.wallets import (
+    AtomicUpdateWalletCommandService,
+    OptimisticWalletCommandService,
+    WalletCommandService,
+)
 from tests.factories.wallets import WalletFactory
 
 
@@ -20,10 +30,10 @@ def transaction_service():
     return TransactionService()
 
 
-@pytest.fixture
-def wallet_service(transaction_service):
-    """Фикстура для создания экземпляра WalletService."""
-    return WalletCommandService(transaction_service=transaction_service)
+@pytest.fixture(params=[WalletCommandService, AtomicUpdateWalletCommandService, OptimisticWalletCommandService])
+def wallet_service(request, transaction_service):
+    """Фикстура для создания экземпляра WalletService в каждой из реализаций."""
+    return request.param(transaction_service=transaction_service)
 
 
 class WalletTestDataFactory:
@@ -75,6 +85,23 @@ class TestWalletServiceDeposits:
             balance_after=balance_after
         )
 
+    def test_async_deposit_updates_balance(self, wallet_service):
+        """Асинхронное пополнение выполняет ту же операцию, что и синхронное."""
+
+        wallet = WalletFactory()
+        amount = WalletTestDataFactory.STANDARD_AMOUNT
+        operation = WalletTestDataFactory.create_deposit_operation(wallet.id, amount)
+
+        transaction = async_to_sync(wallet_service.adeposit)(operation)
+
+        self._assert_successful_deposit(
+            transaction=transaction,
+            wallet_id=wallet.id,
+            amount=amount,
+            balance_before=wallet.balance,
+            balance_after=wallet.balance + amount
+        )
+
     def test_deposit_with_nonexistent_wallet_raises_exception(self, wallet_service):
         """Пополнение несуществующего кошелька должно вызывать исключение."""
 
@@ -84,8 +111,8 @@ class TestWalletServiceDeposits:
         with pytest.raises(WalletNotFoundException):
             wallet_service.deposit(operation)
 
-    def test_deposit_exceeding_max_balance_raises_validation_error(self, wallet_service):
-        """Пополнение, превышающее максимальный баланс, должно вызывать ошибку валидации."""
+    def test_deposit_exceeding_max_balance_raises_exception(self, wallet_service):
+        """Пополнение, превышающее максимальный баланс, должно вызывать исключение без изменения баланса."""
 
         wallet = WalletFactory()
         operation = WalletTestDataFactory.create_deposit_operation(
@@ -93,7 +120,76 @@ class TestWalletServiceDeposits:
             WalletTestDataFactory.MAX_LIMIT_AMOUNT
         )
 
-        with pytest.raises(ValidationError):
+        with pytest.raises(BalanceLimitExceededException):
+            wallet_service.deposit(operation)
+        assert Wallet.objects.get(id=wallet.id).balance == wallet.balance
+
+    def test_deposit_with_invalid_amount_is_not_reported_as_limit_exceeded(self, wallet_service):
+        """Ошибка валидации, не связанная с максимальным балансом, не выдается за его превышение."""
+
+        wallet = WalletFactory()
+        operation = WalletTestDataFactory.create_deposit_operation(wallet.id, Decimal('0.005'))
+
+        with pytest.raises(TransactionCreationException):
+            wallet_service.deposit(operation)
+        assert Wallet.objects.get(id=wallet.id).balance == wallet.balance
+
+    def test_deposit_issues_no_validation_queries(self, transaction_service, django_assert_num_queries):
+        """
+        Пополнение выполняет только блокировку кошелька, обновление баланса,
+        вставку транзакции и ее события outbox (и BEGIN/COMMIT).
+        """
+
+        wallet = WalletFactory()
+        wallet_service = WalletCommandService(transaction_service=transaction_service)
+        operation = WalletTestDataFactory.create_deposit_operation(wallet.id)
+
+        with django_assert_num_queries(6):
+            wallet_service.deposit(operation)
+
+    @pytest.mark.parametrize('service_class', [AtomicUpdateWalletCommandService, OptimisticWalletCommandService])
+    def test_conditional_update_writes_balance_snapshot_and_transaction_in_one_query(
+        self, service_class, transaction_service, django_assert_num_queries
+    ):
+        """
+        Условный UPDATE баланса, добавление в снимок и вставка транзакции выполняются одним запросом:
+        остаются только чтение кошелька (для оптимистичной блокировки) и событие outbox.
+        """
+
+        wallet = WalletFactory()
+        wallet_service = service_class(transaction_service=transaction_service)
+        operation = WalletTestDataFactory.create_deposit_operation(wallet.id)
+        read_queries = 1 if service_class is OptimisticWalletCommandService else 0
+
+        with django_assert_num_queries(4 + read_queries):
+            wallet_service.deposit(operation)
+
+    def test_atomic_update_deposit_retries_update_not_matched_by_condition(self, transaction_service, monkeypatch):
+        """
+        Если условный UPDATE не прошел, а прочитанный после него баланс допускает пополнение,
+        UPDATE повторяется, а при повторном отказе возвращается ошибка конкурентного изменения.
+        """
+
+        wallet = WalletFactory(balance=WalletTestDataFactory.STANDARD_AMOUNT)
+        wallet_service = AtomicUpdateWalletCommandService(transaction_service=transaction_service)
+        operation = WalletTestDataFactory.create_deposit_operation(wallet.id)
+        update_balance = AtomicUpdateWalletCommandService._update_balance
+        calls = []
+
+        def update_balance_after_concurrent_change(service, **kwargs):
+            calls.append(kwargs)
+            return None if len(calls) == 1 else update_balance(service, **kwargs)
+
+        monkeypatch.setattr(AtomicUpdateWalletCommandService, '_update_balance', update_balance_after_concurrent_change)
+
+        transaction = wallet_service.deposit(operation)
+
+        self._assert_successful_deposit(transaction, wallet.id, WalletTestDataFactory.STANDARD_AMOUNT,
+                                        Decimal('100.00'), Decimal('200.00'))
+        assert len(calls) == 2
+
+        monkeypatch.setattr(AtomicUpdateWalletCommandService, '_update_balance', lambda service, **kwargs: None)
+        with pytest.raises(WalletConcurrentUpdateException):
             wallet_service.deposit(operation)
 
     def _assert_successful_deposit(self, transaction, wallet_id, amount, balance_before, balance_after):
@@ -150,6 +246,14 @@ class TestWalletServiceWithdrawals:
         wallet_balance_after = Wallet.objects.get(id=wallet.id).balance
         assert wallet_balance_after == balance_before
 
+    def test_withdrawal_with_nonexistent_wallet_raises_exception(self, wallet_service):
+        """Снятие с несуществующего кошелька должно вызывать исключение."""
+
+        operation = WalletTestDataFactory.create_withdrawal_operation(uuid.uuid4())
+
+        with pytest.raises(WalletNotFoundException):
+            wallet_service.withdrawal(operation)
+
     def _assert_successful_withdrawal(self, transaction, wallet_id, amount, balance_before, balance_after):
         """Проверяет успешность операции снятия."""
         # Проверка возвращенной транзакции
@@ -0,0 +1,98 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.db.models import F
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO
+from core.apps.wallets.exception.wallets import WalletConcurrentUpdateException
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import OptimisticWalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+class InterferingWalletCommandService(OptimisticWalletCommandService):
+    """Сервис, в котором перед первыми conflicts записями кошелек изменяет другая операция."""
+
+    def __init__(self, *args, conflicts=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conflicts = conflicts
+
+    def _compare_and_swap(self, operation_data, expected_version):
+        if self.conflicts:
+            self.conflicts -= 1
+            Wallet.objects.filter(id=operation_data.wallet_id).update(
+                balance=F('balance') + Decimal('1.00'),
+                version=F('version') + 1
+            )
+        return super()._compare_and_swap(operation_data, expected_version)
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOptimisticWalletCommandService:
+    """Тесты для операций с кошельком на основе оптимистичной блокировки."""
+
+    def test_operation_increments_wallet_version(self):
+        """Успешная операция увеличивает версию кошелька."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service = OptimisticWalletCommandService(transaction_service=TransactionService())
+
+        wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+
+        assert Wallet.objects.get(id=wallet.id).version == wallet.version + 1
+
+    def test_conflict_is_retried_with_fresh_balance(self):
+        """При конфликте версий операция повторяется с перечитанным балансом."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service = InterferingWalletCommandService(
+            transaction_service=TransactionService(), conflicts=2, backoff_base=0
+        )
+
+        transaction = wallet_service.withdrawal(make_operation(wallet.id, OperationType.WITHDRAWAL, '10.00'))
+
+        assert transaction.balance_before == Decimal('102.00')
+        assert transaction.balance_after == Decimal('92.00')
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('92.00')
+
+    def test_exhausted_attempts_raise_exception_without_transaction(self):
+        """Если все попытки завершились конфликтом, операция отклоняется и транзакция не создается."""
+        wallet = WalletFactory(balance=Decimal('100.00'))
+        wallet_service = InterferingWalletCommandService(
+            transaction_service=TransactionService(), conflicts=3, max_attempts=3, backoff_base=0
+        )
+
+        with pytest.raises(WalletConcurrentUpdateException) as exc_info:
+            wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '10.00'))
+
+        assert exc_info.value.status_code == 409
+        assert not WalletTransaction.objects.filter(wallet_id=wallet.id).exists()
+
+    def test_concurrent_deposits_do_not_lose_updates(self):
+        """Параллельные пополнения с повторами не теряют обновлений."""
+        wallet = WalletFactory(balance=Decimal('0.00'))
+        wallet_service = OptimisticWalletCommandService(transaction_service=TransactionService(), max_attempts=50)
+
+        def deposit(_):
+            try:
+                wallet_service.deposit(make_operation(wallet.id, OperationType.DEPOSIT, '1.00'))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(deposit, range(20)))
+
+        assert Wallet.objects.get(id=wallet.id).balance == Decimal('20.00')
+        assert WalletTransaction.objects.filter(wallet_id=wallet.id).count() == 20
@@ -1,9 +1,14 @@
 import uuid
+from decimal import Decimal
 
 import pytest
+from asgiref.sync import async_to_sync
 
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO, WalletValidatorsDTO
 from core.apps.wallets.exception.wallets import WalletNotFoundException
-from core.apps.wallets.services.wallets import WalletQueryService
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService, WalletQueryService
 from tests.factories.wallets import WalletFactory, WalletTransactionFactory
 
 
@@ -34,3 +39,61 @@ class TestWalletQueryService:
         wallet_id = uuid.uuid4()
         with pytest.raises(WalletNotFoundException):
             wallet_query_service.get_wallet_by_id(wallet_id)
+
+    def test_aget_wallet_by_id_success(self, wallet_query_service):
+        """Асинхронное получение кошелька возвращает те же данные, что и синхронное."""
+        wallet = WalletFactory()
+        tr1 = WalletTransactionFactory(wallet=wallet)
+        tr2 = WalletTransactionFactory(wallet=wallet)
+        wallet_data = async_to_sync(wallet_query_service.aget_wallet_by_id)(wallet.id)
+        assert wallet_data == wallet_query_service.get_wallet_by_id(wallet.id)
+        assert [str(transaction.id) for transaction in wallet_data.last_transaction] == [tr2.id, tr1.id]
+
+    def test_aget_wallet_by_id_not_found(self, wallet_query_service):
+        """Асинхронное получение несуществующего кошелька вызывает исключение"""
+        with pytest.raises(WalletNotFoundException):
+            async_to_sync(wallet_query_service.aget_wallet_by_id)(uuid.uuid4())
+
+    def test_get_wallet_by_id_loads_only_last_transactions(self, wallet_query_service, django_assert_num_queries):
+        """Кошелек и его последние транзакции загружаются одним запросом без всей истории."""
+        wallet = WalletFactory()
+        transactions = WalletTransactionFactory.create_batch(7, wallet=wallet)
+
+        with django_assert_num_queries(1):
+            wallet_data = wallet_query_service.get_wallet_by_id(wallet.id)
+
+        assert [str(transaction.id) for transaction in wallet_data.last_transaction] == [
+            transaction.id for transaction in reversed(transactions[2:])
+        ]
+        assert wallet_data.user_id == wallet.user_id
+
+    def test_get_wallet_validators_match_wallet_data(self, wallet_query_service, django_assert_num_queries):
+        """Валидаторы получаются одним запросом и совпадают с валидаторами данных кошелька."""
+        wallet = WalletFactory()
+        WalletTransactionFactory.create_batch(7, wallet=wallet)
+
+        with django_assert_num_queries(1):
+            validators = wallet_query_service.get_wallet_validators(wallet.id)
+
+        assert validators == WalletValidatorsDTO.from_wallet(wallet_query_service.get_wallet_by_id(wallet.id))
+        assert validators == async_to_sync(wallet_query_service.aget_wallet_validators)(wallet.id)
+
+    def test_get_wallet_validators_change_after_operation(self, wallet_query_service):
+        """Операция по кошельку меняет ETag и не уменьшает Last-Modified."""
+        wallet = WalletFactory()
+        validators = wallet_query_service.get_wallet_validators(wallet.id)
+
+        WalletCommandService(transaction_service=TransactionService()).deposit(WalletOperationDTO(
+            wallet_id=wallet.id,
+            operation_type=OperationType.DEPOSIT,
+            amount=Decimal('10.00')
+        ))
+        changed_validators = wallet_query_service.get_wallet_validators(wallet.id)
+
+        assert changed_validators.etag != validators.etag
+        assert changed_validators.last_modified > validators.last_modified
+
+    def test_get_wallet_validators_not_found(self, wallet_query_service):
+        """Валидаторы несуществующего кошелька не получаются"""
+        with pytest.raises(WalletNotFoundException):
+            wallet_query_service.get_wallet_validators(uuid.uuid4())
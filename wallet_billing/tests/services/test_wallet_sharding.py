@@ -0,0 +1,195 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletOperationDTO, WalletTransferDTO
+from core.apps.wallets.exception.wallets import BalanceLimitExceededException, InsufficientFundsException
+from core.apps.wallets.models.shards import WalletBalanceShard
+from core.apps.wallets.models.wallets import MAX_WALLET_BALANCE, Wallet
+from core.apps.wallets.services.shards import WalletShardService
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import ShardedWalletCommandService, WalletQueryService
+from tests.factories.wallets import WalletFactory
+
+
+SHARD_COUNT = 4
+
+
+@pytest.fixture
+def wallet_service():
+    """Фикстура для создания экземпляра ShardedWalletCommandService."""
+    return ShardedWalletCommandService(transaction_service=TransactionService())
+
+
+@pytest.fixture
+def sharded_wallet():
+    """Шардированный кошелек с балансом 100.00 в строке кошелька."""
+    wallet = WalletFactory(balance=Decimal('100.00'))
+    WalletShardService().enable_sharding(wallet_id=wallet.id, shard_count=SHARD_COUNT)
+    return wallet
+
+
+def make_operation(wallet_id, operation_type, amount):
+    return WalletOperationDTO(
+        wallet_id=uuid.UUID(str(wallet_id)),
+        operation_type=operation_type,
+        amount=Decimal(amount)
+    )
+
+
+def get_total_balance(wallet_id):
+    return WalletShardService.get_total_balance(wallet_id)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletSharding:
+    """Тесты для шардированного баланса кошелька."""
+
+    def test_deposit_goes_to_shard_without_touching_wallet_row(self, wallet_service, sharded_wallet):
+        """Пополнение шардированного кошелька зачисляется на часть баланса, полный баланс растет."""
+        transaction = wallet_service.deposit(make_operation(sharded_wallet.id, OperationType.DEPOSIT, '30.00'))
+
+        assert Wallet.objects.get(id=sharded_wallet.id).balance == Decimal('100.00')
+        assert WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id, balance=Decimal('30.00')).count() == 1
+        assert transaction.balance_before == Decimal('100.00')
+        assert transaction.balance_after == Decimal('130.00')
+
+    def test_query_service_returns_total_balance(self, wallet_service, sharded_wallet):
+        """Чтение кошелька возвращает сумму строки кошелька и частей баланса."""
+        for _ in range(3):
+            wallet_service.deposit(make_operation(sharded_wallet.id, OperationType.DEPOSIT, '10.00'))
+
+        wallet_dto = WalletQueryService().get_wallet_by_id(sharded_wallet.id)
+
+        assert wallet_dto.balance == Decimal('130.00')
+        assert len(wallet_dto.last_transaction) == 3
+
+    def test_withdrawal_from_shard_when_wallet_row_is_short(self, wallet_service, sharded_wallet):
+        """Списание больше баланса строки кошелька берется из части, на которой хватает средств."""
+        wallet_service.deposit(make_operation(sharded_wallet.id, OperationType.DEPOSIT, '200.00'))
+
+        transaction = wallet_service.withdrawal(make_operation(sharded_wallet.id, OperationType.WITHDRAWAL, '150.00'))
+
+        assert Wallet.objects.get(id=sharded_wallet.id).balance == Decimal('100.00')
+        assert transaction.balance_before == Decimal('300.00')
+        assert transaction.balance_after == Decimal('150.00')
+
+    def test_withdrawal_consolidates_shards(self, wallet_service, sharded_wallet):
+        """Если ни на одной части не хватает средств, части консолидируются в строку кошелька."""
+        WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).update(balance=Decimal('50.00'))
+
+        transaction = wallet_service.withdrawal(make_operation(sharded_wallet.id, OperationType.WITHDRAWAL, '250.00'))
+
+        assert Wallet.objects.get(id=sharded_wallet.id).balance == Decimal('50.00')
+        assert not WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).exclude(balance=0).exists()
+        assert transaction.balance_after == Decimal('50.00')
+
+    def test_withdrawal_from_shard_bumps_wallet_version(self, wallet_service, sharded_wallet):
+        """Списание только с части баланса увеличивает версию и время изменения кошелька."""
+        wallet_service.deposit(make_operation(sharded_wallet.id, OperationType.DEPOSIT, '200.00'))
+        wallet_before = Wallet.objects.get(id=sharded_wallet.id)
+
+        wallet_service.withdrawal(make_operation(sharded_wallet.id, OperationType.WITHDRAWAL, '150.00'))
+
+        wallet = Wallet.objects.get(id=sharded_wallet.id)
+        assert wallet.balance == wallet_before.balance
+        assert wallet.version == wallet_before.version + 1
+        assert wallet.updated_at > wallet_before.updated_at
+
+    def test_deposit_over_shard_limit_checks_total_balance(self, wallet_service, sharded_wallet):
+        """
+        Пополнение больше лимита части выполняется после консолидации, а превышение
+        максимального баланса по полному балансу отклоняется.
+        """
+        Wallet.objects.filter(id=sharded_wallet.id).update(balance=MAX_WALLET_BALANCE - Decimal('100.00'))
+        WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id, index=0).update(balance=Decimal('20.00'))
+
+        transaction = wallet_service.deposit(make_operation(sharded_wallet.id, OperationType.DEPOSIT, '30.00'))
+
+        assert Wallet.objects.get(id=sharded_wallet.id).balance == MAX_WALLET_BALANCE - Decimal('50.00')
+        assert not WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).exclude(balance=0).exists()
+        assert transaction.balance_after == MAX_WALLET_BALANCE - Decimal('50.00')
+
+        with pytest.raises(BalanceLimitExceededException):
+            wallet_service.deposit(make_operation(sharded_wallet.id, OperationType.DEPOSIT, '60.00'))
+        assert get_total_balance(sharded_wallet.id) == MAX_WALLET_BALANCE - Decimal('50.00')
+
+    def test_concurrent_deposits_do_not_exceed_max_balance(self, wallet_service, sharded_wallet):
+        """Параллельные пополнения разных частей не поднимают полный баланс выше максимального."""
+        Wallet.objects.filter(id=sharded_wallet.id).update(balance=MAX_WALLET_BALANCE - Decimal('100.00'))
+        operations = [make_operation(sharded_wallet.id, OperationType.DEPOSIT, '15.00') for _ in range(20)]
+
+        def run(operation):
+            try:
+                return wallet_service.deposit(operation)
+            except BalanceLimitExceededException:
+                return None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(run, operations))
+
+        deposited = sum(1 for result in results if result is not None) * Decimal('15.00')
+        assert get_total_balance(sharded_wallet.id) == MAX_WALLET_BALANCE - Decimal('100.00') + deposited
+        assert get_total_balance(sharded_wallet.id) <= MAX_WALLET_BALANCE
+
+    def test_withdrawal_exceeding_total_balance_raises_exception(self, wallet_service, sharded_wallet):
+        """Списание больше полного баланса отклоняется, полный баланс не меняется."""
+        WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).update(balance=Decimal('50.00'))
+
+        with pytest.raises(InsufficientFundsException):
+            wallet_service.withdrawal(make_operation(sharded_wallet.id, OperationType.WITHDRAWAL, '500.00'))
+
+        assert get_total_balance(sharded_wallet.id) == Decimal('300.00')
+
+    def test_transfer_from_sharded_wallet_uses_total_balance(self, wallet_service, sharded_wallet):
+        """Перевод с шардированного кошелька учитывает средства в частях баланса."""
+        target = WalletFactory(balance=Decimal('0.00'))
+        WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).update(balance=Decimal('25.00'))
+
+        wallet_service.transfer(WalletTransferDTO(
+            source_wallet_id=uuid.UUID(str(sharded_wallet.id)),
+            target_wallet_id=uuid.UUID(str(target.id)),
+            amount=Decimal('180.00')
+        ))
+
+        assert get_total_balance(sharded_wallet.id) == Decimal('20.00')
+        assert Wallet.objects.get(id=target.id).balance == Decimal('180.00')
+
+    def test_disable_sharding_moves_balance_to_wallet(self, sharded_wallet):
+        """Выключение шардирования переносит баланс частей в строку кошелька и удаляет части."""
+        WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).update(balance=Decimal('10.00'))
+
+        WalletShardService().disable_sharding(wallet_id=sharded_wallet.id)
+
+        wallet = Wallet.objects.get(id=sharded_wallet.id)
+        assert wallet.balance == Decimal('140.00')
+        assert wallet.shard_count == 0
+        assert not WalletBalanceShard.objects.filter(wallet_id=sharded_wallet.id).exists()
+
+    def test_concurrent_deposits_and_withdrawals_keep_total_balance(self, wallet_service, sharded_wallet):
+        """Параллельные пополнения и списания не теряют обновлений и не блокируют друг друга."""
+        operations = [
+            make_operation(sharded_wallet.id, OperationType.DEPOSIT, '10.00') for _ in range(20)
+        ] + [
+            make_operation(sharded_wallet.id, OperationType.WITHDRAWAL, '5.00') for _ in range(20)
+        ]
+
+        def run(operation):
+            try:
+                if operation.operation_type == OperationType.DEPOSIT:
+                    wallet_service.deposit(operation)
+                else:
+                    wallet_service.withdrawal(operation)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(run, operations))
+
+        assert get_total_balance(sharded_wallet.id) == Decimal('200.00')
@@ -1,13 +1,23 @@
+import datetime
 import uuid
+from dataclasses import replace
 from decimal import Decimal
 
 import pytest
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 from core.apps.common.enums import OperationType, TransactionStatus
 from core.apps.wallets.dto.transaction import TransactionDTO
-from core.apps.wallets.exception.transaction import TransactionCreationException
+from core.apps.wallets.exception.transaction import (
+    IdempotencyKeyConflictException,
+    TransactionBatchCreationException,
+    TransactionCreationException,
+)
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
 from core.apps.wallets.services.transactions import TransactionService
-from tests.factories.wallets import WalletFactory
+from tests.factories.wallets import WalletFactory, WalletTransactionFactory
 
 
 @pytest.fixture
@@ -59,3 +69,84 @@ class TestTransactionService:
 
         with pytest.raises(TransactionCreationException):
             transaction_service.create_transaction(sample_transaction_dto)
+
+    def test_create_transaction_failed_with_invalid_status(self, transaction_service, sample_transaction_dto):
+        """Транзакция с неизвестным статусом отклоняется до запроса к БД"""
+        sample_transaction_dto.status = "unknown"
+
+        with pytest.raises(TransactionCreationException):
+            transaction_service.create_transaction(sample_transaction_dto, check_wallet=False)
+
+    def test_create_transaction_failed_with_excess_decimal_places(self, transaction_service, sample_transaction_dto):
+        """Сумма с тремя знаками после запятой не проходит валидацию"""
+        sample_transaction_dto.amount = Decimal('1.001')
+
+        with pytest.raises(TransactionCreationException):
+            transaction_service.create_transaction(sample_transaction_dto)
+
+    def test_balance_update_validates_transaction_before_writing(self, transaction_service, sample_transaction_dto,
+                                                                 django_assert_num_queries):
+        """Некорректная транзакция отклоняется до изменения баланса, без запросов к БД"""
+        sample_transaction_dto.amount = Decimal('-100.00')
+        sample_transaction_dto.balance_before = sample_transaction_dto.balance_after = None
+
+        with django_assert_num_queries(0), pytest.raises(TransactionCreationException):
+            transaction_service.create_transaction_with_balance_update(
+                sample_transaction_dto, delta=Decimal('-100.00'), condition='{balance} >= %s', condition_params=[0]
+            )
+
+    def test_negative_balance_rejected_by_db_constraint(self, sample_transaction_dto):
+        """Ограничение БД отклоняет отрицательный баланс, записанный в обход валидации"""
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Wallet.objects.filter(id=sample_transaction_dto.wallet_id).update(balance=Decimal('-1.00'))
+
+    def test_create_transaction_with_duplicate_idempotency_key(self, transaction_service, sample_transaction_dto):
+        """Повторное создание транзакции с тем же ключом идемпотентности вызывает конфликт"""
+        sample_transaction_dto.idempotency_key = "key"
+        transaction_service.create_transaction(sample_transaction_dto)
+
+        with pytest.raises(IdempotencyKeyConflictException):
+            transaction_service.create_transaction(sample_transaction_dto)
+
+    def test_create_transactions_reports_invalid_transaction(self, transaction_service, sample_transaction_dto):
+        """Ошибка валидации пакета сообщает данные непрошедшей транзакции, а не последней в пакете"""
+        invalid_transaction = replace(sample_transaction_dto, amount=Decimal('-5.00'))
+
+        with pytest.raises(TransactionCreationException) as exc_info:
+            transaction_service.create_transactions([invalid_transaction, sample_transaction_dto])
+
+        assert exc_info.value.amount == Decimal('-5.00')
+
+    def test_create_transactions_reports_batch_on_integrity_error(self, transaction_service, sample_transaction_dto):
+        """Нарушение целостности при вставке пакета сообщает кошельки и размер пакета"""
+        sample_transaction_dto.idempotency_key = "key"
+
+        with pytest.raises(TransactionBatchCreationException) as exc_info:
+            transaction_service.create_transactions([sample_transaction_dto, sample_transaction_dto])
+
+        assert exc_info.value.wallet_ids == [sample_transaction_dto.wallet_id]
+        assert exc_info.value.count == 2
+
+    def test_get_by_idempotency_key(self, transaction_service, sample_transaction_dto):
+        """Транзакция находится по ключу идемпотентности только в своем кошельке"""
+        sample_transaction_dto.idempotency_key = "key"
+        created = transaction_service.create_transaction(sample_transaction_dto)
+
+        assert transaction_service.get_by_idempotency_key(sample_transaction_dto.wallet_id, "key").id == created.id
+        assert transaction_service.get_by_idempotency_key(uuid.uuid4(), "key") is None
+
+    def test_prune_idempotency_keys(self, transaction_service):
+        """Очищаются только ключи транзакций, созданных раньше границы"""
+        expired = WalletTransactionFactory.create_batch(3, idempotency_key="expired")
+        actual = WalletTransactionFactory(idempotency_key="actual")
+        WalletTransaction.objects.filter(id__in=[tr.id for tr in expired]).update(
+            created_at=timezone.now() - datetime.timedelta(days=2)
+        )
+
+        pruned = transaction_service.prune_idempotency_keys(
+            expired_before=timezone.now() - datetime.timedelta(days=1),
+            batch_size=2
+        )
+
+        assert pruned == 3
+        assert str(WalletTransaction.objects.filter(idempotency_key__isnull=False).get().id) == actual.id
@@ -0,0 +1,78 @@
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from core.apps.common.enums import OperationType
+from core.apps.wallets.dto.wallets import WalletTransferDTO
+from core.apps.wallets.exception.wallets import (
+    InsufficientFundsException,
+    SameWalletTransferException,
+    WalletNotFoundException,
+)
+from core.apps.wallets.models.transaction import WalletTransaction
+from core.apps.wallets.models.wallets import Wallet
+from core.apps.wallets.services.transactions import TransactionService
+from core.apps.wallets.services.wallets import WalletCommandService
+from tests.factories.wallets import WalletFactory
+
+
+@pytest.fixture
+def wallet_service():
+    """Фикстура для создания экземпляра WalletCommandService."""
+    return WalletCommandService(transaction_service=TransactionService())
+
+
+def make_transfer(source_wallet_id, target_wallet_id, amount):
+    return WalletTransferDTO(
+        source_wallet_id=uuid.UUID(str(source_wallet_id)),
+        target_wallet_id=uuid.UUID(str(target_wallet_id)),
+        amount=Decimal(amount)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWalletServiceTransfer:
+    """Тесты для перевода средств между кошельками."""
+
+    def test_successful_transfer_updates_both_wallets(self, wallet_service):
+        """Перевод списывает средства у отправителя, зачисляет получателю и создает две связанные транзакции."""
+        source = WalletFactory(balance=Decimal('100.00'))
+        target = WalletFactory(balance=Decimal('10.00'))
+
+        result = wallet_service.transfer(make_transfer(source.id, target.id, '40.00'))
+
+        assert Wallet.objects.get(id=source.id).balance == Decimal('60.00')
+        assert Wallet.objects.get(id=target.id).balance == Decimal('50.00')
+        assert result.source_transaction.operation_type == OperationType.TRANSFER
+        assert result.source_transaction.balance_after == Decimal('60.00')
+        assert result.target_transaction.balance_after == Decimal('50.00')
+        assert result.source_transaction.related_transaction_id == result.target_transaction.id
+        assert WalletTransaction.objects.get(id=result.target_transaction.id).related_transaction_id == \
+            result.source_transaction.id
+
+    def test_transfer_with_insufficient_funds_changes_nothing(self, wallet_service):
+        """Перевод суммы больше баланса отправителя не изменяет ни один кошелек."""
+        source = WalletFactory(balance=Decimal('10.00'))
+        target = WalletFactory(balance=Decimal('10.00'))
+
+        with pytest.raises(InsufficientFundsException):
+            wallet_service.transfer(make_transfer(source.id, target.id, '40.00'))
+
+        assert Wallet.objects.get(id=source.id).balance == Decimal('10.00')
+        assert Wallet.objects.get(id=target.id).balance == Decimal('10.00')
+        assert not WalletTransaction.objects.exists()
+
+    def test_transfer_to_nonexistent_wallet_raises_exception(self, wallet_service):
+        """Перевод на несуществующий кошелек вызывает исключение."""
+        source = WalletFactory()
+
+        with pytest.raises(WalletNotFoundException):
+            wallet_service.transfer(make_transfer(source.id, uuid.uuid4(), '1.00'))
+
+    def test_transfer_to_same_wallet_raises_exception(self, wallet_service):
+        """Перевод на тот же кошелек вызывает исключение."""
+        wallet = WalletFactory()
+
+        with pytest.raises(SameWalletTransferException):
+            wallet_service.transfer(make_transfer(wallet.id, wallet.id, '1.00'))